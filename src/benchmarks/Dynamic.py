@@ -0,0 +1,50 @@
+from random import Random
+from time import perf_counter
+from statistics import median
+from utils import read_file, ford_single_source, DynamicShortestPaths
+# Update latency of DynamicShortestPaths against a full run of ford_single_source
+# after random edge cost changes. Run from the src directory: python -m benchmarks.Dynamic
+
+
+def benchmark_dynamic(file_path: str = "graph10k.txt", updates: int = 200, seed: int = 0) -> dict:
+    """
+    Times the repair of the shortest path tree and its full computation after random edge cost changes
+    :param file_path: the graph file
+    :param updates: the number of edge cost changes
+    :param seed: the seed of the changes
+    :return: the median and total seconds of both methods, and the number of repairs and full runs
+    """
+    graph = read_file(file_path)
+    edges = [(vertex1, vertex2) for vertex1, vertex2, _ in graph.edges_iterator()]
+    generator = Random(seed)
+    dynamic = DynamicShortestPaths(graph, 0)
+    repair_times, full_times = [], []
+
+    for _ in range(updates):
+        vertex1, vertex2 = generator.choice(edges)
+        cost = graph.get_edge_cost(vertex1, vertex2)
+        graph.set_edge_cost(vertex1, vertex2, max(0, cost + generator.randint(-cost, cost)))
+
+        start = perf_counter()
+        dist, _ = dynamic.tree()
+        repair_times.append(perf_counter() - start)
+
+        start = perf_counter()
+        expected, _ = ford_single_source(graph, 0)
+        full_times.append(perf_counter() - start)
+
+        if dist != expected:
+            raise AssertionError("ERROR: The repaired distances differ from the full run!")
+
+    return {
+        "repair_median": median(repair_times), "repair_total": sum(repair_times),
+        "full_median": median(full_times), "full_total": sum(full_times),
+        "repairs": dynamic.repairs, "recomputes": dynamic.recomputes
+    }
+
+
+if __name__ == "__main__":
+    result = benchmark_dynamic()
+    print(f"repair: {result['repair_median'] * 1e3:.3f} ms median, {result['repair_total']:.3f} s total")
+    print(f"full:   {result['full_median'] * 1e3:.3f} ms median, {result['full_total']:.3f} s total")
+    print(f"{result['repairs']} repairs, {result['recomputes']} full runs (including the initial one)")
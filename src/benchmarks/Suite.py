@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tracemalloc
+from statistics import median
+from time import perf_counter
+from utils import (
+    read_file, ford_algorithm, backwards_breadth_first_search, dag, compute_times, get_minimum_cost_hamiltonian,
+    uniform_costs, gnm_random_graph, layered_dag
+)
+# Scaling benchmarks of the main algorithms over the resource graphs and generated graphs of growing size,
+# compared against a stored baseline. Run from the src directory: python -m benchmarks.Suite --help
+
+# the resource graphs
+FILES = ["graph1k.txt", "graph1k_modif.txt", "graph10k.txt"]
+# the resource graphs whose vertex ids are not 0..n-1 (graph1k_modif.txt has no vertex 6 but a vertex 999)
+SPARSE_FILES = {"graph1k_modif.txt"}
+# the vertex counts of the generated graphs (with four edges per vertex)
+SIZES = [1000, 10000, 50000]
+# the vertex counts of the generated graphs of the quick run
+QUICK_SIZES = [1000, 5000]
+# the vertex counts of the dense graphs (with a quarter of all the possible edges) of the TSP heuristic
+TSP_SIZES = [200, 500, 1000]
+# the vertex counts of the dense graphs of the quick run
+QUICK_TSP_SIZES = [200, 500]
+# the shortest timed sample, in seconds: faster calls are repeated within one sample
+SAMPLE_TIME = 0.05
+# the default path of the baseline
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# the relative slowdown (or memory growth) reported as a regression
+THRESHOLD = 0.25
+
+
+def graph_size(graph) -> int:
+    """
+    :return: the number of vertices and edges of a graph, the operations of one run over it
+    """
+    return graph.vertex_count() + graph.edge_count()
+
+
+def topological_schedule(graph) -> tuple:
+    """
+    Sorts the activities topologically and computes their times
+    :return: the result of compute_times
+    """
+    return compute_times(graph, dag(graph))
+
+
+def create_cases(quick: bool = False) -> list:
+    """
+    Lists the benchmark cases
+    :param quick: use smaller generated graphs
+    :return: the (name, setup) pairs, where setup returns the function to time and the number of operations
+             of one call (the vertices and edges of the graph)
+    """
+    cases = []
+    for file_path in FILES[:2] if quick else FILES:
+        sparse = file_path in SPARSE_FILES
+
+        def read(file_path=file_path, sparse=sparse):
+            graph = read_file(file_path, sparse=sparse)
+            return lambda: read_file(file_path, sparse=sparse), graph_size(graph)
+
+        def read_compact(file_path=file_path, sparse=sparse):
+            graph = read_file(file_path, compact=True, sparse=sparse)
+            return lambda: read_file(file_path, compact=True, sparse=sparse), graph_size(graph)
+
+        def ford(file_path=file_path, sparse=sparse):
+            graph = read_file(file_path, sparse=sparse)
+            ending_vertex = max(graph.vertices_iterator())
+            return lambda: ford_algorithm(graph, 0, ending_vertex), graph_size(graph)
+
+        def bfs(file_path=file_path, sparse=sparse):
+            graph = read_file(file_path, sparse=sparse)
+            ending_vertex = max(graph.vertices_iterator())
+            return lambda: backwards_breadth_first_search(graph, 0, ending_vertex), graph_size(graph)
+
+        # the peak memory of the two reads compares Graph with CompactGraph
+        cases += [(f"read_file[{file_path}]", read), (f"read_file[{file_path}, compact]", read_compact),
+                  (f"ford_algorithm[{file_path}]", ford),
+                  (f"backwards_breadth_first_search[{file_path}]", bfs)]
+
+    for size in QUICK_SIZES if quick else SIZES:
+        def ford(size=size):
+            graph = gnm_random_graph(size, 4 * size, seed=size)
+            return lambda: ford_algorithm(graph, 0, size - 1), graph_size(graph)
+
+        def bfs(size=size):
+            graph = gnm_random_graph(size, 4 * size, seed=size)
+            return lambda: backwards_breadth_first_search(graph, 0, size - 1), graph_size(graph)
+
+        def schedule(size=size):
+            graph = layered_dag(size // 50, 50, 4, seed=size, durations=uniform_costs(1, 100))
+            return lambda: topological_schedule(graph), graph_size(graph)
+
+        cases += [(f"ford_algorithm[gnm-{size}]", ford), (f"backwards_breadth_first_search[gnm-{size}]", bfs),
+                  (f"compute_times[dag-{size}]", schedule)]
+
+    for size in QUICK_TSP_SIZES if quick else TSP_SIZES:
+        def hamiltonian(size=size):
+            graph = gnm_random_graph(size, size * (size - 1) // 4, seed=size)
+            return lambda: get_minimum_cost_hamiltonian(graph, 0, list()), graph_size(graph)
+
+        cases.append((f"get_minimum_cost_hamiltonian[dense-{size}]", hamiltonian))
+
+    return cases
+
+
+def measure(function, operations: int, repeat: int) -> dict:
+    """
+    Times a function and measures its peak memory
+    :param function: the function
+    :param operations: the number of operations of one call
+    :param repeat: the number of timed samples
+    :return: the median and minimum seconds of one call, the peak traced memory in bytes and the operations
+             per second
+    """
+    start = perf_counter()
+    function()
+    loops = max(1, int(SAMPLE_TIME / max(perf_counter() - start, 1e-9)))
+
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(loops):
+            function()
+        times.append((perf_counter() - start) / loops)
+
+    # the memory is traced in a separate call, since tracing slows the allocations down
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    seconds = median(times)
+    return {
+        "seconds": seconds, "min_seconds": min(times), "peak_memory": peak,
+        "ops_per_second": operations / seconds if seconds else float("Inf")
+    }
+
+
+def run_suite(quick: bool = False, repeat: int = 5, pattern: str = None, log=None) -> dict:
+    """
+    Runs the benchmark cases
+    :param quick: use smaller generated graphs
+    :param repeat: the number of timed samples of every case
+    :param pattern: only run the cases whose name contains it
+    :param log: a function called with the name and the result of every case, or None
+    :return: the results, with the Python version and the platform; a case that raised an exception
+             has its error message as result
+    """
+    results = dict()
+    for name, setup in create_cases(quick):
+        if pattern is not None and pattern not in name:
+            continue
+
+        try:
+            function, operations = setup()
+            results[name] = measure(function, operations, repeat)
+        except Exception as error:
+            results[name] = {"error": str(error)}
+        if log is not None:
+            log(name, results[name])
+
+    return {"python": platform.python_version(), "platform": platform.platform(), "cases": results}
+
+
+def compare_results(results: dict, baseline: dict, threshold: float = THRESHOLD) -> list:
+    """
+    Compares results against a baseline
+    :param results: the results of run_suite
+    :param baseline: earlier results of run_suite
+    :param threshold: the relative slowdown or memory growth reported as a regression
+    :return: the (case, metric, baseline value, new value) regressions
+    """
+    regressions = []
+    for name, result in results["cases"].items():
+        previous = baseline["cases"].get(name)
+        if previous is None or "error" in previous or "error" in result:
+            continue
+
+        for metric in ("min_seconds", "peak_memory"):
+            if result[metric] > previous[metric] * (1 + threshold):
+                regressions.append((name, metric, previous[metric], result[metric]))
+
+    return regressions
+
+
+def print_result(name: str, result: dict) -> None:
+    """
+    Prints the result of a case
+    """
+    if "error" in result:
+        print(f"{name:<60} {result['error']}")
+        return
+
+    print(f"{name:<60} {result['seconds'] * 1e3:>10.2f} ms {result['peak_memory'] / 2 ** 20:>9.2f} MiB "
+          f"{result['ops_per_second']:>14,.0f} ops/s")
+
+
+def main(arguments: list = None) -> int:
+    """
+    The command line entry point
+    :param arguments: the command line arguments, sys.argv by default
+    :return: the exit code, 1 if there are regressions
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.Suite", description="Runs the benchmark suite.")
+    parser.add_argument("--quick", action="store_true", help="use smaller graphs")
+    parser.add_argument("--repeat", type=int, default=5, help="timed samples of every case")
+    parser.add_argument("--filter", dest="pattern", help="only run the cases whose name contains this")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="the baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="the relative regression threshold")
+    options = parser.parse_args(arguments)
+
+    results = run_suite(options.quick, options.repeat, options.pattern, print_result)
+    if options.output:
+        with open(options.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if options.save_baseline:
+        with open(options.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"INFO: Baseline saved to {options.baseline}.")
+        return 0
+
+    if not os.path.exists(options.baseline):
+        print("INFO: No baseline to compare against, store one with --save-baseline.")
+        return 0
+
+    with open(options.baseline) as file:
+        regressions = compare_results(results, json.load(file), options.threshold)
+
+    for name, metric, previous, current in regressions:
+        print(f"REGRESSION: {name} {metric} went from {previous:.6g} to {current:.6g}.")
+    if not regressions:
+        print("INFO: No regressions.")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
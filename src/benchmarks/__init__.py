@@ -0,0 +1,5 @@
+# the suite is not imported here, so that python -m benchmarks.Suite does not import it twice:
+# use from benchmarks.Suite import run_suite, compare_results
+from .Dynamic import benchmark_dynamic
+
+__all__ = ["benchmark_dynamic"]
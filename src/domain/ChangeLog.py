@@ -0,0 +1,108 @@
+from collections import deque, namedtuple
+
+# A single modification of a graph. The costs are None when they do not apply:
+# vertex changes have no costs, added edges have no old cost and removed edges no new cost.
+Change = namedtuple("Change", ["sequence", "kind", "vertex1", "vertex2", "old_cost", "new_cost"])
+
+ADD_VERTEX = "add_vertex"
+REMOVE_VERTEX = "remove_vertex"
+ADD_EDGE = "add_edge"
+REMOVE_EDGE = "remove_edge"
+SET_EDGE_COST = "set_edge_cost"
+
+
+class ChangeLog:
+    """
+    A bounded log of the modifications made to a graph.
+
+    Every change gets a monotonically increasing sequence number. Only the most recent changes are kept
+    (a ring buffer), so a consumer that falls too far behind must rebuild instead of applying the deltas.
+    Subscribers are called synchronously with every change, right after the graph was modified.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        """
+        Creates a ChangeLog instance
+        :param capacity: the number of changes that are kept
+        """
+        if capacity < 1:
+            raise ValueError("ERROR: The capacity must be positive!")
+
+        self.__changes = deque(maxlen=capacity)
+        self.__sequence = 0
+        self.__subscribers = dict()
+        self.__next_token = 0
+
+    @property
+    def sequence(self) -> int:
+        """
+        :return: the sequence number of the last change (0 if nothing changed yet)
+        """
+        return self.__sequence
+
+    @property
+    def capacity(self) -> int:
+        """
+        :return: the number of changes that are kept
+        """
+        return self.__changes.maxlen
+
+    def __len__(self) -> int:
+        return len(self.__changes)
+
+    def record(self, kind: str, vertex1: int, vertex2: int = None, old_cost: int = None,
+               new_cost: int = None) -> Change:
+        """
+        Appends a change to the log and notifies the subscribers
+        :param kind: the kind of change (ADD_VERTEX, REMOVE_VERTEX, ADD_EDGE, REMOVE_EDGE or SET_EDGE_COST)
+        :param vertex1: the vertex, or the start point of the edge
+        :param vertex2: the endpoint of the edge
+        :param old_cost: the cost before the change
+        :param new_cost: the cost after the change
+        :return: the recorded change
+        """
+        self.__sequence += 1
+        change = Change(self.__sequence, kind, vertex1, vertex2, old_cost, new_cost)
+        self.__changes.append(change)
+
+        for callback in list(self.__subscribers.values()):
+            callback(change)
+
+        return change
+
+    def changes_since(self, sequence: int) -> list:
+        """
+        Returns the changes made after a sequence number
+        :param sequence: the sequence number of the last change the caller has seen
+        :return: the newer changes, oldest first
+        """
+        if sequence > self.__sequence:
+            raise ValueError("ERROR: The sequence number is in the future!")
+
+        if sequence == self.__sequence:
+            return []
+
+        if not self.__changes or self.__changes[0].sequence > sequence + 1:
+            raise LookupError("ERROR: The change log no longer holds the requested changes!")
+
+        return list(self.__changes)[sequence + 1 - self.__changes[0].sequence:]
+
+    def subscribe(self, callback) -> int:
+        """
+        Registers a function that is called with every new change
+        :param callback: the function, receiving a Change
+        :return: a token that can be passed to unsubscribe
+        """
+        self.__next_token += 1
+        self.__subscribers[self.__next_token] = callback
+        return self.__next_token
+
+    def unsubscribe(self, token: int) -> None:
+        """
+        Stops calling a subscribed function
+        :param token: the token returned by subscribe
+        """
+        if token not in self.__subscribers:
+            raise ValueError("ERROR: Unknown subscription!")
+
+        del self.__subscribers[token]
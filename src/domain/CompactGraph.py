@@ -0,0 +1,383 @@
+from random import randrange
+from collections.abc import Mapping
+
+from exceptions import VertexError, EdgeError
+from domain.FrozenGraph import FrozenGraph
+from domain.ChangeLog import ChangeLog, ADD_VERTEX, REMOVE_VERTEX, ADD_EDGE, REMOVE_EDGE, SET_EDGE_COST
+
+
+class EdgeCosts(Mapping):
+    """
+    A read-only view of the edge costs of a CompactGraph, keyed by (vertex1, vertex2) like Graph.costs.
+    """
+    __slots__ = ("__graph",)
+
+    def __init__(self, graph: "CompactGraph") -> None:
+        """
+        Creates an EdgeCosts view
+        :param graph: the graph whose costs are viewed
+        """
+        self.__graph = graph
+
+    def __getitem__(self, edge: tuple) -> int:
+        vertex1, vertex2 = edge
+        return self.__graph.neighbours[vertex1][vertex2]
+
+    def __contains__(self, edge: tuple) -> bool:
+        return self.__graph.is_edge(*edge)
+
+    def __iter__(self) -> iter:
+        for vertex1, outbound in self.__graph.neighbours.items():
+            for vertex2 in outbound:
+                yield vertex1, vertex2
+
+    def __len__(self) -> int:
+        return self.__graph.edge_count()
+
+    def items(self) -> iter:
+        for vertex1, outbound in self.__graph.neighbours.items():
+            for vertex2, cost in outbound.items():
+                yield (vertex1, vertex2), cost
+
+
+class CompactGraph:
+    """
+    A class representing a Directed Graph with compact storage.
+
+    Every vertex has a single mapping from its outbound neighbours to the edge costs, so an edge takes
+    one dictionary slot plus one slot in the inbound set of its endpoint, without a tuple key.
+    It has the same public interface as Graph; costs is a read-only view.
+    """
+    __slots__ = ("__outbound", "__inbound", "__costs", "__durations", "__edge_count", "__owners", "__version",
+                 "__change_log", "__weakref__")
+
+    def __init__(self, vertex_count: int = 0, edge_count: int = 0) -> None:
+        self.__outbound = dict()
+        self.__inbound = dict()
+        self.__costs = EdgeCosts(self)
+        self.__durations = dict()
+        self.__edge_count = 0
+
+        # number of graphs sharing the containers (see copy)
+        self.__owners = [1]
+
+        # incremented by every modification, so derived results can tell when they are stale
+        self.__version = 0
+        # the optional log of modifications (see enable_change_log)
+        self.__change_log = None
+
+        for vertex in range(vertex_count):
+            self.add_vertex(vertex)
+
+        for _ in range(edge_count):
+            vertex1 = randrange(vertex_count)
+            vertex2 = randrange(vertex_count)
+
+            while self.is_edge(vertex1, vertex2):
+                vertex1 = randrange(vertex_count)
+                vertex2 = randrange(vertex_count)
+
+            # Edge cost is random
+            self.add_edge(vertex1, vertex2, randrange(1000))
+
+    @property
+    def vertices(self):
+        """
+        :return: a set-like view of the vertices
+        """
+        return self.__outbound.keys()
+
+    @property
+    def neighbours(self) -> dict:
+        """
+        :return: the dictionary mapping every vertex to its outbound neighbours and their costs
+        """
+        return self.__outbound
+
+    @property
+    def transpose(self) -> dict:
+        """
+        :return: the dictionary of the transposed graph
+        """
+        return self.__inbound
+
+    @property
+    def costs(self) -> EdgeCosts:
+        """
+        :return: a read-only view of the edge costs
+        """
+        return self.__costs
+
+    @property
+    def durations(self) -> dict:
+        """
+        :return: the dictionary of activity durations
+        """
+        return self.__durations
+
+    @property
+    def version(self) -> int:
+        """
+        :return: the number of modifications made to the graph
+        """
+        return self.__version
+
+    @property
+    def change_log(self) -> ChangeLog:
+        """
+        :return: the log of modifications or None if it is not enabled
+        """
+        return self.__change_log
+
+    def enable_change_log(self, capacity: int = 1024) -> ChangeLog:
+        """
+        Starts recording the modifications of the graph in a bounded change log.
+        """
+        if self.__change_log is None:
+            self.__change_log = ChangeLog(capacity)
+
+        return self.__change_log
+
+    def disable_change_log(self) -> None:
+        """
+        Stops recording the modifications of the graph.
+        """
+        self.__change_log = None
+
+    def vertices_iterator(self) -> iter:
+        """
+        Returns an iterator to the set of vertices.
+        """
+        for vertex in self.__outbound:
+            yield vertex
+
+    def neighbours_iterator(self, vertex: int) -> iter:
+        """
+        Returns an iterator to the set of (outbound) neighbours of a vertex.
+        """
+        if not self.is_vertex(vertex):
+            raise VertexError("ERROR: Invalid vertex.")
+
+        for neighbour in self.__outbound[vertex]:
+            yield neighbour
+
+    def neighbour_costs_iterator(self, vertex: int) -> iter:
+        """
+        Returns an iterator to the (outbound neighbour, edge cost) pairs of a vertex.
+        """
+        if not self.is_vertex(vertex):
+            raise VertexError("ERROR: Invalid vertex.")
+
+        return iter(self.__outbound[vertex].items())
+
+    def transpose_iterator(self, vertex: int) -> iter:
+        """
+        Returns an iterator to the set of (inbound) neighbours of a vertex.
+        """
+        if not self.is_vertex(vertex):
+            raise VertexError("ERROR: Invalid vertex.")
+
+        for neighbour in self.__inbound[vertex]:
+            yield neighbour
+
+    def edges_iterator(self) -> iter:
+        """
+        Returns an iterator to the set of edges.
+        """
+        for vertex1, outbound in self.__outbound.items():
+            for vertex2, cost in outbound.items():
+                yield vertex1, vertex2, cost
+
+    def is_vertex(self, vertex: int) -> bool:
+        """
+        Returns True if vertex belongs to the graph.
+        """
+        return vertex in self.__outbound
+
+    def is_edge(self, vertex1: int, vertex2: int) -> bool:
+        """
+        Returns True if the edge from vertex1 to vertex2 belongs to the graph.
+        """
+        return vertex1 in self.__outbound and vertex2 in self.__outbound[vertex1]
+
+    def vertex_count(self) -> int:
+        """
+        Returns the number of vertices in the graph.
+        """
+        return len(self.__outbound)
+
+    def edge_count(self) -> int:
+        """
+        Returns the number of edges in the graph.
+        """
+        return self.__edge_count
+
+    def in_degree(self, vertex: int) -> int:
+        """
+        Returns the number of edges with the endpoint vertex.
+        """
+        if vertex not in self.__inbound:
+            raise VertexError("ERROR: Vertex does not exist.")
+
+        return len(self.__inbound[vertex])
+
+    def out_degree(self, vertex: int) -> int:
+        """
+        Returns the number of edges with the start point vertex.
+        """
+        if vertex not in self.__outbound:
+            raise VertexError("ERROR: Vertex does not exist.")
+
+        return len(self.__outbound[vertex])
+
+    def get_edge_cost(self, vertex1: int, vertex2: int) -> int:
+        """
+        Returns the cost of an edge if it exists.
+        """
+        if not self.is_edge(vertex1, vertex2):
+            raise EdgeError("ERROR: Edge does not exist.")
+
+        return self.__outbound[vertex1][vertex2]
+
+    def set_edge_cost(self, vertex1: int, vertex2: int, new_cost: int) -> None:
+        """
+        Sets the cost of an edge in the graph if it exists.
+        """
+        if not self.is_edge(vertex1, vertex2):
+            raise EdgeError("ERROR: Edge does not exist.")
+
+        self.__detach()
+        self.__version += 1
+        old_cost = self.__outbound[vertex1][vertex2]
+        self.__outbound[vertex1][vertex2] = new_cost
+
+        if self.__change_log is not None:
+            self.__change_log.record(SET_EDGE_COST, vertex1, vertex2, old_cost, new_cost)
+
+    def add_vertex(self, vertex: int) -> None:
+        """
+        Adds a vertex to the graph.
+        """
+        if self.is_vertex(vertex):
+            raise VertexError("ERROR: Vertex already exists.")
+
+        self.__detach()
+        self.__version += 1
+        self.__outbound[vertex] = dict()
+        self.__inbound[vertex] = set()
+
+        if self.__change_log is not None:
+            self.__change_log.record(ADD_VERTEX, vertex)
+
+    def add_edge(self, vertex1: int, vertex2: int, edge_cost: int = 0) -> None:
+        """
+        Adds an edge to the graph.
+        """
+        if self.is_edge(vertex1, vertex2):
+            raise EdgeError("ERROR: Edge already exists")
+
+        if not self.is_vertex(vertex1) or not self.is_vertex(vertex2):
+            raise EdgeError("ERROR: Vertices on edge do not exist.")
+
+        self.__detach()
+        self.__version += 1
+        self.__outbound[vertex1][vertex2] = edge_cost
+        self.__inbound[vertex2].add(vertex1)
+        self.__edge_count += 1
+
+        if self.__change_log is not None:
+            self.__change_log.record(ADD_EDGE, vertex1, vertex2, None, edge_cost)
+
+    def add_edges_unchecked(self, vertices1: list, vertices2: list, edge_costs: list) -> None:
+        """
+        Adds many edges to the graph at once, without validating them.
+        The caller must guarantee that every endpoint exists and that no edge is already in the graph.
+        """
+        self.__detach()
+        self.__version += 1
+        outbound = self.__outbound
+        inbound = self.__inbound
+
+        for vertex1, vertex2, edge_cost in zip(vertices1, vertices2, edge_costs):
+            outbound[vertex1][vertex2] = edge_cost
+            inbound[vertex2].add(vertex1)
+        self.__edge_count += len(vertices1)
+
+        if self.__change_log is not None:
+            for vertex1, vertex2, edge_cost in zip(vertices1, vertices2, edge_costs):
+                self.__change_log.record(ADD_EDGE, vertex1, vertex2, None, edge_cost)
+
+    def remove_edge(self, vertex1: int, vertex2: int) -> None:
+        """
+        Removes an edge from the graph.
+        """
+        if not self.is_edge(vertex1, vertex2):
+            raise EdgeError("ERROR: Edge does not exist.")
+
+        self.__detach()
+        self.__version += 1
+        old_cost = self.__outbound[vertex1].pop(vertex2)
+        self.__inbound[vertex2].remove(vertex1)
+        self.__edge_count -= 1
+
+        if self.__change_log is not None:
+            self.__change_log.record(REMOVE_EDGE, vertex1, vertex2, old_cost)
+
+    def remove_vertex(self, vertex: int) -> None:
+        """
+        Removes a vertex from the graph.
+        """
+        if not self.is_vertex(vertex):
+            raise VertexError("ERROR: Vertex doesn't exist.")
+
+        for node in list(self.__outbound[vertex]):
+            self.remove_edge(vertex, node)
+
+        for node in list(self.__inbound[vertex]):
+            self.remove_edge(node, vertex)
+
+        self.__detach()
+        self.__version += 1
+        del self.__outbound[vertex]
+        del self.__inbound[vertex]
+
+        if self.__change_log is not None:
+            self.__change_log.record(REMOVE_VERTEX, vertex)
+
+    def copy(self, copy_on_write: bool = False) -> "CompactGraph":
+        """
+        Returns a copy of the graph instance that can be modified independently of the original.
+        With copy_on_write the containers are shared until the first modification of either graph.
+        """
+        graph = CompactGraph()
+        graph.__durations = dict(self.__durations)
+        graph.__edge_count = self.__edge_count
+
+        if copy_on_write:
+            graph.__outbound = self.__outbound
+            graph.__inbound = self.__inbound
+            graph.__owners = self.__owners
+            self.__owners[0] += 1
+        else:
+            graph.__outbound = {vertex: outbound.copy() for vertex, outbound in self.__outbound.items()}
+            graph.__inbound = {vertex: inbound.copy() for vertex, inbound in self.__inbound.items()}
+
+        return graph
+
+    def __detach(self) -> None:
+        """
+        Gives the graph its own containers if they are shared with a copy.
+        """
+        if self.__owners[0] == 1:
+            return
+
+        self.__owners[0] -= 1
+        self.__owners = [1]
+        self.__outbound = {vertex: outbound.copy() for vertex, outbound in self.__outbound.items()}
+        self.__inbound = {vertex: inbound.copy() for vertex, inbound in self.__inbound.items()}
+
+    def freeze(self) -> FrozenGraph:
+        """
+        Returns an immutable CSR snapshot of the graph instance.
+        """
+        return FrozenGraph.from_graph(self)
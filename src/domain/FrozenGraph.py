@@ -0,0 +1,281 @@
+from array import array
+from types import MappingProxyType
+
+from exceptions import VertexError, EdgeError
+
+
+class FrozenGraph:
+    """
+    An immutable compressed sparse row (CSR) snapshot of a Directed Graph.
+
+    Vertices are stored in ascending order and referred to internally by their
+    position in that order. The outbound edges of the vertex at position p are
+    targets[offsets[p]:offsets[p + 1]] with the matching weights, and the same
+    layout is used for the inbound (transposed) edges.
+    """
+
+    def __init__(self, ids, offsets, targets, weights,
+                 transpose_offsets, transpose_targets, transpose_weights, durations: dict = None) -> None:
+        """
+        Creates a FrozenGraph instance from already built CSR arrays
+        :param ids: the vertex ids, in ascending order
+        :param offsets: the outbound row offsets (vertex_count + 1 entries)
+        :param targets: the positions of the outbound neighbours
+        :param weights: the costs of the outbound edges
+        :param transpose_offsets: the inbound row offsets (vertex_count + 1 entries)
+        :param transpose_targets: the positions of the inbound neighbours
+        :param transpose_weights: the costs of the inbound edges
+        :param durations: the activity durations
+        """
+        self.__ids = ids
+        self.__offsets = offsets
+        self.__targets = targets
+        self.__weights = weights
+        self.__transpose_offsets = transpose_offsets
+        self.__transpose_targets = transpose_targets
+        self.__transpose_weights = transpose_weights
+        self.__durations = MappingProxyType(dict(durations or {}))
+
+        # when the ids are exactly 0..n-1 the position of a vertex is the vertex itself
+        self.__dense = len(ids) == 0 or (ids[0] == 0 and ids[-1] == len(ids) - 1)
+        self.__index = None if self.__dense else {vertex: position for position, vertex in enumerate(ids)}
+
+    def __reduce__(self) -> tuple:
+        # the durations view cannot be pickled, so the snapshot is rebuilt from its arrays; the memoryviews
+        # of a memory-mapped file cannot be pickled either, so they are copied into arrays
+        arrays = [values if isinstance(values, array) else array("q", bytes(values))
+                  for values in (self.__ids, self.__offsets, self.__targets, self.__weights, self.__transpose_offsets,
+                                 self.__transpose_targets, self.__transpose_weights)]
+        return FrozenGraph, (*arrays, dict(self.__durations))
+
+    @staticmethod
+    def from_graph(graph) -> "FrozenGraph":
+        """
+        Builds a CSR snapshot of a graph
+        :param graph: the graph
+        :return: the snapshot
+        """
+        ids = array("q", sorted(graph.vertices_iterator()))
+        dense = len(ids) == 0 or (ids[0] == 0 and ids[-1] == len(ids) - 1)
+        index = None if dense else {vertex: position for position, vertex in enumerate(ids)}
+        costs = graph.costs
+
+        def build(adjacency: dict, outbound: bool) -> tuple:
+            offsets = array("q", [0])
+            targets = array("q")
+            weights = array("q")
+            for vertex in ids:
+                for other in adjacency[vertex]:
+                    targets.append(other if dense else index[other])
+                    weights.append(costs[(vertex, other)] if outbound else costs[(other, vertex)])
+                offsets.append(len(targets))
+            return offsets, targets, weights
+
+        offsets, targets, weights = build(graph.neighbours, True)
+        transpose_offsets, transpose_targets, transpose_weights = build(graph.transpose, False)
+
+        return FrozenGraph(ids, offsets, targets, weights,
+                           transpose_offsets, transpose_targets, transpose_weights, graph.durations)
+
+    @property
+    def ids(self):
+        """
+        :return: the vertex ids, indexed by position
+        """
+        return self.__ids
+
+    @property
+    def offsets(self):
+        """
+        :return: the outbound row offsets
+        """
+        return self.__offsets
+
+    @property
+    def targets(self):
+        """
+        :return: the positions of the outbound neighbours
+        """
+        return self.__targets
+
+    @property
+    def weights(self):
+        """
+        :return: the costs of the outbound edges
+        """
+        return self.__weights
+
+    @property
+    def transpose_offsets(self):
+        """
+        :return: the inbound row offsets
+        """
+        return self.__transpose_offsets
+
+    @property
+    def transpose_targets(self):
+        """
+        :return: the positions of the inbound neighbours
+        """
+        return self.__transpose_targets
+
+    @property
+    def transpose_weights(self):
+        """
+        :return: the costs of the inbound edges
+        """
+        return self.__transpose_weights
+
+    @property
+    def durations(self) -> MappingProxyType:
+        """
+        :return: a read-only view of the activity durations
+        """
+        return self.__durations
+
+    @property
+    def version(self) -> int:
+        """
+        :return: the number of modifications made to the graph, always 0 since it cannot be modified
+        """
+        return 0
+
+    @property
+    def change_log(self) -> None:
+        """
+        :return: None, since the graph cannot be modified there is nothing to log
+        """
+        return None
+
+    def position(self, vertex: int) -> int:
+        """
+        Returns the position of a vertex in the CSR arrays.
+        """
+        if self.__dense:
+            if not isinstance(vertex, int) or not 0 <= vertex < len(self.__ids):
+                raise VertexError("ERROR: Invalid vertex.")
+            return vertex
+
+        if vertex not in self.__index:
+            raise VertexError("ERROR: Invalid vertex.")
+
+        return self.__index[vertex]
+
+    def vertices_iterator(self) -> iter:
+        """
+        Returns an iterator to the set of vertices.
+        """
+        for vertex in self.__ids:
+            yield vertex
+
+    def neighbours_iterator(self, vertex: int) -> iter:
+        """
+        Returns an iterator to the set of (outbound) neighbours of a vertex.
+        """
+        position = self.position(vertex)
+        ids = self.__ids
+
+        for index in range(self.__offsets[position], self.__offsets[position + 1]):
+            yield ids[self.__targets[index]]
+
+    def neighbour_costs_iterator(self, vertex: int) -> iter:
+        """
+        Returns an iterator to the (outbound neighbour, edge cost) pairs of a vertex.
+        """
+        position = self.position(vertex)
+        ids, targets, weights = self.__ids, self.__targets, self.__weights
+
+        for index in range(self.__offsets[position], self.__offsets[position + 1]):
+            yield ids[targets[index]], weights[index]
+
+    def transpose_iterator(self, vertex: int) -> iter:
+        """
+        Returns an iterator to the set of (inbound) neighbours of a vertex.
+        """
+        position = self.position(vertex)
+        ids = self.__ids
+
+        for index in range(self.__transpose_offsets[position], self.__transpose_offsets[position + 1]):
+            yield ids[self.__transpose_targets[index]]
+
+    def edges_iterator(self) -> iter:
+        """
+        Returns an iterator to the set of edges.
+        """
+        ids, offsets, targets, weights = self.__ids, self.__offsets, self.__targets, self.__weights
+
+        for position in range(len(ids)):
+            for index in range(offsets[position], offsets[position + 1]):
+                yield ids[position], ids[targets[index]], weights[index]
+
+    def is_vertex(self, vertex: int) -> bool:
+        """
+        Returns True if vertex belongs to the graph.
+        """
+        if self.__dense:
+            return isinstance(vertex, int) and 0 <= vertex < len(self.__ids)
+
+        return vertex in self.__index
+
+    def is_edge(self, vertex1: int, vertex2: int) -> bool:
+        """
+        Returns True if the edge from vertex1 to vertex2 belongs to the graph.
+        """
+        return self.__find_edge(vertex1, vertex2) != -1
+
+    def vertex_count(self) -> int:
+        """
+        Returns the number of vertices in the graph.
+        """
+        return len(self.__ids)
+
+    def edge_count(self) -> int:
+        """
+        Returns the number of edges in the graph.
+        """
+        return len(self.__targets)
+
+    def in_degree(self, vertex: int) -> int:
+        """
+        Returns the number of edges with the endpoint vertex.
+        """
+        if not self.is_vertex(vertex):
+            raise VertexError("ERROR: Vertex does not exist.")
+
+        position = self.position(vertex)
+        return self.__transpose_offsets[position + 1] - self.__transpose_offsets[position]
+
+    def out_degree(self, vertex: int) -> int:
+        """
+        Returns the number of edges with the start point vertex.
+        """
+        if not self.is_vertex(vertex):
+            raise VertexError("ERROR: Vertex does not exist.")
+
+        position = self.position(vertex)
+        return self.__offsets[position + 1] - self.__offsets[position]
+
+    def get_edge_cost(self, vertex1: int, vertex2: int) -> int:
+        """
+        Returns the cost of an edge if it exists.
+        """
+        index = self.__find_edge(vertex1, vertex2)
+        if index == -1:
+            raise EdgeError("ERROR: Edge does not exist.")
+
+        return self.__weights[index]
+
+    def __find_edge(self, vertex1: int, vertex2: int) -> int:
+        """
+        Returns the index of an edge in the outbound arrays or -1 if it does not exist.
+        """
+        if not self.is_vertex(vertex1) or not self.is_vertex(vertex2):
+            return -1
+
+        source = self.position(vertex1)
+        target = self.position(vertex2)
+        for index in range(self.__offsets[source], self.__offsets[source + 1]):
+            if self.__targets[index] == target:
+                return index
+
+        return -1
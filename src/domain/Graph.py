@@ -1,13 +1,16 @@
 from random import randrange
-from copy import deepcopy
 
 from exceptions import VertexError, EdgeError
+from domain.FrozenGraph import FrozenGraph
+from domain.ChangeLog import ChangeLog, ADD_VERTEX, REMOVE_VERTEX, ADD_EDGE, REMOVE_EDGE, SET_EDGE_COST
 
 
 class Graph:
     """
     A class representing a Directed Graph.
     """
+    __slots__ = ("__vertices", "__neighbours", "__transpose", "__costs", "__durations",
+                 "__adjacency_owners", "__costs_owners", "__version", "__change_log", "__weakref__")
 
     def __init__(self, vertex_count: int = 0, edge_count: int = 0) -> None:
         self.__vertices = set()
@@ -16,6 +19,15 @@ class Graph:
         self.__costs = dict()
         self.__durations = dict()
 
+        # number of graphs sharing the adjacency containers and the costs (see copy)
+        self.__adjacency_owners = [1]
+        self.__costs_owners = [1]
+
+        # incremented by every modification, so derived results can tell when they are stale
+        self.__version = 0
+        # the optional log of modifications (see enable_change_log)
+        self.__change_log = None
+
         for vertex in range(vertex_count):
             self.add_vertex(vertex)
 
@@ -65,6 +77,35 @@ class Graph:
         """
         return self.__durations
 
+    @property
+    def version(self) -> int:
+        """
+        :return: the number of modifications made to the graph
+        """
+        return self.__version
+
+    @property
+    def change_log(self) -> ChangeLog:
+        """
+        :return: the log of modifications or None if it is not enabled
+        """
+        return self.__change_log
+
+    def enable_change_log(self, capacity: int = 1024) -> ChangeLog:
+        """
+        Starts recording the modifications of the graph in a bounded change log.
+        """
+        if self.__change_log is None:
+            self.__change_log = ChangeLog(capacity)
+
+        return self.__change_log
+
+    def disable_change_log(self) -> None:
+        """
+        Stops recording the modifications of the graph.
+        """
+        self.__change_log = None
+
     def vertices_iterator(self) -> iter:
         """
         Returns an iterator to the set of vertices.
@@ -82,6 +123,17 @@ class Graph:
         for neighbour in self.neighbours[vertex]:
             yield neighbour
 
+    def neighbour_costs_iterator(self, vertex: int) -> iter:
+        """
+        Returns an iterator to the (outbound neighbour, edge cost) pairs of a vertex.
+        """
+        if not self.is_vertex(vertex):
+            raise VertexError("ERROR: Invalid vertex.")
+
+        costs = self.costs
+        for neighbour in self.neighbours[vertex]:
+            yield neighbour, costs[(vertex, neighbour)]
+
     def transpose_iterator(self, vertex: int) -> iter:
         """
         Returns an iterator to the set of (inbound) neighbours of a vertex.
@@ -157,8 +209,14 @@ class Graph:
         if (vertex1, vertex2) not in self.costs:
             raise EdgeError("ERROR: Edge does not exist.")
 
+        self.__detach_costs()
+        self.__version += 1
+        old_cost = self.costs[(vertex1, vertex2)]
         self.costs[(vertex1, vertex2)] = new_cost
 
+        if self.__change_log is not None:
+            self.__change_log.record(SET_EDGE_COST, vertex1, vertex2, old_cost, new_cost)
+
     def add_vertex(self, vertex: int) -> None:
         """
         Adds a vertex to the graph.
@@ -166,10 +224,15 @@ class Graph:
         if self.is_vertex(vertex):
             raise VertexError("ERROR: Vertex already exists.")
 
+        self.__detach_adjacency()
+        self.__version += 1
         self.vertices.add(vertex)
         self.neighbours[vertex] = set()
         self.transpose[vertex] = set()
 
+        if self.__change_log is not None:
+            self.__change_log.record(ADD_VERTEX, vertex)
+
     def add_edge(self, vertex1: int, vertex2: int, edge_cost: int = 0) -> None:
         """
         Adds an edge to the graph.
@@ -180,10 +243,36 @@ class Graph:
         if not self.is_vertex(vertex1) or not self.is_vertex(vertex2):
             raise EdgeError("ERROR: Vertices on edge do not exist.")
 
+        self.__detach_adjacency()
+        self.__detach_costs()
+        self.__version += 1
         self.neighbours[vertex1].add(vertex2)
         self.transpose[vertex2].add(vertex1)
         self.costs[(vertex1, vertex2)] = edge_cost
 
+        if self.__change_log is not None:
+            self.__change_log.record(ADD_EDGE, vertex1, vertex2, None, edge_cost)
+
+    def add_edges_unchecked(self, vertices1: list, vertices2: list, edge_costs: list) -> None:
+        """
+        Adds many edges to the graph at once, without validating them.
+        The caller must guarantee that every endpoint exists and that no edge is already in the graph.
+        """
+        self.__detach_adjacency()
+        self.__detach_costs()
+        self.__version += 1
+        neighbours = self.neighbours
+        transpose = self.transpose
+
+        self.costs.update(zip(zip(vertices1, vertices2), edge_costs))
+        for vertex1, vertex2 in zip(vertices1, vertices2):
+            neighbours[vertex1].add(vertex2)
+            transpose[vertex2].add(vertex1)
+
+        if self.__change_log is not None:
+            for vertex1, vertex2, edge_cost in zip(vertices1, vertices2, edge_costs):
+                self.__change_log.record(ADD_EDGE, vertex1, vertex2, None, edge_cost)
+
     def remove_edge(self, vertex1: int, vertex2: int) -> None:
         """
         Removes an edge from the graph.
@@ -191,10 +280,16 @@ class Graph:
         if not self.is_edge(vertex1, vertex2):
             raise EdgeError("ERROR: Edge does not exist.")
 
-        del self.costs[(vertex1, vertex2)]
+        self.__detach_adjacency()
+        self.__detach_costs()
+        self.__version += 1
+        old_cost = self.costs.pop((vertex1, vertex2))
         self.neighbours[vertex1].remove(vertex2)
         self.transpose[vertex2].remove(vertex1)
 
+        if self.__change_log is not None:
+            self.__change_log.record(REMOVE_EDGE, vertex1, vertex2, old_cost)
+
     def remove_vertex(self, vertex: int) -> None:
         """
         Removes a vertex from the graph.
@@ -214,13 +309,69 @@ class Graph:
         for node in to_remove:
             self.remove_edge(node, vertex)
 
+        self.__detach_adjacency()
+        self.__version += 1
         del self.neighbours[vertex]
         del self.transpose[vertex]
 
         self.vertices.remove(vertex)
 
-    def copy(self) -> "Graph":
+        if self.__change_log is not None:
+            self.__change_log.record(REMOVE_VERTEX, vertex)
+
+    def copy(self, copy_on_write: bool = False) -> "Graph":
+        """
+        Returns a copy of the graph instance that can be modified independently of the original.
+        With copy_on_write the containers are shared until the first modification of either graph:
+        changing edge costs only copies the costs, any other change also copies the adjacency.
+        """
+        graph = Graph()
+        graph.__durations = dict(self.__durations)
+
+        if copy_on_write:
+            graph.__vertices = self.__vertices
+            graph.__neighbours = self.__neighbours
+            graph.__transpose = self.__transpose
+            graph.__costs = self.__costs
+
+            graph.__adjacency_owners = self.__adjacency_owners
+            graph.__costs_owners = self.__costs_owners
+            self.__adjacency_owners[0] += 1
+            self.__costs_owners[0] += 1
+        else:
+            graph.__vertices = self.__vertices.copy()
+            graph.__neighbours = {vertex: neighbours.copy() for vertex, neighbours in self.__neighbours.items()}
+            graph.__transpose = {vertex: inbound.copy() for vertex, inbound in self.__transpose.items()}
+            graph.__costs = self.__costs.copy()
+
+        return graph
+
+    def __detach_adjacency(self) -> None:
+        """
+        Gives the graph its own vertex and adjacency containers if they are shared with a copy.
+        """
+        if self.__adjacency_owners[0] == 1:
+            return
+
+        self.__adjacency_owners[0] -= 1
+        self.__adjacency_owners = [1]
+        self.__vertices = self.__vertices.copy()
+        self.__neighbours = {vertex: neighbours.copy() for vertex, neighbours in self.__neighbours.items()}
+        self.__transpose = {vertex: inbound.copy() for vertex, inbound in self.__transpose.items()}
+
+    def __detach_costs(self) -> None:
+        """
+        Gives the graph its own cost container if it is shared with a copy.
+        """
+        if self.__costs_owners[0] == 1:
+            return
+
+        self.__costs_owners[0] -= 1
+        self.__costs_owners = [1]
+        self.__costs = self.__costs.copy()
+
+    def freeze(self) -> FrozenGraph:
         """
-        Returns a deep copy of the graph instance.
+        Returns an immutable CSR snapshot of the graph instance.
         """
-        return deepcopy(self)
+        return FrozenGraph.from_graph(self)
@@ -1,3 +1,6 @@
+from .FrozenGraph import FrozenGraph
+from .ChangeLog import ChangeLog, Change
 from .Graph import Graph
+from .CompactGraph import CompactGraph
 
-__all__ = ["Graph"]
+__all__ = ["Graph", "CompactGraph", "FrozenGraph", "ChangeLog", "Change"]
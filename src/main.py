@@ -1,13 +1,19 @@
-from ui import Menu
+import sys
+from ui import Menu, run_cli
 
 
-# Program entry point
-def main() -> None:
-    menu = Menu()
-    menu.run()
+# Program entry point: the interactive menu without arguments, the batch interface otherwise
+def main(arguments: list = None) -> int:
+    arguments = sys.argv[1:] if arguments is None else arguments
+    if not arguments:
+        menu = Menu()
+        menu.run()
+        return 0
+
+    return run_cli(arguments)
 
 
 # Execute the main function
 # if this file is ran directly
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,503 @@
+import unittest
+from itertools import permutations
+from domain import Graph
+from exceptions import VertexError
+from utils.Ford import np
+from utils import (
+    read_file, read_from_activities_file,
+    backwards_breadth_first_search, bidirectional_breadth_first_search, backwards_breadth_first_search_frozen,
+    ford_algorithm, ford_algorithm_frozen, edge_arrays, ford_algorithm_vectorized,
+    ford_single_source, ShortestPathCache, DynamicShortestPaths, batch_shortest_paths,
+    johnson, floyd_warshall, all_pairs_shortest_paths,
+    BinaryHeap, RadixHeap, cost_summary, has_negative_costs, dijkstra_algorithm, shortest_path,
+    dag, topological_sort_iterative, topological_sort_kahn,
+    CriticalPathSchedule, compute_times, compute_times_frozen,
+    get_minimum_cost_hamiltonian, held_karp, LocalSearch, local_search_tsp, BranchAndBound, branch_and_bound_tsp,
+    instrument, AlgorithmStats,
+    uniform_costs, constant_costs, gnm_random_graph, gnp_random_graph, power_law_graph, grid_graph, layered_dag
+)
+
+
+class AlgorithmTests(unittest.TestCase):
+    """
+    A class that tests the graph algorithms
+    """
+
+    def test_frozen_ford(self) -> None:
+        graph = read_file("3")
+        frozen = graph.freeze()
+
+        for vertex in graph.vertices_iterator():
+            self.assertEqual(ford_algorithm_frozen(frozen, 0, vertex), ford_algorithm(graph, 0, vertex))
+
+        graph.set_edge_cost(3, 1, -10)
+        self.assertEqual(ford_algorithm_frozen(graph.freeze(), 0, 4), (None, None))
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_vectorized_ford(self) -> None:
+        for graph in (read_file("3"), gnm_random_graph(80, 300, seed=5, costs=uniform_costs(-2, 20))):
+            arrays = edge_arrays(graph)
+            for vertex in graph.vertices_iterator():
+                cost, path = ford_algorithm_vectorized(graph, 0, vertex, arrays)
+                self.assertEqual(cost, ford_algorithm(graph, 0, vertex)[0])
+                self.assertEqual(ford_algorithm_vectorized(graph.freeze(), 0, vertex), (cost, path))
+                if cost is not None and cost != float("Inf"):
+                    self.assertEqual(sum(graph.get_edge_cost(path[i], path[i + 1]) for i in range(len(path) - 1)), cost)
+
+        graph = read_file("3")
+        graph.set_edge_cost(3, 1, -10)
+        self.assertEqual(ford_algorithm_vectorized(graph, 0, 4), (None, None))
+
+    def test_frozen_bfs(self) -> None:
+        graph = read_file("graph1k.txt")
+        frozen = graph.freeze()
+
+        for vertex in range(0, 1000, 97):
+            self.assertEqual(backwards_breadth_first_search_frozen(frozen, vertex, 5),
+                             backwards_breadth_first_search(graph, vertex, 5))
+
+    def test_frozen_compute_times(self) -> None:
+        graph = read_from_activities_file("4")
+        sorted_list = dag(graph)
+
+        frozen_times = compute_times_frozen(graph.freeze(), sorted_list)
+        self.assertEqual(compute_times(graph, sorted_list), frozen_times)
+        self.assertEqual(graph.vertex_count(), 8)
+
+    def test_critical_path_schedule(self) -> None:
+        graph = read_from_activities_file("4")
+        version = graph.version
+        schedule = CriticalPathSchedule(graph)
+        self.assertEqual(schedule.to_dictionaries(), compute_times(graph, dag(graph)))
+        self.assertEqual(graph.version, version)
+
+        graph = layered_dag(6, 8, 3, seed=2, durations=uniform_costs(1, 10))
+        schedule = CriticalPathSchedule(graph)
+        for activity in range(0, 48, 5):
+            schedule.set_duration(activity, graph.durations[activity] + 7 - activity % 3 * 4)
+            self.assertEqual(schedule.to_dictionaries(), compute_times_frozen(graph.freeze(), dag(graph)))
+
+        critical = schedule.critical_activities()
+        self.assertTrue(all(schedule.is_critical(activity) for activity in critical))
+        # the last critical activity ends the project
+        self.assertEqual(schedule.times(critical[-1])[1], schedule.total_time)
+
+        # an unknown activity leaves the durations of the graph unchanged
+        durations = dict(graph.durations)
+        with self.assertRaises(VertexError):
+            schedule.set_duration(1000, 3)
+        self.assertEqual(graph.durations, durations)
+
+    def test_topological_sort(self) -> None:
+        graph = layered_dag(5, 10, 3, seed=4)
+        for sort in (dag, topological_sort_iterative, topological_sort_kahn):
+            order = sort(graph)
+            position = {vertex: index for index, vertex in enumerate(order)}
+            self.assertEqual(len(order), 50)
+            self.assertTrue(all(position[vertex1] < position[vertex2]
+                                for vertex1, vertex2, _ in graph.edges_iterator()))
+
+        # a chain far longer than the recursion limit
+        graph = Graph(5000)
+        for vertex in range(4999):
+            graph.add_edge(vertex, vertex + 1)
+        self.assertEqual(dag(graph), list(range(5000)))
+        self.assertEqual(topological_sort_kahn(graph), list(range(5000)))
+
+        graph.add_edge(4000, 10)
+        for sort in (dag, topological_sort_kahn):
+            cycle = []
+            self.assertEqual(sort(graph, cycle), [])
+            self.assertEqual(cycle[0], cycle[-1])
+            self.assertEqual(len(cycle), 3992)
+            self.assertTrue(all(graph.is_edge(cycle[i], cycle[i + 1]) for i in range(len(cycle) - 1)))
+
+    def test_generators(self) -> None:
+        graph = gnm_random_graph(30, 870, seed=1)
+        self.assertEqual(graph.edge_count(), 870)
+        self.assertFalse(any(graph.is_edge(vertex, vertex) for vertex in graph.vertices_iterator()))
+
+        first = gnm_random_graph(200, 1000, seed=7, costs=uniform_costs(-5, 5))
+        second = gnm_random_graph(200, 1000, seed=7, costs=uniform_costs(-5, 5))
+        self.assertEqual(set(first.edges_iterator()), set(second.edges_iterator()))
+        self.assertTrue(all(-5 <= cost < 5 for _, _, cost in first.edges_iterator()))
+
+        graph = gnp_random_graph(300, 0.05, seed=3)
+        self.assertTrue(3000 < graph.edge_count() < 6000)
+
+        graph = power_law_graph(500, 3, seed=2)
+        self.assertEqual(graph.edge_count(), 497 * 3)
+
+        graph = grid_graph(3, 4, costs=constant_costs(1))
+        self.assertEqual(graph.edge_count(), 2 * (3 * 3 + 2 * 4))
+
+        graph = layered_dag(5, 10, 3, seed=4, durations=uniform_costs(1, 10))
+        self.assertEqual(len(dag(graph)), 50)
+        self.assertEqual(len(graph.durations), 50)
+
+    def test_dijkstra(self) -> None:
+        graph = read_file("graph1k.txt")
+        compact = read_file("graph1k.txt", compact=True)
+        self.assertFalse(has_negative_costs(graph))
+
+        for vertex in range(0, 1000, 333):
+            cost, path = ford_algorithm(graph, 7, vertex)
+            for queue in (BinaryHeap, RadixHeap):
+                for candidate in (graph, compact, graph.freeze()):
+                    result_cost, result_path = dijkstra_algorithm(candidate, 7, vertex, queue)
+                    self.assertEqual(result_cost, cost)
+                    self.assertEqual(result_path[0], 7)
+                    self.assertEqual(sum(graph.get_edge_cost(result_path[i], result_path[i + 1])
+                                         for i in range(len(result_path) - 1)), cost)
+
+        graph = read_file("3")
+        self.assertTrue(has_negative_costs(graph))
+        self.assertEqual(shortest_path(graph, 0, 2), ford_algorithm(graph, 0, 2))
+
+        # the memoized answer follows the modifications of the graph
+        self.assertFalse(has_negative_costs(compact))
+        vertex1, vertex2, _ = next(compact.edges_iterator())
+        compact.set_edge_cost(vertex1, vertex2, -1)
+        self.assertTrue(has_negative_costs(compact))
+
+        # the radix heap is only chosen for small integer costs
+        graph = read_file("graph1k.txt")
+        cost = shortest_path(graph, 0, 999)[0]
+        self.assertEqual(cost_summary(graph), (False, True))
+        self.assertEqual(cost_summary(graph.freeze()), (False, True))
+        for large_cost in (1 << 40, 1e9):
+            graph.add_edge(999, 0, large_cost)
+            self.assertEqual(cost_summary(graph), (False, False))
+            self.assertEqual(shortest_path(graph, 0, 999)[0], cost)
+            graph.remove_edge(999, 0)
+
+    def test_ford_negative_cycles(self) -> None:
+        graph = Graph(5)
+        graph.add_edge(0, 1, 1)
+        graph.add_edge(1, 2, -1)
+        graph.add_edge(2, 1, -1)
+        graph.add_edge(3, 4, -5)
+        graph.add_edge(4, 3, 1)
+        self.assertEqual(ford_algorithm(graph, 0, 2), (None, None))
+        # the negative cycle is not reachable from vertex 4
+        graph.remove_edge(3, 4)
+        self.assertEqual(ford_algorithm(graph, 4, 3), (1, [4, 3]))
+
+        graph.remove_vertex(2)
+        graph.add_vertex(10)
+        graph.add_edge(1, 10, -3)
+        self.assertEqual(ford_algorithm(graph, 0, 10), (-2, [0, 1, 10]))
+        self.assertEqual(ford_algorithm(graph, 10, 0), (float("Inf"), [0]))
+
+    def test_negative_vertex_ids(self) -> None:
+        graph = Graph()
+        for vertex in (-3, -2, -1, 0):
+            graph.add_vertex(vertex)
+        graph.add_edge(0, -1, 2)
+        graph.add_edge(-1, -3, 1)
+        graph.add_edge(-3, -2, 4)
+        graph.add_edge(0, -2, 9)
+
+        self.assertEqual(ford_algorithm(graph, 0, -2), (7, [0, -1, -3, -2]))
+        self.assertEqual(dijkstra_algorithm(graph, 0, -2), (7, [0, -1, -3, -2]))
+        self.assertEqual(ShortestPathCache(graph).query("dijkstra", 0, -2), (7, [0, -1, -3, -2]))
+
+        # the backwards trees are rooted at the ending vertex, here -1 or a path through it
+        cache = ShortestPathCache(graph)
+        self.assertEqual(cache.query("bfs", 0, -3), [0, -1, -3])
+        self.assertEqual(cache.query("bfs", 0, -1), [0, -1])
+        self.assertIsNone(cache.query("bfs", -2, -1))
+        pairs = [(0, -3), (0, -1), (-2, -1), (-1, -2)]
+        expected = [(0, -3, [0, -1, -3]), (0, -1, [0, -1]), (-2, -1, None), (-1, -2, [-1, -3, -2])]
+        for processes in (None, 2):
+            answers = batch_shortest_paths(graph, pairs, "bfs", processes)
+            self.assertEqual(sorted(answers, key=lambda answer: pairs.index(answer[:2])), expected)
+
+    def test_bidirectional_bfs(self) -> None:
+        graph = read_file("graph1k.txt")
+
+        for vertex in range(0, 1000, 37):
+            expected = backwards_breadth_first_search(graph, vertex, 500)
+            path = bidirectional_breadth_first_search(graph, vertex, 500)
+            self.assertEqual(len(path), len(expected))
+            self.assertEqual((path[0], path[-1]), (vertex, 500))
+            self.assertTrue(all(graph.is_edge(path[i], path[i + 1]) for i in range(len(path) - 1)))
+
+        graph = Graph()
+        for vertex in (3, 8, 15, 42):
+            graph.add_vertex(vertex)
+        graph.add_edge(3, 8)
+        graph.add_edge(8, 42)
+        self.assertEqual(backwards_breadth_first_search(graph, 3, 42), [3, 8, 42])
+        self.assertEqual(bidirectional_breadth_first_search(graph, 3, 42), [3, 8, 42])
+        self.assertIsNone(backwards_breadth_first_search(graph, 15, 42))
+        self.assertIsNone(bidirectional_breadth_first_search(graph, 42, 3))
+
+        # -1 is a vertex like any other
+        graph = Graph()
+        for vertex in (-1, 0, 1, 2):
+            graph.add_vertex(vertex)
+        graph.add_edge(0, -1)
+        graph.add_edge(-1, 1)
+        self.assertEqual(backwards_breadth_first_search(graph, 0, 1), [0, -1, 1])
+        self.assertEqual(bidirectional_breadth_first_search(graph, 0, 1), [0, -1, 1])
+        self.assertEqual(backwards_breadth_first_search_frozen(graph.freeze(), 0, 1), [0, -1, 1])
+        self.assertIsNone(backwards_breadth_first_search(graph, 2, 1))
+
+    def test_shortest_path_cache(self) -> None:
+        graph = read_file("graph1k.txt")
+        cache = ShortestPathCache(graph)
+
+        for vertex in range(0, 1000, 100):
+            self.assertEqual(cache.query("bfs", vertex, 5), backwards_breadth_first_search(graph, vertex, 5))
+            self.assertEqual(cache.query("ford", 5, vertex)[0], ford_algorithm(graph, 5, vertex)[0])
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (18, 2, 2))
+
+        graph.set_edge_cost(5, next(graph.neighbours_iterator(5)), 10000)
+        self.assertEqual(cache.query("dijkstra", 5, 7)[0], ford_algorithm(graph, 5, 7)[0])
+        self.assertEqual(len(cache), 1)
+
+        # with a change log, cost changes keep the BFS trees and the trees not using the edge
+        graph.enable_change_log()
+        cache = ShortestPathCache(graph)
+        cache.query("bfs", 0, 5)
+        dist, path = cache.tree("ford", 5)
+        vertex = next(vertex for vertex in graph.neighbours_iterator(5) if path[vertex] != 5)
+        graph.set_edge_cost(5, vertex, graph.get_edge_cost(5, vertex) + 1)
+        hits = cache.hits
+        self.assertEqual(cache.query("bfs", 0, 5), backwards_breadth_first_search(graph, 0, 5))
+        self.assertEqual(cache.query("ford", 5, 7)[0], ford_algorithm(graph, 5, 7)[0])
+        self.assertEqual(cache.hits, hits + 2)
+
+        # a cheaper edge that shortens the distance of its endpoint drops the ford tree, but not the BFS tree
+        graph.set_edge_cost(5, vertex, 0)
+        self.assertEqual(cache.query("ford", 5, vertex), (0, [5, vertex]))
+        self.assertEqual(cache.query("bfs", 0, 5), backwards_breadth_first_search(graph, 0, 5))
+        self.assertEqual(cache.hits, hits + 3)
+
+        small = ShortestPathCache(graph, memory_budget=1)
+        small.query("ford", 1, 2)
+        small.query("ford", 2, 3)
+        self.assertEqual(len(small), 1)
+
+    def test_batch_shortest_paths(self) -> None:
+        graph = read_file("graph1k.txt")
+        pairs = [(starting_vertex, ending_vertex)
+                 for starting_vertex in (0, 7, 500) for ending_vertex in range(0, 1000, 91)]
+
+        answers = list(batch_shortest_paths(graph, pairs))
+        self.assertEqual(len(answers), len(pairs))
+        for starting_vertex, ending_vertex, (cost, path) in answers:
+            self.assertEqual(cost, ford_algorithm(graph, starting_vertex, ending_vertex)[0])
+            self.assertEqual((path[0], path[-1]), (starting_vertex, ending_vertex))
+
+        for starting_vertex, ending_vertex, path in batch_shortest_paths(graph, pairs, "bfs"):
+            self.assertEqual(len(path), len(backwards_breadth_first_search(graph, starting_vertex, ending_vertex)))
+
+        parallel = batch_shortest_paths(graph, pairs, "dijkstra", processes=2)
+        self.assertEqual(sorted((start, end, cost) for start, end, (cost, _) in parallel),
+                         sorted((start, end, cost) for start, end, (cost, _) in answers))
+
+        with self.assertRaises(ValueError):
+            batch_shortest_paths(graph, pairs, "floyd")
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_all_pairs_shortest_paths(self) -> None:
+        sparse = gnm_random_graph(60, 240, seed=1, costs=uniform_costs(-1, 15))
+        dense = gnm_random_graph(60, 2000, seed=2, costs=uniform_costs(0, 15))
+
+        for graph in (sparse, dense):
+            matrices = [johnson(graph, next_hops=True), floyd_warshall(graph, next_hops=True, block_size=16),
+                        all_pairs_shortest_paths(graph, next_hops=True)]
+            for matrix in matrices:
+                for starting_vertex in range(0, 60, 7):
+                    for ending_vertex in range(60):
+                        cost = ford_algorithm(graph, starting_vertex, ending_vertex)[0]
+                        self.assertEqual(matrix.distance(starting_vertex, ending_vertex), cost)
+
+                        path = matrix.path(starting_vertex, ending_vertex)
+                        if cost == float("Inf"):
+                            self.assertIsNone(path)
+                        else:
+                            self.assertEqual(sum(graph.get_edge_cost(path[i], path[i + 1])
+                                                 for i in range(len(path) - 1)), cost)
+
+        self.assertTrue(np.array_equal(johnson(sparse, processes=2).distances, johnson(sparse).distances))
+        # tiles narrower than the rows, including one that is not a multiple of the block size
+        for tile_width in (16, 20):
+            self.assertTrue(np.array_equal(floyd_warshall(dense, block_size=8, tile_width=tile_width).distances,
+                                           johnson(dense).distances))
+
+        graph = read_file("3")
+        graph.set_edge_cost(3, 1, -10)
+        self.assertIsNone(johnson(graph))
+        self.assertIsNone(floyd_warshall(graph))
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_held_karp(self) -> None:
+        for seed in range(5):
+            graph = gnm_random_graph(7, 30, seed=seed, costs=uniform_costs(1, 20))
+            expected = float("Inf")
+            for order in permutations(range(1, 7)):
+                cycle = [0, *order, 0]
+                if all(graph.is_edge(cycle[i], cycle[i + 1]) for i in range(7)):
+                    expected = min(expected, sum(graph.get_edge_cost(cycle[i], cycle[i + 1]) for i in range(7)))
+
+            for start in (0, 4):
+                cost, cycle = held_karp(graph, start)
+                self.assertEqual(cost, expected)
+                if cost == float("Inf"):
+                    self.assertIsNone(cycle)
+                    continue
+
+                self.assertEqual((cycle[0], cycle[-1]), (start, start))
+                self.assertEqual(sorted(cycle[:-1]), list(range(7)))
+                self.assertEqual(sum(graph.get_edge_cost(cycle[i], cycle[i + 1]) for i in range(7)), cost)
+
+        graph = gnm_random_graph(9, 72, seed=1, costs=uniform_costs(1, 50))
+        visited = list()
+        self.assertLessEqual(held_karp(graph)[0], get_minimum_cost_hamiltonian(graph, 0, visited))
+        self.assertEqual(held_karp(read_file("3")), (float("Inf"), None))
+        self.assertEqual(get_minimum_cost_hamiltonian(read_file("3"), 0, list()), float("Inf"))
+
+        # a vertex without outbound edges
+        graph = Graph(4)
+        for vertex1, vertex2 in ((0, 1), (1, 2), (2, 0), (0, 3)):
+            graph.add_edge(vertex1, vertex2, 1)
+        self.assertEqual(held_karp(graph), (float("Inf"), None))
+
+        # -1 is a vertex like any other
+        graph = Graph()
+        for vertex in (0, -1, 1):
+            graph.add_vertex(vertex)
+        for vertex1, vertex2 in ((0, -1), (-1, 1), (1, 0)):
+            graph.add_edge(vertex1, vertex2, 1)
+        visited = list()
+        self.assertEqual(get_minimum_cost_hamiltonian(graph, 0, visited), 3)
+        self.assertEqual(visited, [0, -1, 1, 0])
+        self.assertEqual(held_karp(graph, 0), (3, [0, -1, 1, 0]))
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_local_search_tsp(self) -> None:
+        for seed in range(10):
+            graph = gnm_random_graph(10, 40, seed=seed, costs=uniform_costs(-5, 30))
+            cost, cycle = local_search_tsp(graph, 0.1, seed=seed)
+            self.assertGreaterEqual(cost, held_karp(graph)[0])
+            if cycle is not None:
+                self.assertEqual(sorted(cycle[:-1]), list(range(10)))
+                self.assertEqual(sum(graph.get_edge_cost(cycle[i], cycle[i + 1]) for i in range(10)), cost)
+
+        graph = gnm_random_graph(300, 6000, seed=1, costs=uniform_costs(1, 1000))
+        search = LocalSearch(graph, 5, seed=1)
+        descent = search.improve()
+        self.assertTrue(search.is_local_optimum())
+        self.assertLessEqual(search.improve(0.5), descent)
+
+        cycle = search.tour
+        self.assertEqual((cycle[0], cycle[-1]), (5, 5))
+        self.assertEqual(sorted(cycle[:-1]), list(range(300)))
+        self.assertEqual(sum(graph.get_edge_cost(cycle[i], cycle[i + 1]) for i in range(300)), search.cost)
+
+        # the progress is ordered by time and the cost only decreases
+        times, costs = zip(*search.progress)
+        self.assertEqual(list(times), sorted(times))
+        self.assertEqual(list(costs), sorted(costs, reverse=True))
+        self.assertEqual(costs[-1], search.cost)
+
+        self.assertEqual(local_search_tsp(read_file("3"), 0.1), (float("Inf"), None))
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_branch_and_bound_tsp(self) -> None:
+        for seed in range(15):
+            graph = gnm_random_graph(9, 20 + 3 * seed, seed=seed, costs=uniform_costs(-5, 30))
+            cost, cycle = branch_and_bound_tsp(graph, 3)
+            self.assertEqual(cost, held_karp(graph)[0])
+            if cycle is not None:
+                self.assertEqual((cycle[0], cycle[-1]), (3, 3))
+                self.assertEqual(sorted(cycle[:-1]), list(range(9)))
+                self.assertEqual(sum(graph.get_edge_cost(cycle[i], cycle[i + 1]) for i in range(9)), cost)
+
+        graph = gnm_random_graph(30, 600, seed=1, costs=uniform_costs(1, 100))
+        solver = BranchAndBound(graph)
+        self.assertTrue(solver.solve(processes=2))
+        self.assertEqual((solver.lower_bound, solver.gap), (solver.cost, 0.0))
+        self.assertEqual(solver.cost, branch_and_bound_tsp(graph)[0])
+        self.assertGreater(solver.nodes, 0)
+
+        # the lower bound only increases and the best cost only decreases
+        lower_bounds = [entry[3] for entry in solver.progress]
+        costs = [entry[2] for entry in solver.progress]
+        self.assertEqual(lower_bounds, sorted(lower_bounds))
+        self.assertEqual(costs, sorted(costs, reverse=True))
+
+        # the time limit also stops the breadth first split
+        solver = BranchAndBound(graph)
+        self.assertFalse(solver.solve(processes=2, time_limit=0.0, seed_time=None))
+        self.assertEqual(solver.nodes, 0)
+        self.assertLess(solver.lower_bound, float("Inf"))
+
+        self.assertEqual(branch_and_bound_tsp(read_file("3")), (float("Inf"), None))
+
+    def test_instrumentation(self) -> None:
+        graph = read_file("graph1k.txt")
+        with instrument() as stats:
+            cost, path = ford_algorithm(graph, 0, 999)
+            bfs_path = backwards_breadth_first_search(graph, 0, 999)
+
+        counters = dict(stats.counters)
+        self.assertEqual(counters["reconstruction_steps"], len(path) + len(bfs_path))
+        self.assertGreaterEqual(counters["relaxations"], graph.vertex_count() - 1)
+        self.assertGreater(counters["edges_scanned"], counters["queue_pops"])
+        self.assertEqual(set(stats.timings), {"ford.search", "ford.reconstruction", "bfs.search", "bfs.reconstruction"})
+        self.assertEqual(stats.to_dict()["phases"]["ford.search"]["calls"], 1)
+
+        # the counts of the frozen and vectorized variants
+        with instrument() as frozen_stats:
+            self.assertEqual(ford_algorithm_frozen(graph.freeze(), 0, 999)[0], cost)
+        self.assertGreater(frozen_stats.counters["passes"], 0)
+
+        # the searches and the reconstructions of the cache and of Dijkstra's algorithm are timed as well
+        with instrument() as cache_stats:
+            cache = ShortestPathCache(graph)
+            self.assertEqual(cache.query("ford", 0, 999), (cost, path))
+            self.assertEqual(cache.query("bfs", 0, 999), bfs_path)
+            self.assertEqual(cache.query("dijkstra", 0, 999)[0], cost)
+            self.assertEqual(dijkstra_algorithm(graph, 0, 999)[0], cost)
+        self.assertEqual(set(cache_stats.timings), {"ford.search", "ford.reconstruction", "bfs.search",
+                                                    "bfs.reconstruction", "dijkstra.search",
+                                                    "dijkstra.reconstruction"})
+        self.assertEqual(cache_stats.calls["dijkstra.search"], 2)
+        self.assertGreater(cache_stats.counters["relaxations"], counters["relaxations"])
+        self.assertGreater(cache_stats.counters["edges_scanned"], counters["edges_scanned"])
+
+        # nothing is counted outside of the with block
+        ford_algorithm(graph, 0, 999)
+        self.assertEqual(stats.counters, counters)
+        self.assertIsInstance(stats, AlgorithmStats)
+
+    def test_dynamic_shortest_paths(self) -> None:
+        graph = read_file("graph1k.txt")
+        dynamic = DynamicShortestPaths(graph, 0)
+        self.assertIsNotNone(graph.change_log)
+
+        edges = sorted((vertex1, vertex2) for vertex1, vertex2, _ in graph.edges_iterator())
+        for index, (vertex1, vertex2) in enumerate(edges[::50]):
+            if index % 3 == 0:
+                graph.remove_edge(vertex1, vertex2)
+            else:
+                graph.set_edge_cost(vertex1, vertex2, graph.get_edge_cost(vertex1, vertex2) + (-3 if index % 2 else 5))
+            # the parents may differ where several paths have the same cost
+            self.assertEqual(dynamic.tree()[0], ford_single_source(graph, 0)[0])
+        self.assertGreater(dynamic.repairs, dynamic.recomputes)
+
+        graph.remove_vertex(next(graph.neighbours_iterator(0)))
+        cost = dynamic.query(7)[0]
+        self.assertEqual(cost, ford_algorithm(graph, 0, 7)[0])
+
+        # an edge back to the starting vertex that closes a negative cost cycle
+        graph.add_vertex(1000)
+        graph.add_edge(7, 1000, 0)
+        graph.add_edge(1000, 0, -cost - 1)
+        self.assertEqual(dynamic.query(7), (None, None))
+        graph.remove_edge(1000, 0)
+        self.assertEqual(dynamic.query(7)[0], cost)
@@ -0,0 +1,227 @@
+import asyncio
+import io
+import json
+import os
+import pickle
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+from utils import (
+    read_file, read_file_bulk, write_file, read_from_activities_file,
+    write_binary_file, read_binary_file, convert_text_to_binary, convert_binary_to_text, shortest_path, dag,
+    backwards_breadth_first_search, compute_times
+)
+from exceptions import EdgeError
+from utils import Utils
+from utils.Utils import resource_path
+from ui import run_cli, QueryServer
+from ui.Server import OPERATIONS
+
+
+class FileTests(unittest.TestCase):
+    """
+    A class that tests reading and writing graph files
+    """
+
+    def test_read_file_bulk(self) -> None:
+        timings = dict()
+        graph = read_file_bulk("graph1k.txt", timings)
+        expected = read_file("graph1k.txt")
+
+        self.assertEqual(graph.vertex_count(), expected.vertex_count())
+        self.assertEqual(set(graph.edges_iterator()), set(expected.edges_iterator()))
+        self.assertEqual(set(graph.transpose_iterator(5)), set(expected.transpose_iterator(5)))
+        self.assertEqual(set(timings), {"read", "parse", "validate", "build"})
+
+        # chunks that end in the middle of an integer or of a line
+        chunk_size = Utils.CHUNK_SIZE
+        try:
+            for size in (5, 4096):
+                Utils.CHUNK_SIZE = size
+                self.assertEqual(set(read_file_bulk("graph1k.txt").edges_iterator()),
+                                 set(expected.edges_iterator()))
+        finally:
+            Utils.CHUNK_SIZE = chunk_size
+
+    def test_read_sparse_file(self) -> None:
+        # graph1k_modif.txt has no vertex 6 but a vertex 999, so it is only valid with the vertices of its edges
+        self.assertRaises(EdgeError, read_file, "graph1k_modif.txt")
+        graph = read_file("graph1k_modif.txt", sparse=True)
+
+        self.assertEqual(graph.vertex_count(), 999)
+        self.assertEqual(graph.edge_count(), 3990)
+        self.assertFalse(graph.is_vertex(6))
+        self.assertTrue(graph.is_vertex(999))
+
+    def test_binary_file(self) -> None:
+        graph = read_from_activities_file("4")
+        write_binary_file("test_graph.bin", graph)
+
+        try:
+            frozen = read_binary_file("test_graph.bin")
+            self.assertEqual(set(frozen.edges_iterator()), set(graph.edges_iterator()))
+            self.assertEqual(set(frozen.transpose_iterator(6)), set(graph.transpose_iterator(6)))
+            self.assertEqual(dict(frozen.durations), graph.durations)
+
+            # the worker pools of the spawn and forkserver start methods receive the snapshot pickled
+            copy = pickle.loads(pickle.dumps(frozen))
+            self.assertEqual(set(copy.edges_iterator()), set(graph.edges_iterator()))
+            self.assertEqual(dict(copy.durations), graph.durations)
+            del frozen
+
+            with open(resource_path("test_graph.bin"), "r+b") as file:
+                file.truncate(os.path.getsize(resource_path("test_graph.bin")) - 8)
+
+            with self.assertRaises(ValueError):
+                read_binary_file("test_graph.bin")
+        finally:
+            os.remove(resource_path("test_graph.bin"))
+
+    def test_convert_binary(self) -> None:
+        convert_text_to_binary("graph1k.txt", "test_graph1k.bin")
+
+        try:
+            convert_binary_to_text("test_graph1k.bin", "test_graph1k.txt")
+            self.assertEqual(set(read_file("test_graph1k.txt").edges_iterator()),
+                             set(read_file("graph1k.txt").edges_iterator()))
+        finally:
+            os.remove(resource_path("test_graph1k.bin"))
+            os.remove(resource_path("test_graph1k.txt"))
+
+    def test_write_file(self) -> None:
+        graph = read_file("graph1k.txt")
+        graph.remove_vertex(999)
+        resources = set(os.listdir(resource_path("")))
+
+        try:
+            write_file("test_graph.txt", graph)
+            write_file("test_graph.txt.gz", graph)
+
+            for name in ("test_graph.txt", "test_graph.txt.gz"):
+                self.assertEqual(set(read_file(name).edges_iterator()), set(graph.edges_iterator()))
+                self.assertEqual(set(read_file_bulk(name).edges_iterator()), set(graph.edges_iterator()))
+            self.assertEqual(set(os.listdir(resource_path(""))) - resources, {"test_graph.txt", "test_graph.txt.gz"})
+
+            # a new file gets the permissions allowed by the umask, a replaced file keeps its own
+            if os.name == "posix":
+                umask = os.umask(0o027)
+                try:
+                    os.remove(resource_path("test_graph.txt"))
+                    write_file("test_graph.txt", graph)
+                    self.assertEqual(os.stat(resource_path("test_graph.txt")).st_mode & 0o777, 0o640)
+                    os.chmod(resource_path("test_graph.txt"), 0o600)
+                    write_file("test_graph.txt", graph)
+                    self.assertEqual(os.stat(resource_path("test_graph.txt")).st_mode & 0o777, 0o600)
+                finally:
+                    os.umask(umask)
+        finally:
+            os.remove(resource_path("test_graph.txt"))
+            os.remove(resource_path("test_graph.txt.gz"))
+
+    def test_batch_cli(self) -> None:
+        graph = read_file("graph1k.txt")
+        with open(resource_path("test_queries.txt"), "w") as file:
+            file.write("# start end\n0 999\n[5, 17]\n{\"start\": 5, \"end\": 400}\n5\n0 5000\n")
+
+        try:
+            for processes in (None, 2):
+                arguments = ["shortest", "graph1k.txt", "--input", resource_path("test_queries.txt"),
+                             "--output", resource_path("test_results.txt"), "--chunk-size", "2"]
+                if processes is not None:
+                    arguments += ["--processes", str(processes)]
+                self.assertEqual(run_cli(arguments), 0)
+
+                with open(resource_path("test_results.txt")) as file:
+                    records = {record["line"]: record for record in map(json.loads, file)}
+                self.assertEqual(set(records), {2, 3, 4, 5, 6})
+                for line, (start, end) in ((2, (0, 999)), (3, (5, 17)), (4, (5, 400))):
+                    expected_cost, expected_path = shortest_path(graph, start, end)
+                    self.assertEqual(records[line]["cost"], expected_cost)
+                    self.assertEqual(records[line]["path"][0], start)
+                    self.assertEqual(records[line]["path"][-1], end)
+                self.assertIn("error", records[5])
+                self.assertEqual(records[6]["error"], "ERROR: Invalid vertex.")
+
+            self.assertEqual(run_cli(["toposort", "4", "--format", "activities",
+                                      "--output", resource_path("test_results.txt")]), 0)
+            with open(resource_path("test_results.txt")) as file:
+                self.assertEqual(json.load(file)["order"], dag(read_from_activities_file("4")))
+        finally:
+            os.remove(resource_path("test_queries.txt"))
+            os.remove(resource_path("test_results.txt"))
+
+    def test_bench_cli(self) -> None:
+        arguments = ["bench", "--quick", "--filter", "read_file[graph1k.txt]", "--repeat", "1",
+                     "--baseline", resource_path("test_baseline.json")]
+        try:
+            with redirect_stdout(io.StringIO()) as output:
+                self.assertEqual(run_cli(arguments + ["--save-baseline"]), 0)
+                self.assertEqual(run_cli(arguments + ["--threshold", "1000"]), 0)
+
+            with open(resource_path("test_baseline.json")) as file:
+                cases = set(json.load(file)["cases"])
+            self.assertEqual(cases, {"read_file[graph1k.txt]"})
+            self.assertIn("INFO: No regressions.", output.getvalue())
+        finally:
+            os.remove(resource_path("test_baseline.json"))
+
+        # the options of the suite are only accepted by bench
+        with redirect_stderr(io.StringIO()):
+            self.assertRaises(SystemExit, run_cli, ["load", "graph1k.txt", "--quick"])
+
+    def test_query_server(self) -> None:
+        async def exchange(server: QueryServer, batches: list) -> dict:
+            addresses = asyncio.Queue()
+            serving = asyncio.create_task(server.serve(port=0, ready=addresses.put_nowait))
+            host, port = (await addresses.get()).split(":")
+            reader, writer = await asyncio.open_connection(host, int(port))
+            responses = []
+            for requests in batches:
+                # pipelined: every request of a batch is sent before reading any response
+                writer.write("".join(json.dumps(request) + "\n" for request in requests).encode())
+                responses += [json.loads(await reader.readline()) for _ in requests]
+            await serving
+            writer.close()
+            return {response.get("id"): response for response in responses}
+
+        async def run() -> dict:
+            server = QueryServer(processes=0)
+            await server.load("graph1k.txt")
+            return await exchange(server, [[
+                {"id": 1, "op": "shortest", "start": 0, "end": 999},
+                {"id": 2, "op": "bfs", "start": 5, "end": 17},
+                {"id": 3, "op": "shortest", "start": 0, "end": 5000},
+                "oops",
+                {"id": 9, "op": [1]},
+                {"id": 10, "op": "explode"}
+            ], [
+                {"id": 4, "op": "load", "graph": "4", "format": "activities"}
+            ], [
+                {"id": 5, "op": "cpm", "activity": 1},
+                {"id": 6, "op": "toposort"},
+                {"id": 7, "op": "stats"},
+                {"id": 8, "op": "shutdown"}
+            ]])
+
+        responses = asyncio.run(run())
+        self.assertEqual(responses[1]["cost"], shortest_path(read_file("graph1k.txt"), 0, 999)[0])
+        self.assertEqual(responses[1]["version"], 1)
+        self.assertEqual(responses[2]["path"][0], 5)
+        self.assertEqual(len(responses[2]["path"]),
+                         len(backwards_breadth_first_search(read_file("graph1k.txt"), 5, 17)))
+        self.assertEqual(responses[3]["error"], "ERROR: Invalid vertex.")
+        self.assertEqual(responses[None]["error"], "ERROR: Invalid request.")
+        self.assertEqual(responses[9]["error"], "ERROR: Unknown operation [1]!")
+        self.assertEqual(responses[10]["error"], "ERROR: Unknown operation explode!")
+
+        activities = read_from_activities_file("4")
+        self.assertEqual(responses[4]["version"], 2)
+        self.assertEqual(responses[5]["version"], 2)
+        order = dag(activities)
+        self.assertEqual(responses[5]["total_time"], compute_times(activities, order)[0][len(order)])
+        self.assertEqual(responses[6]["order"], order)
+        self.assertEqual(responses[7]["stats"]["latency_ms"]["shortest"]["count"], 2)
+        # the requests that are not operations have no latencies
+        self.assertLessEqual({"shortest", "bfs", "load"}, set(responses[7]["stats"]["latency_ms"]))
+        self.assertLessEqual(set(responses[7]["stats"]["latency_ms"]), set(OPERATIONS))
+        self.assertLessEqual(responses[7]["stats"]["latency_ms"]["shortest"]["p50"],
+                             responses[7]["stats"]["latency_ms"]["shortest"]["p99"])
@@ -1,5 +1,5 @@
 import unittest
-from domain import Graph
+from domain import Graph, CompactGraph
 from exceptions import VertexError, EdgeError
 
 
@@ -111,3 +111,119 @@ class Tests(unittest.TestCase):
 
         graph_copy.remove_vertex(1)
         self.assertEqual(set(graph.vertices_iterator()), {0, 1, 2, 3})
+
+    def test_freeze(self) -> None:
+        graph = Graph(6)
+        graph.add_edge(1, 2, 5)
+        graph.add_edge(1, 3, -2)
+        graph.add_edge(4, 1, 7)
+        graph.remove_vertex(0)
+        frozen = graph.freeze()
+
+        self.assertEqual(set(frozen.vertices_iterator()), {1, 2, 3, 4, 5})
+        self.assertEqual(set(frozen.edges_iterator()), set(graph.edges_iterator()))
+        self.assertEqual(set(frozen.neighbours_iterator(1)), {2, 3})
+        self.assertEqual(set(frozen.transpose_iterator(1)), {4})
+        self.assertEqual(frozen.get_edge_cost(1, 3), -2)
+        self.assertEqual(frozen.out_degree(1), 2)
+        self.assertEqual(frozen.in_degree(5), 0)
+        self.assertFalse(frozen.is_edge(2, 1))
+        self.assertFalse(frozen.is_vertex(0))
+
+        with self.assertRaises(EdgeError):
+            frozen.get_edge_cost(2, 1)
+
+        with self.assertRaises(VertexError):
+            frozen.neighbours_iterator(0).__next__()
+
+        graph.add_edge(2, 1, 1)
+        self.assertFalse(frozen.is_edge(2, 1))
+
+    def test_copy_on_write(self) -> None:
+        graph = Graph(4)
+        graph.add_edge(0, 1, 5)
+        graph.add_edge(1, 2, 7)
+        graph.durations[0] = 3
+
+        first = graph.copy(copy_on_write=True)
+        second = graph.copy(copy_on_write=True)
+        first.set_edge_cost(0, 1, 100)
+        second.add_edge(2, 3, 1)
+        graph.remove_vertex(0)
+
+        self.assertEqual(set(graph.edges_iterator()), {(1, 2, 7)})
+        self.assertEqual(set(first.edges_iterator()), {(0, 1, 100), (1, 2, 7)})
+        self.assertEqual(set(second.edges_iterator()), {(0, 1, 5), (1, 2, 7), (2, 3, 1)})
+        self.assertEqual(set(first.neighbours_iterator(0)), {1})
+        self.assertFalse(first.is_edge(2, 3))
+
+        first.durations[0] = 10
+        self.assertEqual(second.durations[0], 3)
+
+    def test_compact_graph(self) -> None:
+        graph = CompactGraph(5)
+        graph.add_edge(1, 2, 5)
+        graph.add_edge(1, 3, 2)
+        graph.add_edge(4, 1, 7)
+        self.assertEqual(set(graph.edges_iterator()), {(1, 2, 5), (1, 3, 2), (4, 1, 7)})
+        self.assertEqual(graph.costs[(4, 1)], 7)
+        self.assertEqual(dict(graph.costs.items()), {(1, 2): 5, (1, 3): 2, (4, 1): 7})
+        self.assertEqual(set(graph.transpose_iterator(1)), {4})
+
+        graph_copy = graph.copy(copy_on_write=True)
+        graph_copy.set_edge_cost(1, 2, 10)
+        graph.remove_vertex(1)
+        self.assertEqual(graph.edge_count(), 0)
+        self.assertEqual(graph_copy.edge_count(), 3)
+        self.assertEqual(graph_copy.get_edge_cost(1, 2), 10)
+
+        with self.assertRaises(EdgeError):
+            graph.add_edge(1, 2)
+
+        with self.assertRaises(AttributeError):
+            graph.extra = 1
+
+        frozen = graph_copy.freeze()
+        self.assertEqual(set(frozen.edges_iterator()), set(graph_copy.edges_iterator()))
+
+    def test_version(self) -> None:
+        for graph in (Graph(3), CompactGraph(3)):
+            version = graph.version
+            graph.add_edge(0, 1, 1)
+            graph.set_edge_cost(0, 1, 2)
+            graph.remove_edge(0, 1)
+            graph.add_vertex(5)
+            graph.remove_vertex(5)
+            self.assertEqual(graph.version, version + 5)
+            self.assertFalse(graph.is_edge(0, 1))
+
+    def test_change_log(self) -> None:
+        for graph in (Graph(3), CompactGraph(3)):
+            self.assertIsNone(graph.change_log)
+            log = graph.enable_change_log(capacity=4)
+            received = []
+            token = log.subscribe(received.append)
+
+            graph.add_edge(0, 1, 1)
+            graph.set_edge_cost(0, 1, 2)
+            graph.add_vertex(5)
+            self.assertEqual(log.sequence, 3)
+            self.assertEqual([change.kind for change in log.changes_since(1)], ["set_edge_cost", "add_vertex"])
+            self.assertEqual(log.changes_since(1)[0][4:], (1, 2))
+            self.assertEqual(received, log.changes_since(0))
+
+            log.unsubscribe(token)
+            graph.remove_vertex(0)
+            self.assertEqual(len(received), 3)
+            self.assertEqual([change.kind for change in log.changes_since(3)], ["remove_edge", "remove_vertex"])
+            self.assertEqual(log.changes_since(3)[0][2:], (0, 1, 2, None))
+
+            with self.assertRaises(LookupError):
+                log.changes_since(0)
+            with self.assertRaises(ValueError):
+                log.changes_since(10)
+
+            self.assertIsNone(graph.copy().change_log)
+            graph.disable_change_log()
+            graph.add_vertex(0)
+            self.assertEqual(log.sequence, 5)
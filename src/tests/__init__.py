@@ -1,3 +1,5 @@
 from .Tests import Tests
+from .AlgorithmTests import AlgorithmTests
+from .FileTests import FileTests
 
-__all__ = ["Tests"]
+__all__ = ["Tests", "AlgorithmTests", "FileTests"]
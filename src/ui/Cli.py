@@ -0,0 +1,438 @@
+import argparse
+import asyncio
+import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from time import perf_counter
+from domain import FrozenGraph
+from utils.Batch import initialize_worker, answer_group
+from utils import (
+    read_file, read_binary_file, read_from_activities_file, convert_text_to_binary, convert_binary_to_text,
+    has_negative_costs, dag, CriticalPathSchedule, held_karp, HELD_KARP_AUTO_LIMIT, local_search_tsp,
+    BranchAndBound, BRANCH_AND_BOUND_LIMIT, ShortestPathCache, enable_stats, disable_stats
+)
+# The non-interactive interface: every subcommand loads its graph once, reads its queries as a stream
+# (one per line, from a file or the standard input) and writes one JSON object per line.
+# Run from the src directory: python main.py --help
+
+# the queries read before their groups are sent to the worker pool
+CHUNK_SIZE = 10000
+# the default memory budget of the resident shortest path trees, in MiB
+CACHE_MEMORY = 256
+
+
+def load_graph(file_path: str, file_format: str = "auto"):
+    """
+    Loads a graph file
+    :param file_path: the path of the file (relative to the resources directory)
+    :param file_format: "text", "binary", "activities", or "auto" to pick binary for the .bin files
+    :return: the graph, a frozen graph for the binary format
+    """
+    if file_format == "auto":
+        file_format = "binary" if file_path.endswith(".bin") else "text"
+
+    if file_format == "binary":
+        return read_binary_file(file_path)
+    if file_format == "activities":
+        return read_from_activities_file(file_path)
+    return read_file(file_path)
+
+
+def parse_query(line: str) -> tuple:
+    """
+    Parses a path query: two vertices separated by spaces or a comma, a JSON list of two vertices
+    or a JSON object with the "start" and "end" keys
+    :param line: the line, without the line break
+    :return: the starting and the ending vertex
+    """
+    line = line.strip()
+    if line.startswith("{"):
+        query = json.loads(line)
+        vertices = query["start"], query["end"]
+    elif line.startswith("["):
+        vertices = json.loads(line)
+    else:
+        vertices = line.replace(",", " ").split()
+
+    if len(vertices) != 2:
+        raise ValueError("ERROR: A query needs a starting and an ending vertex!")
+
+    return int(vertices[0]), int(vertices[1])
+
+
+def read_queries(stream) -> iter:
+    """
+    Reads the path queries of a stream, one by one, skipping the empty lines and the # comments
+    :param stream: a text stream
+    :return: a generator of (line number, starting vertex, ending vertex, error message) tuples, where the
+             vertices are None and the message is set for the lines that could not be parsed
+    """
+    for number, line in enumerate(stream, 1):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+
+        try:
+            starting_vertex, ending_vertex = parse_query(line)
+        except (ValueError, KeyError, TypeError) as error:
+            message = str(error) if str(error).startswith("ERROR") else "ERROR: Invalid query."
+            yield number, None, None, message
+            continue
+
+        yield number, starting_vertex, ending_vertex, None
+
+
+def path_fields(algorithm: str, result) -> dict:
+    """
+    Turns the answer of a path query into the fields of a JSON object
+    :param algorithm: "bfs", "ford" or "dijkstra"
+    :param result: the path for "bfs", the cost and the path otherwise (as returned by ShortestPathCache.query)
+    :return: the fields; the cost and the path are null when the ending vertex cannot be reached
+    """
+    if algorithm == "bfs":
+        return {"path": result}
+
+    cost, path = result
+    if path is None:
+        return {"error": "INFO: The graph contains negative cost cycles."}
+    if cost == float("Inf"):
+        return {"cost": None, "path": None}
+    return {"cost": cost, "path": path}
+
+
+def path_record(number: int, starting_vertex: int, ending_vertex: int, algorithm: str, result) -> dict:
+    """
+    Turns the answer of a path query into a JSON object (see path_fields)
+    :param number: the line of the query
+    """
+    record = {"line": number, "start": starting_vertex, "end": ending_vertex}
+    record.update(path_fields(algorithm, result))
+    return record
+
+
+def write_record(output, record: dict) -> None:
+    """
+    Writes a JSON object as one line
+    """
+    output.write(json.dumps(record) + "\n")
+
+
+def answer_queries(graph, algorithm: str, queries, output, memory: int) -> dict:
+    """
+    Answers the path queries in this process, in order, from the shortest path trees kept for the whole stream
+    :param graph: the graph
+    :param algorithm: "bfs", "ford" or "dijkstra"
+    :param queries: the tuples of read_queries
+    :param output: the text stream of the answers
+    :param memory: the memory budget of the trees, in bytes
+    :return: the number of hits and misses of the trees
+    """
+    cache = ShortestPathCache(graph, memory)
+    for number, starting_vertex, ending_vertex, error in queries:
+        if error is None:
+            try:
+                result = cache.query(algorithm, starting_vertex, ending_vertex)
+            except Exception as exception:
+                error = str(exception)
+
+        if error is not None:
+            write_record(output, {"line": number, "error": error})
+        else:
+            write_record(output, path_record(number, starting_vertex, ending_vertex, algorithm, result))
+
+    return {"cache_hits": cache.hits, "cache_misses": cache.misses}
+
+
+def submit_chunk(executor: ProcessPoolExecutor, graph, algorithm: str, chunk: list, output) -> list:
+    """
+    Groups a chunk of path queries by root and sends every group to the worker pool
+    :return: the (future, line numbers) pairs of the groups
+    """
+    from_start = algorithm != "bfs"
+    groups = dict()
+    for number, starting_vertex, ending_vertex, error in chunk:
+        if error is None and (not graph.is_vertex(starting_vertex) or not graph.is_vertex(ending_vertex)):
+            error = "ERROR: Invalid vertex."
+        if error is not None:
+            write_record(output, {"line": number, "error": error})
+            continue
+
+        root, other = (starting_vertex, ending_vertex) if from_start else (ending_vertex, starting_vertex)
+        numbers, others = groups.setdefault(root, ([], []))
+        numbers.append(number)
+        others.append(other)
+
+    return [(executor.submit(answer_group, None, algorithm, root, others), numbers)
+            for root, (numbers, others) in groups.items()]
+
+
+def write_chunk(pending: list, algorithm: str, output) -> None:
+    """
+    Writes the answers of the groups of a chunk, waiting for their workers
+    """
+    for future, numbers in pending:
+        for number, (starting_vertex, ending_vertex, result) in zip(numbers, future.result()):
+            write_record(output, path_record(number, starting_vertex, ending_vertex, algorithm, result))
+
+
+def answer_queries_pool(graph, algorithm: str, queries, output, processes: int, chunk_size: int) -> dict:
+    """
+    Answers the path queries in a process pool: the workers receive a frozen snapshot of the graph once,
+    then the queries are read in chunks and every group of queries sharing a root needs a single search.
+    While the groups of a chunk are searched, the next chunk is read, and the answers are written by chunk
+    (in the order of the groups, so every answer carries the line of its query)
+    :param graph: the graph
+    :param algorithm: "bfs", "ford" or "dijkstra"
+    :param queries: the tuples of read_queries
+    :param output: the text stream of the answers
+    :param processes: the number of worker processes
+    :param chunk_size: the number of queries of a chunk
+    :return: the number of searches
+    """
+    snapshot = graph if isinstance(graph, FrozenGraph) else graph.freeze()
+    searches = 0
+    pending = deque()
+    with ProcessPoolExecutor(processes, initializer=initialize_worker, initargs=(snapshot,)) as executor:
+        chunk = []
+        for query in queries:
+            chunk.append(query)
+            if len(chunk) < chunk_size:
+                continue
+
+            pending.append(submit_chunk(executor, snapshot, algorithm, chunk, output))
+            searches += len(pending[-1])
+            chunk = []
+            if len(pending) > 1:
+                write_chunk(pending.popleft(), algorithm, output)
+
+        pending.append(submit_chunk(executor, snapshot, algorithm, chunk, output))
+        searches += len(pending[-1])
+        while pending:
+            write_chunk(pending.popleft(), algorithm, output)
+
+    return {"searches": searches}
+
+
+def solve_tsp(graph, time_limit: float) -> dict:
+    """
+    Finds a minimum cost Hamiltonian cycle like the menu does: exactly for the small graphs, with branch and bound
+    stopped at the time limit for the medium ones and with local search for the large ones
+    :return: the cost, the cycle (both null if there is none) and whether the cycle is proved optimal
+    """
+    cost, cycle, proved, method = None, None, False, "local_search"
+    if graph.vertex_count() <= BRANCH_AND_BOUND_LIMIT:
+        try:
+            if graph.vertex_count() <= HELD_KARP_AUTO_LIMIT:
+                (cost, cycle), proved, method = held_karp(graph), True, "held_karp"
+            else:
+                solver = BranchAndBound(graph)
+                proved, method = solver.solve(time_limit=time_limit), "branch_and_bound"
+                cost, cycle = solver.cost, solver.tour
+        except ImportError:
+            pass
+
+    if cycle is None and not proved:
+        cost, cycle = local_search_tsp(graph, time_limit)
+        method = "local_search"
+
+    if cycle is None:
+        cost = None
+    return {"cost": cost, "cycle": cycle, "optimal": proved, "method": method}
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """
+    :return: the parser of the command line arguments
+    """
+    parser = argparse.ArgumentParser(prog="python main.py", description="Runs the graph algorithms in batch, "
+                                     "writing JSON Lines (without arguments the interactive menu starts).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_command(name: str, help_text: str, queries: bool = False) -> argparse.ArgumentParser:
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("graph", help="the graph file (relative to the resources directory)")
+        command.add_argument("--format", default="auto", choices=["auto", "text", "binary", "activities"],
+                             help="the format of the graph file (auto: binary for .bin files, text otherwise)")
+        command.add_argument("--output", default="-", help="the file of the JSON Lines results (- for stdout)")
+        command.add_argument("--stats", action="store_true",
+                             help="write the timings and the algorithm counters to stderr when done")
+        if queries:
+            command.add_argument("--input", default="-", help="the file of the queries (- for stdin), one per line")
+        return command
+
+    add_command("load", "load a graph and describe it")
+    for name, help_text in (("bfs", "fewest edges paths, with the backwards BFS"),
+                            ("shortest", "lowest cost paths (Dijkstra if no cost is negative, Ford otherwise)")):
+        command = add_command(name, help_text, queries=True)
+        if name == "shortest":
+            command.add_argument("--algorithm", default="auto", choices=["auto", "ford", "dijkstra"])
+        command.add_argument("--processes", type=int, default=None,
+                             help="answer the query groups in a pool of this many worker processes")
+        command.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                             help="the queries grouped at once by the worker pool")
+        command.add_argument("--cache-memory", type=int, default=CACHE_MEMORY,
+                             help="the MiB of search trees kept resident between queries without a pool")
+    add_command("toposort", "topological order, or a cycle if there is one")
+    command = add_command("cpm", "critical path of an activities graph (durations changed by the queries)",
+                          queries=True)
+    command.set_defaults(format="activities", input=None)
+    command = add_command("tsp", "minimum cost Hamiltonian cycle")
+    command.add_argument("--time-limit", type=float, default=10.0, help="the seconds of the heuristic searches")
+
+    command = commands.add_parser("convert", help="convert a graph file between the text and the binary format")
+    command.add_argument("source", help="the source file (relative to the resources directory)")
+    command.add_argument("target", help="the target file (relative to the resources directory)")
+    command.add_argument("--to", choices=["binary", "text"], default=None,
+                         help="the target format (by default binary unless the source is a .bin file)")
+
+    # imported here since the server uses the loading and the answers of this module
+    from ui.Server import PORT, TIMEOUT
+    command = commands.add_parser("serve", help="keep a graph loaded and answer JSON Lines requests over a socket")
+    command.add_argument("graph", help="the graph file (relative to the resources directory)")
+    command.add_argument("--format", default="auto", choices=["auto", "text", "binary", "activities"],
+                         help="the format of the graph file (auto: binary for .bin files, text otherwise)")
+    command.add_argument("--host", default="127.0.0.1", help="the address of the TCP socket")
+    command.add_argument("--port", type=int, default=PORT, help="the port of the TCP socket (0 for any free port)")
+    command.add_argument("--unix", help="listen on this Unix-domain socket instead of TCP")
+    command.add_argument("--processes", type=int, default=None,
+                         help="the worker processes (the number of processors by default, 0 for none)")
+    command.add_argument("--timeout", type=float, default=TIMEOUT, help="the default seconds of a request")
+    command.add_argument("--cache-memory", type=int, default=CACHE_MEMORY,
+                         help="the MiB of search trees kept resident by every worker")
+
+    # the options of the suite are not declared here, run_cli forwards every argument it does not know
+    commands.add_parser("bench", help="run the benchmark suite (see python -m benchmarks.Suite --help)")
+    return parser
+
+
+def run_schedule(graph, options, output) -> None:
+    """
+    Writes the times of every activity and the critical path, then applies every duration change of the input
+    ("activity duration" per line) and writes the new total time and critical path
+    """
+    schedule = CriticalPathSchedule(graph)
+    for activity in dag(graph):
+        earliest_start, earliest_end, latest_start, latest_end = schedule.times(activity)
+        write_record(output, {"activity": activity, "earliest_start": earliest_start, "earliest_end": earliest_end,
+                              "latest_start": latest_start, "latest_end": latest_end,
+                              "critical": schedule.is_critical(activity)})
+    write_record(output, {"total_time": schedule.total_time, "critical": schedule.critical_activities()})
+
+    if options.input is None:
+        return
+
+    with nullcontext(sys.stdin) if options.input == "-" else open(options.input) as stream:
+        for number, activity, duration, error in read_queries(stream):
+            if error is None:
+                try:
+                    schedule.set_duration(activity, duration)
+                except Exception as exception:
+                    error = str(exception)
+
+            if error is not None:
+                write_record(output, {"line": number, "error": error})
+            else:
+                write_record(output, {"line": number, "activity": activity, "duration": duration,
+                                      "total_time": schedule.total_time,
+                                      "critical": schedule.critical_activities()})
+
+
+def run_command(options, output) -> dict:
+    """
+    Runs a subcommand over its graph
+    :return: the statistics of the run, besides the algorithm counters
+    """
+    started = perf_counter()
+    graph = load_graph(options.graph, options.format)
+    summary = {"load_seconds": perf_counter() - started}
+
+    if options.command == "load":
+        write_record(output, {"vertices": graph.vertex_count(), "edges": graph.edge_count(),
+                              "frozen": isinstance(graph, FrozenGraph), "seconds": summary["load_seconds"]})
+
+    elif options.command in ("bfs", "shortest"):
+        algorithm = "bfs" if options.command == "bfs" else options.algorithm
+        if algorithm == "auto":
+            algorithm = "ford" if has_negative_costs(graph) else "dijkstra"
+
+        with nullcontext(sys.stdin) if options.input == "-" else open(options.input) as stream:
+            if options.processes is None:
+                summary.update(answer_queries(graph, algorithm, read_queries(stream), output,
+                                              options.cache_memory << 20))
+            else:
+                summary.update(answer_queries_pool(graph, algorithm, read_queries(stream), output,
+                                                   options.processes, options.chunk_size))
+
+    elif options.command == "toposort":
+        cycle = []
+        order = dag(graph, cycle)
+        write_record(output, {"order": order} if len(order) == graph.vertex_count() else {"cycle": cycle})
+
+    elif options.command == "cpm":
+        run_schedule(graph, options, output)
+
+    elif options.command == "tsp":
+        write_record(output, solve_tsp(graph, options.time_limit))
+
+    summary["seconds"] = perf_counter() - started
+    return summary
+
+
+def run_cli(arguments: list = None) -> int:
+    """
+    The command line entry point of the batch interface
+    :param arguments: the command line arguments, sys.argv by default
+    :return: the exit code
+    """
+    parser = create_parser()
+    options, suite_arguments = parser.parse_known_args(arguments)
+
+    if options.command == "bench":
+        from benchmarks.Suite import main as benchmark_main
+        return benchmark_main(suite_arguments)
+
+    if suite_arguments:
+        parser.error(f"unrecognized arguments: {' '.join(suite_arguments)}")
+
+    if options.command == "serve":
+        from ui.Server import run_server
+        try:
+            asyncio.run(run_server(options.graph, options.format, options.host, options.port, options.unix,
+                                   options.processes, options.timeout, options.cache_memory << 20))
+        except KeyboardInterrupt:
+            pass
+        except Exception as error:
+            print(error, file=sys.stderr)
+            return 1
+        return 0
+
+    if options.command == "convert":
+        to_binary = not options.source.endswith(".bin") if options.to is None else options.to == "binary"
+        try:
+            if to_binary:
+                convert_text_to_binary(options.source, options.target)
+            else:
+                convert_binary_to_text(options.source, options.target)
+        except Exception as error:
+            print(error, file=sys.stderr)
+            return 1
+
+        write_record(sys.stdout, {"source": options.source, "target": options.target,
+                                  "format": "binary" if to_binary else "text"})
+        return 0
+
+    stats = enable_stats() if options.stats else None
+    try:
+        with nullcontext(sys.stdout) if options.output == "-" else open(options.output, "w") as output:
+            summary = run_command(options, output)
+    except Exception as error:
+        print(error, file=sys.stderr)
+        return 1
+    finally:
+        if stats is not None:
+            disable_stats()
+
+    if stats is not None:
+        print(json.dumps({"summary": summary, "algorithms": stats.to_dict()}), file=sys.stderr)
+    return 0
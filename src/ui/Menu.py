@@ -1,8 +1,9 @@
 from domain import Graph
+from utils import Instrumentation
 from utils import (
     read_file, write_file, read_from_activities_file,
-    backwards_breadth_first_search, ford_algorithm,
-    dag, compute_times, get_minimum_cost_hamiltonian
+    dag, compute_times, held_karp, HELD_KARP_AUTO_LIMIT, local_search_tsp, gnm_random_graph, shortest_path,
+    BranchAndBound, BRANCH_AND_BOUND_LIMIT, ShortestPathCache, enable_stats, disable_stats
 )
 
 
@@ -16,6 +17,7 @@ class Menu:
         Creates an instance of the Menu class.
         """
         self.__graph = Graph()
+        self.__path_cache = ShortestPathCache(self.__graph)
 
         self.__menu_options = ["Exit", "Read from file", "Write to file",
                                "Print vertex count", "Print edge count",
@@ -31,7 +33,9 @@ class Menu:
                                "Find the lowest length path between two vertices using BFS backwards",
                                "Find the lowest cost walk between two vertices using Ford's algorithm",
                                "Read from an activities file", "Perform a topological sort", "Show activities",
-                               "Find a minimum cost Hamiltonian cycle"]
+                               "Find a minimum cost Hamiltonian cycle",
+                               "Find the lowest cost walk between two vertices (Dijkstra if no negative costs)",
+                               "Turn the algorithm statistics on or off"]
 
     def empty_graph(self) -> None:
         """
@@ -68,7 +72,7 @@ class Menu:
             return
 
         try:
-            self.__graph = Graph(vertex_count, edge_count)
+            self.__graph = gnm_random_graph(vertex_count, edge_count)
             print(f"INFO: Generated graph with {vertex_count} vertices and {edge_count} random edges.")
         except Exception as e:
             print(e)
@@ -374,9 +378,14 @@ class Menu:
             self.show_activities()
         elif option == 27:
             self.hamiltonian_cycle()
+        elif option == 28:
+            self.lowest_cost_path()
+        elif option == 29:
+            self.toggle_stats()
         else:
             print("ERROR: Invalid menu option!")
 
+        self.print_stats()
         print()
         input("Press <ENTER> to continue.")
 
@@ -426,7 +435,7 @@ class Menu:
             print("ERROR: One or more vertices do not belong to the graph.")
             return None
 
-        path = backwards_breadth_first_search(self.__graph, vertex1, vertex2)
+        path = self.path_cache().query("bfs", vertex1, vertex2)
         if path is None or len(path) == 0:
             print("INFO: There is no path between the given vertices.")
             return None
@@ -451,8 +460,38 @@ class Menu:
             print("ERROR: One or more vertices do not belong to the graph.")
             return None
 
-        cost, path = ford_algorithm(self.__graph, vertex1, vertex2)
+        cost, path = self.path_cache().query("ford", vertex1, vertex2)
+        Menu.print_cheapest_path(cost, path)
 
+    def lowest_cost_path(self) -> None:
+        """
+        Finds the lowest cost path between two vertices using Dijkstra's algorithm if no cost is negative.
+        """
+        vertex1 = Menu.get_input("Source vertex: ")
+        vertex2 = Menu.get_input("Destination vertex: ")
+        if not self.__graph.is_vertex(vertex1) or not self.__graph.is_vertex(vertex2):
+            print("ERROR: One or more vertices do not belong to the graph.")
+            return None
+
+        cost, path = shortest_path(self.__graph, vertex1, vertex2)
+        Menu.print_cheapest_path(cost, path)
+
+    def path_cache(self) -> ShortestPathCache:
+        """
+        Returns the shortest path cache of the current graph, replacing it if a new graph was loaded.
+        """
+        if self.__path_cache.graph is not self.__graph:
+            self.__path_cache = ShortestPathCache(self.__graph)
+
+        return self.__path_cache
+
+    @staticmethod
+    def print_cheapest_path(cost: int, path: list) -> None:
+        """
+        Prints the result of a lowest cost walk search.
+        :param cost: the cost of the walk
+        :param path: the walk or None if there are negative cost cycles
+        """
         if path is None:
             print("INFO: The graph contains negative cost cycles.")
         else:
@@ -470,9 +509,10 @@ class Menu:
         """
         Prints the result of the topological sort algorithm.
         """
-        sorted_graph = dag(self.__graph)
+        cycle = []
+        sorted_graph = dag(self.__graph, cycle)
         if len(sorted_graph) == 0:
-            print("INFO: The graph is not a DAG.")
+            print(f"INFO: The graph is not a DAG, it has the cycle {cycle}.")
             return
 
         print("Topological sort: ", end="")
@@ -511,9 +551,35 @@ class Menu:
     def hamiltonian_cycle(self) -> None:
         """
         Finds the minimum cost Hamiltonian cycle in the graph.
+        Small graphs are solved exactly (with branch and bound stopped after ten seconds for the medium ones),
+        larger ones with a second of local search.
         """
-        cycle = list()
-        minimum_cost = get_minimum_cost_hamiltonian(self.__graph, 0, cycle)
+        if self.__graph.vertex_count() == 0:
+            print("ERROR: The graph is empty!")
+            return
+
+        minimum_cost, cycle, proved = None, None, False
+        if self.__graph.vertex_count() <= BRANCH_AND_BOUND_LIMIT:
+            try:
+                if self.__graph.vertex_count() <= HELD_KARP_AUTO_LIMIT:
+                    minimum_cost, cycle = held_karp(self.__graph)
+                    proved = True
+                else:
+                    solver = BranchAndBound(self.__graph)
+                    proved = solver.solve(time_limit=10.0)
+                    minimum_cost, cycle = solver.cost, solver.tour
+            except ImportError:
+                pass
+
+        if cycle is None and proved:
+            print("INFO: The graph has no Hamiltonian cycle.")
+            return
+
+        if cycle is None:
+            minimum_cost, cycle = local_search_tsp(self.__graph, 1.0)
+            if cycle is None:
+                print("INFO: The local search could not find a Hamiltonian cycle.")
+                return
 
         result = f"INFO: The minimum cost Hamiltonian cycle with cost {minimum_cost} is: "
         for vertex in cycle:
@@ -521,6 +587,31 @@ class Menu:
 
         print(result[:-3])
 
+    @staticmethod
+    def toggle_stats() -> None:
+        """
+        Turns the algorithm statistics on or off.
+        """
+        if Instrumentation.active_stats is None:
+            enable_stats()
+            print("INFO: The algorithm statistics are on.")
+        else:
+            disable_stats()
+            print("INFO: The algorithm statistics are off.")
+
+    @staticmethod
+    def print_stats() -> None:
+        """
+        Prints and resets the algorithm statistics of the last option, if they are on and anything was counted.
+        """
+        stats = Instrumentation.active_stats
+        if stats is None or not (stats.timings or any(stats.counters.values())):
+            return
+
+        print("INFO: Algorithm statistics:")
+        print(stats)
+        stats.reset()
+
     @staticmethod
     def get_input(prompt: str) -> int:
         """
@@ -0,0 +1,421 @@
+import asyncio
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from time import perf_counter
+from domain import FrozenGraph
+from utils import has_negative_costs, dag, CriticalPathSchedule, ShortestPathCache
+from ui.Cli import load_graph, path_fields
+# A long-running query server: the graph is loaded once into a frozen snapshot and the requests arrive as JSON
+# Lines over a Unix-domain or localhost TCP socket. The asyncio front end only parses, dispatches and answers,
+# the searches run in a process pool whose workers keep their own shortest path trees between requests.
+#
+# Every request is a JSON object with an "op" and an optional "id" that is copied into its response:
+#   {"op": "bfs" | "shortest", "start": 0, "end": 99, "algorithm": "ford" | "dijkstra" (shortest only)}
+#   {"op": "toposort"}, {"op": "cpm", "activity": 3 (optional)}
+#   {"op": "load", "graph": "graph10k.txt", "format": "auto"}, {"op": "stats"}, {"op": "ping"}, {"op": "shutdown"}
+# and may set its own "timeout" in seconds. The requests of a connection are pipelined: a client can send many
+# without waiting, and the responses are written as they complete (not necessarily in order). Every response
+# carries the version of the graph that answered it; a load swaps in the new graph once it is ready, while the
+# requests already running finish on the previous one.
+#
+# A request that times out is answered with an error right away, but a search cannot be interrupted: it keeps
+# its worker busy until it is done, and the tree it computes stays in the cache of that worker for later requests.
+
+# the default port of the TCP socket
+PORT = 8642
+# the default seconds a request may take
+TIMEOUT = 10.0
+# the requests of one connection that may be running at once
+PIPELINE_DEPTH = 64
+# the latencies kept per operation for the percentiles
+LATENCY_SAMPLES = 10000
+# the percentiles of the stats response
+PERCENTILES = (50, 90, 99)
+# the operations of the requests
+OPERATIONS = ("bfs", "shortest", "toposort", "cpm", "load", "stats", "ping", "shutdown")
+
+# the shortest path trees of a worker process, set once by initialize_worker
+worker_cache = None
+
+
+def initialize_worker(graph: FrozenGraph, memory: int) -> None:
+    """
+    Stores the graph snapshot in a worker process of the pool, with an empty cache of shortest path trees
+    :param graph: the snapshot
+    :param memory: the memory budget of the trees, in bytes
+    """
+    global worker_cache
+    worker_cache = ShortestPathCache(graph, memory)
+
+
+def answer_path(cache: ShortestPathCache, algorithm: str, starting_vertex: int, ending_vertex: int) -> dict:
+    """
+    Answers a path query
+    :param cache: the shortest path trees (those of the worker process if None)
+    :param algorithm: "bfs", "ford" or "dijkstra"
+    :return: the fields of the response (see path_fields)
+    """
+    cache = worker_cache if cache is None else cache
+    return path_fields(algorithm, cache.query(algorithm, starting_vertex, ending_vertex))
+
+
+def answer_schedule(cache: ShortestPathCache) -> dict:
+    """
+    Sorts the graph topologically and, if it is a DAG, computes the times of its activities
+    :param cache: the shortest path trees (those of the worker process if None), only their graph is used
+    :return: the order, the total time, the critical activities and the times by activity;
+             or the cycle if the graph is not a DAG
+    """
+    graph = (worker_cache if cache is None else cache).graph
+    cycle = []
+    order = dag(graph, cycle)
+    if len(order) != graph.vertex_count():
+        return {"cycle": cycle}
+
+    if not graph.durations:
+        return {"order": order}
+
+    schedule = CriticalPathSchedule(graph, order)
+    return {"order": order, "total_time": schedule.total_time, "critical": schedule.critical_activities(),
+            "times": {activity: schedule.times(activity) for activity in order}}
+
+
+def percentile(values: list, fraction: float):
+    """
+    :param values: sorted values
+    :param fraction: between 0 and 1
+    :return: the nearest-rank percentile of the values
+    """
+    return values[min(len(values) - 1, max(0, int(fraction * len(values) + 0.5) - 1))]
+
+
+class GraphVersion:
+    """
+    A loaded graph: its snapshot, the pool that answers the queries over it and the results computed once.
+    """
+
+    def __init__(self, number: int, file_path: str, graph: FrozenGraph, processes: int, memory: int) -> None:
+        """
+        Creates a GraphVersion instance and starts its pool
+        :param number: the version, counted from 1
+        :param file_path: the file the graph was loaded from
+        :param graph: the snapshot
+        :param processes: the number of worker processes, or 0 to run the queries in one thread of the server
+        :param memory: the memory budget of the shortest path trees of every worker, in bytes
+        """
+        self.__number = number
+        self.__file_path = file_path
+        self.__graph = graph
+        # the algorithm of the shortest path requests that do not choose one
+        self.__negative_costs = has_negative_costs(graph)
+        if processes == 0:
+            # a single thread, since the cache is not thread-safe
+            self.__cache = ShortestPathCache(graph, memory)
+            self.__executor = ThreadPoolExecutor(1)
+        else:
+            self.__cache = None
+            self.__executor = ProcessPoolExecutor(processes, initializer=initialize_worker, initargs=(graph, memory))
+        self.__schedule = None
+
+    @property
+    def number(self) -> int:
+        """
+        :return: the version
+        """
+        return self.__number
+
+    @property
+    def file_path(self) -> str:
+        """
+        :return: the file the graph was loaded from
+        """
+        return self.__file_path
+
+    @property
+    def graph(self) -> FrozenGraph:
+        """
+        :return: the snapshot
+        """
+        return self.__graph
+
+    @property
+    def negative_costs(self) -> bool:
+        """
+        :return: True if an edge of the graph has a negative cost
+        """
+        return self.__negative_costs
+
+    def run(self, function, *arguments) -> asyncio.Future:
+        """
+        Runs a worker function in the pool
+        :param function: answer_path or answer_schedule
+        :param arguments: the arguments after the cache
+        :return: the future of its result
+        """
+        return asyncio.get_running_loop().run_in_executor(self.__executor, function, self.__cache, *arguments)
+
+    def schedule(self) -> asyncio.Future:
+        """
+        :return: the future of the result of answer_schedule, computed by the first request that needs it
+        """
+        if self.__schedule is None:
+            self.__schedule = self.run(answer_schedule)
+        return self.__schedule
+
+    def close(self) -> None:
+        """
+        Stops the pool once the queries it is running are done
+        """
+        self.__executor.shutdown(wait=False)
+
+
+class QueryServer:
+    """
+    The resident graph and the handlers of the requests, with their statistics.
+    """
+
+    def __init__(self, processes: int = None, timeout: float = TIMEOUT, memory: int = 256 << 20) -> None:
+        """
+        Creates a QueryServer instance, without a graph
+        :param processes: the number of worker processes (the number of processors by default),
+                          or 0 to run the queries in one thread of the server
+        :param timeout: the default seconds a request may take
+        :param memory: the memory budget of the shortest path trees of every worker, in bytes
+        """
+        self.__processes = (os.cpu_count() or 1) if processes is None else processes
+        self.__timeout = timeout
+        self.__memory = memory
+        self.__version = None
+        self.__load_lock = asyncio.Lock()
+        self.__stopped = asyncio.Event()
+        self.__started = perf_counter()
+        self.__latencies = dict()
+        self.__counts = {"requests": 0, "errors": 0, "timeouts": 0, "connections": 0}
+        self.__running = 0
+        self.__tasks = set()
+        self.__connections = dict()
+
+    @property
+    def version(self) -> GraphVersion:
+        """
+        :return: the current graph version, or None before the first load
+        """
+        return self.__version
+
+    async def load(self, file_path: str, file_format: str = "auto") -> GraphVersion:
+        """
+        Loads a graph file and swaps it in; the requests already running finish on the previous version
+        :param file_path: the path of the file (relative to the resources directory)
+        :param file_format: "text", "binary", "activities" or "auto"
+        :return: the new version
+        """
+        async with self.__load_lock:
+            loop = asyncio.get_running_loop()
+            graph = await loop.run_in_executor(None, load_graph, file_path, file_format)
+            if not isinstance(graph, FrozenGraph):
+                graph = await loop.run_in_executor(None, graph.freeze)
+
+            number = 1 if self.__version is None else self.__version.number + 1
+            previous, self.__version = self.__version, GraphVersion(number, file_path, graph, self.__processes,
+                                                                    self.__memory)
+            if previous is not None:
+                previous.close()
+            return self.__version
+
+    def stats(self) -> dict:
+        """
+        :return: the counters of the requests and the latency percentiles of every operation, in milliseconds
+        """
+        latencies = dict()
+        for operation, samples in self.__latencies.items():
+            samples = sorted(samples)
+            latencies[operation] = {f"p{rank}": percentile(samples, rank / 100) * 1e3 for rank in PERCENTILES}
+            latencies[operation]["max"] = samples[-1] * 1e3
+            latencies[operation]["count"] = len(samples)
+
+        graph = dict() if self.__version is None else {
+            "graph": self.__version.file_path, "vertices": self.__version.graph.vertex_count(),
+            "edges": self.__version.graph.edge_count()
+        }
+        return {**self.__counts, "running": self.__running, "processes": self.__processes,
+                "uptime": perf_counter() - self.__started, **graph, "latency_ms": latencies}
+
+    async def handle(self, request: dict) -> dict:
+        """
+        Answers a request, within its timeout (a search that times out still runs to its end in the pool)
+        :param request: the decoded request
+        :return: the response, with the id of the request and the version of the graph that answered it
+        """
+        started = perf_counter()
+        operation = request.get("op")
+        version = self.__version
+        response = {"id": request.get("id")}
+        self.__counts["requests"] += 1
+        self.__running += 1
+        try:
+            if operation not in OPERATIONS:
+                raise ValueError(f"ERROR: Unknown operation {operation}!")
+
+            timeout = float(request.get("timeout", self.__timeout))
+            if operation == "load":
+                version = await asyncio.wait_for(self.load(request["graph"], request.get("format", "auto")), timeout)
+                response.update(vertices=version.graph.vertex_count(), edges=version.graph.edge_count())
+            elif operation in ("stats", "ping", "shutdown"):
+                if operation == "stats":
+                    response["stats"] = self.stats()
+                elif operation == "shutdown":
+                    self.__stopped.set()
+            elif version is None:
+                raise ValueError("ERROR: No graph is loaded!")
+            else:
+                response.update(await asyncio.wait_for(self.__answer(version, operation, request), timeout))
+        except asyncio.TimeoutError:
+            self.__counts["timeouts"] += 1
+            response["error"] = "ERROR: The request timed out."
+        except Exception as error:
+            self.__counts["errors"] += 1
+            response["error"] = str(error) if str(error).startswith("ERROR") else f"ERROR: {error!r}"
+        finally:
+            self.__running -= 1
+
+        if version is not None:
+            response["version"] = version.number
+        # the unknown operations are not kept, so a client cannot add latency series
+        if operation in OPERATIONS:
+            self.__latencies.setdefault(operation, deque(maxlen=LATENCY_SAMPLES)).append(perf_counter() - started)
+        return response
+
+    @staticmethod
+    async def __answer(version: GraphVersion, operation: str, request: dict) -> dict:
+        """
+        Answers a query over a version of the graph
+        """
+        if operation in ("bfs", "shortest"):
+            algorithm = "bfs" if operation == "bfs" else request.get("algorithm", "auto")
+            if algorithm == "auto":
+                algorithm = "ford" if version.negative_costs else "dijkstra"
+            if algorithm not in ("bfs", "ford", "dijkstra"):
+                raise ValueError(f"ERROR: Unknown algorithm {algorithm}!")
+
+            starting_vertex, ending_vertex = int(request["start"]), int(request["end"])
+            if not version.graph.is_vertex(starting_vertex) or not version.graph.is_vertex(ending_vertex):
+                raise ValueError("ERROR: Invalid vertex.")
+            return await version.run(answer_path, algorithm, starting_vertex, ending_vertex)
+
+        # the futures are shared by the requests, so a timeout must not cancel them
+        schedule = await asyncio.shield(version.schedule())
+        if operation == "toposort" or "cycle" in schedule:
+            return {key: schedule[key] for key in ("order", "cycle") if key in schedule}
+        if "total_time" not in schedule:
+            raise ValueError("ERROR: The graph has no activity durations!")
+
+        response = {"total_time": schedule["total_time"], "critical": schedule["critical"]}
+        if "activity" in request:
+            activity = int(request["activity"])
+            if activity not in schedule["times"]:
+                raise ValueError("ERROR: Invalid vertex.")
+            response["activity"] = activity
+            response["earliest_start"], response["earliest_end"], response["latest_start"], \
+                response["latest_end"] = schedule["times"][activity]
+        return response
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Reads the requests of a connection and answers each one as soon as it is done, with at most
+        PIPELINE_DEPTH of them running at once
+        """
+        self.__counts["connections"] += 1
+        self.__connections[asyncio.current_task()] = writer
+        depth = asyncio.Semaphore(PIPELINE_DEPTH)
+        tasks = set()
+
+        async def respond(request: dict) -> None:
+            try:
+                response = await self.handle(request)
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                depth.release()
+
+        try:
+            while not reader.at_eof():
+                line = await reader.readline()
+                if not line.strip():
+                    continue
+
+                await depth.acquire()
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError
+                except ValueError:
+                    depth.release()
+                    self.__counts["errors"] += 1
+                    writer.write(b'{"id": null, "error": "ERROR: Invalid request."}\n')
+                    continue
+
+                task = asyncio.create_task(respond(request))
+                for running in (tasks, self.__tasks):
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            del self.__connections[asyncio.current_task()]
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = PORT, unix_path: str = None, ready=None) -> None:
+        """
+        Answers the connections of a socket until a shutdown request arrives, then the requests still running
+        :param host: the address of the TCP socket
+        :param port: the port of the TCP socket (0 for any free port)
+        :param unix_path: the path of a Unix-domain socket, used instead of the TCP socket
+        :param ready: a function called with the address once the socket listens, or None
+        """
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(self.serve_connection, unix_path)
+            address = unix_path
+        else:
+            server = await asyncio.start_server(self.serve_connection, host, port)
+            address = "{}:{}".format(*server.sockets[0].getsockname()[:2])
+
+        async with server:
+            if ready is not None:
+                ready(address)
+            await self.__stopped.wait()
+
+        # the requests already received are still answered
+        if self.__tasks:
+            await asyncio.gather(*self.__tasks)
+        # closing the connections ends their reading loops
+        connections = list(self.__connections.items())
+        for _, writer in connections:
+            writer.close()
+        await asyncio.gather(*(task for task, _ in connections), return_exceptions=True)
+        if unix_path is not None and os.path.exists(unix_path):
+            os.remove(unix_path)
+        if self.__version is not None:
+            self.__version.close()
+
+
+async def run_server(file_path: str, file_format: str = "auto", host: str = "127.0.0.1", port: int = PORT,
+                     unix_path: str = None, processes: int = None, timeout: float = TIMEOUT,
+                     memory: int = 256 << 20) -> None:
+    """
+    Loads a graph and serves its queries (see QueryServer) until a shutdown request arrives;
+    the address is written to stderr as a JSON object once the socket listens
+    """
+    server = QueryServer(processes, timeout, memory)
+    version = await server.load(file_path, file_format)
+    await server.serve(host, port, unix_path, lambda address: print(json.dumps({
+        "listening": address, "graph": file_path, "vertices": version.graph.vertex_count(),
+        "edges": version.graph.edge_count()
+    }), file=sys.stderr, flush=True))
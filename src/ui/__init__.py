@@ -1,3 +1,5 @@
 from .Menu import Menu
+from .Cli import run_cli
+from .Server import QueryServer
 
-__all__ = ["Menu"]
+__all__ = ["Menu", "run_cli", "QueryServer"]
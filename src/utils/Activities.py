@@ -1,4 +1,7 @@
-from domain import Graph
+from collections import deque
+from heapq import heapify, heappush, heappop
+from domain import Graph, FrozenGraph
+from exceptions import VertexError
 # 4. Write a program that, given a list of activities with duration and
 #    list of prerequisites for each activity, does the following:
 # - verify if the corresponding graph is a DAG and performs a topological sorting
@@ -44,111 +47,384 @@ def topological_sort_dfs(graph: Graph, vertex: int, sorted_list: list, finished:
     return True
 
 
-def dag(graph: Graph) -> list:
+def topological_sort_iterative(graph: Graph, cycle: list = None) -> list:
     """
-    Checks if the graph is a DAG and performs a topological sort of the graph
+    Performs a topological sort of the graph using depth-first traversal with an explicit stack
+
+    It visits the vertices in the same order as topological_sort_dfs, so the result is the same,
+    but the depth of the traversal is not limited by the recursion limit.
+
+    Complexity: O(V + E)
+    Where V is the number of vertices and E is the number of edges
     :param graph: the graph
-    :return: the graph sorted topologically
+    :param cycle: an optional list that receives a cycle of the graph if it is not a DAG
+    :return: the graph sorted topologically or an empty list if it is not a DAG
     """
-    # the final list containing the topological order
     sorted_list = []
-    # store handled vertices
-    finished = set()
-    # store the queue
-    queue = set()
-    for vertex in graph.vertices_iterator():
-        # loop through every vertex that was not handled yet
-        if vertex not in finished:
-            ok = topological_sort_dfs(graph, vertex, sorted_list, finished, queue)
-
-            # cycle detected, not a DAG
-            if not ok:
-                return []
+    # True while the vertex is on the stack, False once it is handled
+    on_stack = dict()
+
+    for root in graph.vertices_iterator():
+        if root in on_stack:
+            continue
+
+        on_stack[root] = True
+        stack = [root]
+        iterators = [graph.transpose_iterator(root)]
+        while stack:
+            for inbound in iterators[-1]:
+                if inbound not in on_stack:
+                    on_stack[inbound] = True
+                    stack.append(inbound)
+                    iterators.append(graph.transpose_iterator(inbound))
+                    break
+
+                # check if we have a cycle
+                if on_stack[inbound]:
+                    if cycle is not None:
+                        # every vertex on the stack is an inbound neighbour of the one below it
+                        cycle.extend(reversed(stack[stack.index(inbound):]))
+                        cycle.insert(0, inbound)
+                    return []
+            else:
+                # every inbound neighbour is handled, so the vertex is too
+                vertex = stack.pop()
+                iterators.pop()
+                on_stack[vertex] = False
+                sorted_list.append(vertex)
 
     return sorted_list
 
 
+def topological_sort_kahn(graph: Graph, cycle: list = None) -> list:
+    """
+    Performs a topological sort of the graph using Kahn's algorithm: the vertices
+    whose inbound neighbours are all sorted are kept in a queue, with an in degree counter for the others
+
+    Complexity: O(V + E)
+    Where V is the number of vertices and E is the number of edges
+    :param graph: the graph
+    :param cycle: an optional list that receives a cycle of the graph if it is not a DAG
+    :return: the graph sorted topologically or an empty list if it is not a DAG
+    """
+    in_degree = {vertex: graph.in_degree(vertex) for vertex in graph.vertices_iterator()}
+    queue = deque(vertex for vertex, degree in in_degree.items() if degree == 0)
+
+    sorted_list = []
+    while queue:
+        vertex = queue.popleft()
+        sorted_list.append(vertex)
+
+        for outbound in graph.neighbours_iterator(vertex):
+            in_degree[outbound] -= 1
+            if in_degree[outbound] == 0:
+                queue.append(outbound)
+
+    if len(sorted_list) == len(in_degree):
+        return sorted_list
+
+    if cycle is not None:
+        cycle.extend(find_cycle(graph, {vertex for vertex, degree in in_degree.items() if degree > 0}))
+    return []
+
+
+def find_cycle(graph: Graph, remaining: set) -> list:
+    """
+    Finds a cycle among the vertices left unsorted by Kahn's algorithm, each of which has an unsorted inbound neighbour
+    :param graph: the graph
+    :param remaining: the unsorted vertices
+    :return: the cycle, as a list of vertices that starts and ends with the same vertex
+    """
+    # walk backwards through unsorted inbound neighbours until a vertex repeats
+    vertex = next(iter(remaining))
+    walk = dict()
+    while vertex not in walk:
+        walk[vertex] = len(walk)
+        vertex = next(inbound for inbound in graph.transpose_iterator(vertex) if inbound in remaining)
+
+    cycle = list(walk)[walk[vertex]:]
+    cycle.reverse()
+    return [vertex] + cycle
+
+
+def dag(graph: Graph, cycle: list = None) -> list:
+    """
+    Checks if the graph is a DAG and performs a topological sort of the graph
+    :param graph: the graph
+    :param cycle: an optional list that receives a cycle of the graph if it is not a DAG,
+                  as a list of vertices that starts and ends with the same vertex
+    :return: the graph sorted topologically or an empty list if it is not a DAG
+    """
+    return topological_sort_iterative(graph, cycle)
+
+
+class CriticalPathSchedule:
+    """
+    The earliest and latest starting times of the activities of a DAG and its critical activities.
+
+    The times are kept in lists indexed by the position of the activity in the topological order, next to
+    the positions of its predecessors and successors, so the graph is only read once and never modified.
+    When the duration of an activity changes, the earliest times are propagated forwards and the latest
+    times backwards in topological order, only through the activities whose times actually change.
+    """
+
+    def __init__(self, graph: Graph, sorted_list: list = None) -> None:
+        """
+        Creates a CriticalPathSchedule instance
+        :param graph: the graph of the activities, with their durations
+        :param sorted_list: the topological order of the graph, computed with dag if not given
+        """
+        if sorted_list is None:
+            sorted_list = dag(graph)
+            if len(sorted_list) != graph.vertex_count():
+                raise ValueError("ERROR: The graph is not a DAG!")
+
+        self.__graph = graph
+        self.__order = list(sorted_list)
+        self.__position = {activity: position for position, activity in enumerate(self.__order)}
+        self.__predecessors = [[self.__position[inbound] for inbound in graph.transpose_iterator(activity)]
+                               for activity in self.__order]
+        self.__successors = [[self.__position[outbound] for outbound in graph.neighbours_iterator(activity)]
+                             for activity in self.__order]
+        self.__sinks = [position for position, successors in enumerate(self.__successors) if not successors]
+        self.__durations = [graph.durations[activity] for activity in self.__order]
+
+        count = len(self.__order)
+        self.__earliest_start = [0] * count
+        self.__earliest_end = [0] * count
+        self.__latest_start = [0] * count
+        self.__latest_end = [0] * count
+
+        self.__total_time = 0
+        self.__forward(range(count))
+        self.__total_time = max((self.__earliest_end[position] for position in self.__sinks), default=0)
+        self.__backward(range(count))
+        self.__critical = {position for position in range(count)
+                           if self.__earliest_start[position] == self.__latest_start[position]}
+
+    @property
+    def total_time(self) -> int:
+        """
+        :return: the total time of the project
+        """
+        return self.__total_time
+
+    def times(self, activity: int) -> tuple:
+        """
+        Returns the earliest start, earliest end, latest start and latest end time of an activity.
+        """
+        position = self.__position[activity]
+        return self.__earliest_start[position], self.__earliest_end[position], \
+            self.__latest_start[position], self.__latest_end[position]
+
+    def is_critical(self, activity: int) -> bool:
+        """
+        Checks if an activity is critical (its earliest and latest starting times are equal).
+        """
+        return self.__position[activity] in self.__critical
+
+    def critical_activities(self) -> list:
+        """
+        Returns the critical activities in topological order.
+        """
+        return [self.__order[position] for position in sorted(self.__critical)]
+
+    def set_duration(self, activity: int, duration: int) -> None:
+        """
+        Changes the duration of an activity in the graph and updates the times
+        :param activity: the activity
+        :param duration: the new duration
+        """
+        if activity not in self.__position:
+            raise VertexError("ERROR: Invalid vertex.")
+
+        self.__graph.durations[activity] = duration
+        self.update_duration(activity)
+
+    def update_duration(self, activity: int) -> None:
+        """
+        Updates the times after the duration of an activity was changed in the graph
+        :param activity: the activity
+        """
+        if activity not in self.__position:
+            raise VertexError("ERROR: Invalid vertex.")
+
+        position = self.__position[activity]
+        duration = self.__graph.durations[activity]
+        if duration == self.__durations[position]:
+            return
+        self.__durations[position] = duration
+
+        changed = self.__forward([position])
+        total_time = self.__total_time
+        if any(not self.__successors[changed_position] for changed_position in changed):
+            total_time = max(self.__earliest_end[sink] for sink in self.__sinks)
+
+        # a new total time changes the latest end time of every activity without successors
+        seeds = [position]
+        if total_time != self.__total_time:
+            self.__total_time = total_time
+            seeds.extend(self.__sinks)
+        changed |= self.__backward(seeds)
+
+        for changed_position in changed:
+            if self.__earliest_start[changed_position] == self.__latest_start[changed_position]:
+                self.__critical.add(changed_position)
+            else:
+                self.__critical.discard(changed_position)
+
+    def to_dictionaries(self) -> tuple:
+        """
+        Returns the times in the same form as compute_times
+        :return: the earliest and latest starting time for each activity and the critical activities
+        """
+        first = -1
+        last = len(self.__order)
+        total_time = self.__total_time
+
+        earliest_start_time = {first: 0, last: total_time}
+        earliest_end_time = {first: 0, last: total_time}
+        latest_start_time = {first: 0, last: total_time}
+        latest_end_time = {first: 0, last: total_time}
+        for position, activity in enumerate(self.__order):
+            earliest_start_time[activity] = self.__earliest_start[position]
+            earliest_end_time[activity] = self.__earliest_end[position]
+            latest_start_time[activity] = self.__latest_start[position]
+            latest_end_time[activity] = self.__latest_end[position]
+
+        return earliest_start_time, earliest_end_time, latest_start_time, latest_end_time, self.critical_activities()
+
+    def __forward(self, positions) -> set:
+        """
+        Recomputes the earliest times of some activities and of the successors whose times change
+        :param positions: the positions of the activities
+        :return: the positions whose times changed
+        """
+        earliest_start, earliest_end = self.__earliest_start, self.__earliest_end
+        predecessors, successors, durations = self.__predecessors, self.__successors, self.__durations
+
+        queued = set(positions)
+        heap = list(queued)
+        heapify(heap)
+        changed = set()
+        while heap:
+            position = heappop(heap)
+            queued.remove(position)
+
+            start = max((earliest_end[predecessor] for predecessor in predecessors[position]), default=0)
+            end = start + durations[position]
+            if start == earliest_start[position] and end == earliest_end[position]:
+                continue
+
+            earliest_start[position] = start
+            changed.add(position)
+            if end != earliest_end[position]:
+                earliest_end[position] = end
+                for successor in successors[position]:
+                    if successor not in queued:
+                        queued.add(successor)
+                        heappush(heap, successor)
+
+        return changed
+
+    def __backward(self, positions) -> set:
+        """
+        Recomputes the latest times of some activities and of the predecessors whose times change
+        :param positions: the positions of the activities
+        :return: the positions whose times changed
+        """
+        latest_start, latest_end = self.__latest_start, self.__latest_end
+        predecessors, successors, durations = self.__predecessors, self.__successors, self.__durations
+        total_time = self.__total_time
+
+        # the positions are negated so that the latest activity in topological order is popped first
+        queued = set(positions)
+        heap = [-position for position in queued]
+        heapify(heap)
+        changed = set()
+        while heap:
+            position = -heappop(heap)
+            queued.remove(position)
+
+            end = min((latest_start[successor] for successor in successors[position]), default=total_time)
+            start = end - durations[position]
+            if start == latest_start[position] and end == latest_end[position]:
+                continue
+
+            latest_end[position] = end
+            changed.add(position)
+            if start != latest_start[position]:
+                latest_start[position] = start
+                for predecessor in predecessors[position]:
+                    if predecessor not in queued:
+                        queued.add(predecessor)
+                        heappush(heap, -predecessor)
+
+        return changed
+
+
 def compute_times(graph: Graph, sorted_list: list) -> tuple:
     """
-    Computes the earliest and latest starting time for each activity and lists critical activities
+    Computes the earliest and latest starting time for each activity and lists critical activities,
+    without modifying the graph (see CriticalPathSchedule)
     :param graph: the graph
     :param sorted_list: the topological order of the graph
     :return: the earliest and latest starting time for each activity and the critical activities
     """
+    return CriticalPathSchedule(graph, sorted_list).to_dictionaries()
+
+
+def compute_times_frozen(graph: FrozenGraph, sorted_list: list) -> tuple:
+    """
+    Computes the earliest and latest starting time for each activity and lists critical activities
+    over the CSR arrays of a frozen graph, without adding the placeholder activities to it
+    :param graph: the frozen graph
+    :param sorted_list: the topological order of the graph
+    :return: the earliest and latest starting time for each activity and the critical activities
+    """
     first = -1
     last = len(sorted_list)
+    ids, durations = graph.ids, graph.durations
+    offsets, targets = graph.offsets, graph.targets
+    transpose_offsets, transpose_targets = graph.transpose_offsets, graph.transpose_targets
+    order = [graph.position(vertex) for vertex in sorted_list]
+
+    # the earliest start time is the maximum earliest end time of the predecessors
+    earliest_start = [0] * graph.vertex_count()
+    earliest_end = [0] * graph.vertex_count()
+    for vertex in order:
+        start = 0
+        for index in range(transpose_offsets[vertex], transpose_offsets[vertex + 1]):
+            if earliest_end[transpose_targets[index]] > start:
+                start = earliest_end[transpose_targets[index]]
+        earliest_start[vertex] = start
+        earliest_end[vertex] = start + durations[ids[vertex]]
+
+    # the placeholder last activity starts when every activity has ended
+    total_time = max(earliest_end, default=0)
+
+    # the latest end time is the minimum latest start time of the successors
+    latest_start = [0] * graph.vertex_count()
+    latest_end = [0] * graph.vertex_count()
+    for vertex in reversed(order):
+        end = total_time
+        if offsets[vertex] != offsets[vertex + 1]:
+            end = min(latest_start[targets[index]] for index in range(offsets[vertex], offsets[vertex + 1]))
+        latest_end[vertex] = end
+        latest_start[vertex] = end - durations[ids[vertex]]
 
-    # add the placeholder nodes: first and last
-    graph.add_vertex(first)
-    graph.add_vertex(last)
-
-    # insert the first placeholder activity
-    sorted_list.insert(0, first)
-    graph.durations[first] = 0
-
-    # add the edges between the first and the vertices with no inbound
-    for vertex in graph.vertices_iterator():
-        if graph.in_degree(vertex) == 0 and vertex != first and vertex != last:
-            graph.add_edge(first, vertex)
-
-    # insert the placeholder last activity
-    sorted_list.append(last)
-    graph.durations[last] = 0
-
-    # add the edges between the vertices with no outbound and the last
-    for vertex in graph.vertices_iterator():
-        if graph.out_degree(vertex) == 0 and vertex != first and vertex != last:
-            graph.add_edge(vertex, last)
-
-    # initialise the dictionaries for earliest_start_time and earliest_end_time
-    earliest_start_time = dict()
-    earliest_end_time = dict()
-    for vertex in graph.vertices_iterator():
-        earliest_start_time[vertex] = 0
-        earliest_end_time[vertex] = 0
-
-    # initialise the dictionaries for latest_start_time and latest_end_time
-    latest_start_time = dict()
-    latest_end_time = dict()
-    for vertex in graph.vertices_iterator():
-        latest_start_time[vertex] = float("Inf")
-        latest_end_time[vertex] = float("Inf")
-
-    # compute the earliest start and end time for each activity
-    for i in range(1, len(sorted_list)):
-        # take as earliest start time the maximum earliest end time of the predecessors
-        for inbound in graph.transpose_iterator(sorted_list[i]):
-            earliest_start_time[sorted_list[i]] = \
-                max(earliest_start_time[sorted_list[i]], earliest_end_time[inbound])
-        # the earliest end time will be the earliest start time + duration of activity
-        earliest_end_time[sorted_list[i]] = \
-            earliest_start_time[sorted_list[i]] + graph.durations[sorted_list[i]]
-
-    # compute the latest start and end time for each activity
-    latest_end_time[last] = earliest_end_time[last]
-    latest_start_time[last] = latest_end_time[last] - graph.durations[last]
-    latest_start_time[first] = 0
-    latest_end_time[first] = 0
-
-    # compute the latest start and end time of each activity
-    for i in range(len(sorted_list) - 1, 0, -1):
-        # take as latest end time the minimum of the latest start time of the outbounds
-        for outbound in graph.neighbours_iterator(sorted_list[i]):
-            latest_end_time[sorted_list[i]] = min(latest_end_time[sorted_list[i]], latest_start_time[outbound])
-        # the latest start time will be the latest end time - duration of activity
-        latest_start_time[sorted_list[i]] = \
-            latest_end_time[sorted_list[i]] - graph.durations[sorted_list[i]]
-
-    # remove the placeholder nodes
-    sorted_list.pop(0)
-    sorted_list.pop()
-    graph.remove_vertex(first)
-    graph.remove_vertex(last)
+    earliest_start_time = {first: 0, last: total_time}
+    earliest_end_time = {first: 0, last: total_time}
+    latest_start_time = {first: 0, last: total_time}
+    latest_end_time = {first: 0, last: total_time}
+    for vertex in order:
+        earliest_start_time[ids[vertex]] = earliest_start[vertex]
+        earliest_end_time[ids[vertex]] = earliest_end[vertex]
+        latest_start_time[ids[vertex]] = latest_start[vertex]
+        latest_end_time[ids[vertex]] = latest_end[vertex]
 
     # determine the critical activities
-    critical_activities = []
-    for activity in sorted_list:
-        if earliest_start_time[activity] == latest_start_time[activity]:
-            critical_activities.append(activity)
+    critical_activities = [activity for activity in sorted_list
+                           if earliest_start_time[activity] == latest_start_time[activity]]
 
     return earliest_start_time, earliest_end_time, latest_start_time, latest_end_time, critical_activities
@@ -0,0 +1,353 @@
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from domain import Graph, FrozenGraph
+from exceptions import VertexError
+from utils.Utils import resource_path
+from utils.Ford import edge_arrays, relax_edge_arrays
+from utils.Dijkstra import dijkstra_single_source
+from utils import Batch
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+# All pairs shortest paths: Johnson's algorithm for sparse graphs and a blocked
+# Floyd–Warshall algorithm for dense graphs, both writing into memory-mapped matrices.
+
+# graphs with at least this fraction of all the possible edges are solved with Floyd–Warshall
+DENSE_THRESHOLD = 0.1
+# number of rows of the distance matrix updated together by Floyd–Warshall
+BLOCK_SIZE = 64
+# number of columns of the tiles of Floyd–Warshall: a tile of BLOCK_SIZE x TILE_WIDTH floats takes 2 MiB,
+# about the size of a second level cache (narrower tiles only add NumPy calls)
+TILE_WIDTH = 4096
+# number of starting vertices handled by one task of Johnson's algorithm
+ROWS_PER_TASK = 64
+
+
+class DistanceMatrix:
+    """
+    The cheapest distance between every pair of vertices, with the rows and the columns in ascending vertex order.
+
+    The distances are a V x V float matrix (np.inf where there is no path) and the optional next hops a
+    V x V matrix of the position of the vertex that follows the row vertex on the cheapest path to the
+    column vertex (-1 where there is no path), stored in the smallest integer type that fits.
+    Both are memory-mapped, either from the given files or from anonymous temporary files.
+    """
+
+    def __init__(self, ids, distances, next_hops=None) -> None:
+        """
+        Creates a DistanceMatrix instance
+        :param ids: the vertex ids, in ascending order
+        :param distances: the distance matrix
+        :param next_hops: the next hop matrix or None
+        """
+        self.__ids = ids
+        self.__distances = distances
+        self.__next_hops = next_hops
+
+    @property
+    def ids(self):
+        """
+        :return: the vertex ids, in ascending order
+        """
+        return self.__ids
+
+    @property
+    def distances(self):
+        """
+        :return: the distance matrix
+        """
+        return self.__distances
+
+    @property
+    def next_hops(self):
+        """
+        :return: the next hop matrix or None if it was not computed
+        """
+        return self.__next_hops
+
+    def vertex_count(self) -> int:
+        """
+        Returns the number of vertices.
+        """
+        return len(self.__ids)
+
+    def position(self, vertex: int) -> int:
+        """
+        Returns the row and column of a vertex in the matrices.
+        """
+        position = int(np.searchsorted(self.__ids, vertex))
+        if position == len(self.__ids) or self.__ids[position] != vertex:
+            raise VertexError("ERROR: Invalid vertex.")
+
+        return position
+
+    def distance(self, starting_vertex: int, ending_vertex: int):
+        """
+        Returns the cost of the cheapest path between two vertices, or Inf if there is no path.
+        """
+        distance = self.__distances[self.position(starting_vertex), self.position(ending_vertex)]
+        return float("Inf") if distance == np.inf else int(distance)
+
+    def path(self, starting_vertex: int, ending_vertex: int) -> list:
+        """
+        Returns the cheapest path between two vertices from the next hop matrix, or None if there is no path.
+        """
+        if self.__next_hops is None:
+            raise ValueError("ERROR: The next hops were not computed!")
+
+        current, target = self.position(starting_vertex), self.position(ending_vertex)
+        if self.__next_hops[current, target] < 0:
+            return None
+
+        path = [current]
+        while current != target:
+            current = int(self.__next_hops[current, target])
+            path.append(current)
+
+        return self.__ids[path].tolist()
+
+
+def create_matrix(file_path: str, vertex_count: int, dtype):
+    """
+    Creates a memory-mapped square matrix
+    :param file_path: the name of the file in the resources directory, or None for an anonymous temporary file
+    :param vertex_count: the number of rows and columns
+    :param dtype: the type of the entries
+    :return: the matrix
+    """
+    if vertex_count == 0:
+        raise ValueError("ERROR: The graph is empty!")
+
+    if file_path is not None:
+        return np.memmap(resource_path(file_path), dtype=dtype, mode="w+", shape=(vertex_count, vertex_count))
+
+    # the mapping keeps its own handle, and the file is removed as soon as it is unmapped
+    with tempfile.TemporaryFile() as file:
+        return np.memmap(file, dtype=dtype, mode="w+", shape=(vertex_count, vertex_count))
+
+
+def next_hop_type(vertex_count: int):
+    """
+    Returns the smallest signed integer type that holds every position of a vertex.
+    """
+    return np.int16 if vertex_count < 1 << 15 else np.int32 if vertex_count < 1 << 31 else np.int64
+
+
+def johnson(graph: Graph, file_path: str = None, next_hops: bool = False, processes: int = None) -> DistanceMatrix:
+    """
+    Computes the cheapest distance between every pair of vertices using Johnson's algorithm
+
+    One vectorized Bellman–Ford run from a virtual vertex linked to every vertex gives the potentials h,
+    which make every cost non-negative: c'(x, y) = c(x, y) + h(x) - h(y). Then Dijkstra's algorithm runs from
+    every vertex over a frozen snapshot with these costs, spread over a process pool when processes is given.
+
+    Complexity: O(V x E log V)
+    Where V is the number of vertices and E is the number of edges
+    :param graph: a directed graph, compact graph or frozen graph
+    :param file_path: the file of the distance matrix (the next hops go to file_path + ".next"), or None
+    :param next_hops: also compute the next hop matrix, for path recovery
+    :param processes: the number of worker processes, or None to compute every row in this process
+    :return: the distance matrix or None if there are negative cost cycles
+    """
+    ids, sources, targets, costs = edge_arrays(graph)
+    vertex_count = len(ids)
+    order = np.argsort(sources, kind="stable")
+    sources, targets, costs = sources[order], targets[order], costs[order]
+
+    potentials = np.zeros(vertex_count)
+    if not relax_edge_arrays(sources, targets, costs, potentials, passes=vertex_count):
+        return None
+    potentials = potentials.astype(np.int64)
+
+    # the transposed edges are not used by Dijkstra's algorithm, but a frozen graph needs them
+    order = np.argsort(targets, kind="stable")
+    reweighted = costs + potentials[sources] - potentials[targets]
+    position_offsets = np.searchsorted(sources, np.arange(vertex_count + 1))
+    transpose_offsets = np.searchsorted(targets[order], np.arange(vertex_count + 1))
+    snapshot = FrozenGraph(array("q", np.arange(vertex_count, dtype=np.int64).tobytes()),
+                           array("q", position_offsets.astype(np.int64).tobytes()),
+                           array("q", targets.astype(np.int64).tobytes()),
+                           array("q", reweighted.astype(np.int64).tobytes()),
+                           array("q", transpose_offsets.astype(np.int64).tobytes()),
+                           array("q", sources[order].astype(np.int64).tobytes()),
+                           array("q", reweighted[order].astype(np.int64).tobytes()))
+
+    distances = create_matrix(file_path, vertex_count, np.float64)
+    hops = None
+    if next_hops:
+        hops = create_matrix(None if file_path is None else file_path + ".next", vertex_count,
+                             next_hop_type(vertex_count))
+
+    tasks = [range(start, min(start + ROWS_PER_TASK, vertex_count)) for start in range(0, vertex_count, ROWS_PER_TASK)]
+    if processes is None or len(tasks) < 2:
+        results = (johnson_rows(snapshot, potentials, rows, next_hops) for rows in tasks)
+        store_rows(distances, hops, results)
+    else:
+        with ProcessPoolExecutor(processes, initializer=Batch.initialize_worker, initargs=(snapshot,)) as executor:
+            store_rows(distances, hops, executor.map(johnson_rows, [None] * len(tasks), [potentials] * len(tasks),
+                                                     tasks, [next_hops] * len(tasks)))
+
+    distances.flush()
+    if hops is not None:
+        hops.flush()
+
+    return DistanceMatrix(ids, distances, hops)
+
+
+def johnson_rows(graph: FrozenGraph, potentials, rows: range, next_hops: bool) -> list:
+    """
+    Computes rows of the distance matrix with Dijkstra's algorithm over the reweighted snapshot
+    :param graph: the reweighted snapshot, with the positions as vertex ids (the snapshot of the worker if None)
+    :param potentials: the potential of every vertex
+    :param rows: the starting positions
+    :param next_hops: also compute the next hops
+    :return: the (row, distances, next hops or None) triples
+    """
+    if graph is None:
+        graph = Batch.worker_graph
+
+    vertex_count = len(potentials)
+    results = []
+    for row in rows:
+        dist, path = dijkstra_single_source(graph, row)
+        reached = np.fromiter(dist.keys(), dtype=np.int64, count=len(dist))
+        values = np.fromiter(dist.values(), dtype=np.float64, count=len(dist))
+
+        distances = np.full(vertex_count, np.inf)
+        distances[reached] = values - potentials[row] + potentials[reached]
+
+        hops = None
+        if next_hops:
+            hops = [-1] * vertex_count
+            hops[row] = row
+            for vertex in dist:
+                # walk up to the first vertex whose next hop is known, then fill the walk
+                walk = []
+                while hops[vertex] < 0:
+                    walk.append(vertex)
+                    vertex = path[vertex]
+
+                # the next hop towards a child of the starting vertex is the child itself
+                hop = walk[-1] if vertex == row and walk else hops[vertex]
+                for visited in walk:
+                    hops[visited] = hop
+
+        results.append((row, distances, hops))
+
+    return results
+
+
+def store_rows(distances, next_hops, results) -> None:
+    """
+    Writes the rows computed by johnson_rows into the matrices.
+    """
+    for rows in results:
+        for row, row_distances, row_hops in rows:
+            distances[row] = row_distances
+            if next_hops is not None:
+                next_hops[row] = row_hops
+
+
+def floyd_warshall(graph: Graph, file_path: str = None, next_hops: bool = False,
+                   block_size: int = BLOCK_SIZE, tile_width: int = TILE_WIDTH) -> DistanceMatrix:
+    """
+    Computes the cheapest distance between every pair of vertices using the Floyd–Warshall algorithm
+
+    The intermediate vertices are taken in blocks. For every block, the rows of that block are updated first
+    and then the other rows, one strip of block_size rows at a time, and every strip one tile of tile_width
+    columns at a time, starting with the columns of the block: the tile is updated with every intermediate
+    vertex of the block while it is still in the cache, with one vectorized operation each.
+    When the next hops are computed, the intermediate vertices are applied in the usual order instead.
+
+    Complexity: O(V^3)
+    Where V is the number of vertices
+    :param graph: a directed graph, compact graph or frozen graph
+    :param file_path: the file of the distance matrix (the next hops go to file_path + ".next"), or None
+    :param next_hops: also compute the next hop matrix, for path recovery
+    :param block_size: the number of intermediate vertices and of rows handled together
+    :param tile_width: the number of columns handled together (rounded up to a multiple of block_size)
+    :return: the distance matrix or None if there are negative cost cycles
+    """
+    # the columns of a block must fit in one tile
+    tile_width = -(-tile_width // block_size) * block_size
+    ids, sources, targets, costs = edge_arrays(graph)
+    vertex_count = len(ids)
+
+    distances = create_matrix(file_path, vertex_count, np.float64)
+    distances[:] = np.inf
+    distances[sources, targets] = costs
+    diagonal = np.arange(vertex_count)
+    distances[diagonal, diagonal] = np.minimum(distances[diagonal, diagonal], 0)
+
+    hops = None
+    if next_hops:
+        hops = create_matrix(None if file_path is None else file_path + ".next", vertex_count,
+                             next_hop_type(vertex_count))
+        hops[:] = -1
+        hops[sources, targets] = targets
+        hops[diagonal, diagonal] = diagonal
+
+    candidates = np.empty((block_size, vertex_count))
+    improved = np.empty((block_size, vertex_count), dtype=bool)
+
+    def relax(strip: int, column: int, column_end: int, k: int) -> None:
+        # the paths of the tile that get cheaper through the intermediate vertex k
+        strip_end = min(strip + block_size, vertex_count)
+        tile = distances[strip:strip_end, column:column_end]
+        buffer = candidates[:strip_end - strip, :column_end - column]
+        mask = improved[:strip_end - strip, :column_end - column]
+
+        np.add(distances[strip:strip_end, k, None], distances[k, column:column_end], out=buffer)
+        np.less(buffer, tile, out=mask)
+        np.copyto(tile, buffer, where=mask)
+        if hops is not None:
+            np.copyto(hops[strip:strip_end, column:column_end], hops[strip:strip_end, k, None], where=mask)
+
+    for block in range(0, vertex_count, block_size):
+        block_end = min(block + block_size, vertex_count)
+        strips = [block] + [strip for strip in range(0, vertex_count, block_size) if strip != block]
+
+        if hops is None:
+            # the tile of the columns of the block comes first, since the other tiles of the strip read them
+            block_tile = block - block % tile_width
+            tiles = [block_tile] + [tile for tile in range(0, vertex_count, tile_width) if tile != block_tile]
+            for strip in strips:
+                for tile in tiles:
+                    for k in range(block, block_end):
+                        relax(strip, tile, min(tile + tile_width, vertex_count), k)
+        else:
+            # with zero cost cycles, the strip order can make the next hops of two vertices point at each other,
+            # so every intermediate vertex is applied to the whole matrix before the next one
+            for k in range(block, block_end):
+                for strip in strips:
+                    relax(strip, 0, vertex_count, k)
+
+        if np.any(distances[diagonal, diagonal] < 0):
+            return None
+
+    distances.flush()
+    if hops is not None:
+        hops.flush()
+
+    return DistanceMatrix(ids, distances, hops)
+
+
+def all_pairs_shortest_paths(graph: Graph, file_path: str = None, next_hops: bool = False,
+                             processes: int = None) -> DistanceMatrix:
+    """
+    Computes the cheapest distance between every pair of vertices, with Floyd–Warshall for dense graphs
+    and Johnson's algorithm for sparse ones
+    :param graph: a directed graph, compact graph or frozen graph
+    :param file_path: the file of the distance matrix (the next hops go to file_path + ".next"), or None
+    :param next_hops: also compute the next hop matrix, for path recovery
+    :param processes: the number of worker processes for Johnson's algorithm
+    :return: the distance matrix or None if there are negative cost cycles
+    """
+    vertex_count = graph.vertex_count()
+    if vertex_count > 0 and graph.edge_count() >= DENSE_THRESHOLD * vertex_count * vertex_count:
+        return floyd_warshall(graph, file_path, next_hops)
+
+    return johnson(graph, file_path, next_hops, processes)
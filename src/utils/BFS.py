@@ -1,5 +1,9 @@
+from collections import deque
 from typing import Union
-from domain import Graph
+from domain import Graph, FrozenGraph
+from exceptions import VertexError
+from utils import Instrumentation
+from utils.Instrumentation import CountingGraph, record, phase
 # 2. Write a program that, given a directed graph and two vertices, finds the lowest length
 #    path between them, by using a backward breadth-first search from the ending vertex.
 
@@ -7,48 +11,196 @@ from domain import Graph
 def backwards_breadth_first_search(graph: Graph, starting_vertex: int, ending_vertex: int) -> list:
     """
     Breadth first search algorithm done backwards (from the ending vertex)
+
+    The search stops as soon as the starting vertex is reached and the visited
+    vertices are kept in a dictionary, so any vertex ids are supported
+    :param graph: a directed graph
+    :param starting_vertex: the starting vertex
+    :param ending_vertex: the ending vertex
+    :return: The path or None if it does not exist
+    """
+    if not graph.is_vertex(starting_vertex) or not graph.is_vertex(ending_vertex):
+        raise VertexError("ERROR: Invalid vertex.")
+
+    stats = Instrumentation.active_stats
+    if stats is not None:
+        graph = CountingGraph(graph, stats)
+
+    # Store the next vertex of each visited vertex so that the path can be reconstructed
+    path = {ending_vertex: None}
+    # Vertices whose inbound neighbours we need to parse
+    queue = deque([ending_vertex])
+
+    with phase("bfs.search"):
+        while queue and starting_vertex not in path:
+            vertex = queue.popleft()
+
+            for inbound in graph.transpose_iterator(vertex):
+                if inbound not in path:
+                    queue.append(inbound)
+                    path[inbound] = vertex
+
+                    if inbound == starting_vertex:
+                        break
+
+    # every visited vertex was pushed once
+    record(stats, queue_pushes=len(path), queue_pops=len(path) - len(queue))
+    if starting_vertex not in path:
+        return None
+
+    with phase("bfs.reconstruction"):
+        return reconstruct_path_bfs(path, starting_vertex, ending_vertex)
+
+
+def backwards_breadth_first_tree(graph: Graph, ending_vertex: int) -> dict:
+    """
+    Breadth first search done backwards from the ending vertex over the whole graph
+    :param graph: a directed graph
+    :param ending_vertex: the ending vertex
+    :return: the next vertex on a shortest path to the ending vertex for every vertex that can reach it
+             (None for the ending vertex itself)
+    """
+    if not graph.is_vertex(ending_vertex):
+        raise VertexError("ERROR: Invalid vertex.")
+
+    stats = Instrumentation.active_stats
+    if stats is not None:
+        graph = CountingGraph(graph, stats)
+
+    path = {ending_vertex: None}
+    queue = deque([ending_vertex])
+
+    with phase("bfs.search"):
+        while queue:
+            vertex = queue.popleft()
+
+            for inbound in graph.transpose_iterator(vertex):
+                if inbound not in path:
+                    queue.append(inbound)
+                    path[inbound] = vertex
+
+    record(stats, queue_pushes=len(path), queue_pops=len(path))
+    return path
+
+
+def bidirectional_breadth_first_search(graph: Graph, starting_vertex: int, ending_vertex: int) -> list:
+    """
+    Breadth first search from both ends at once: forward over the outbound neighbours of
+    the starting vertex and backward over the inbound neighbours of the ending vertex.
+    The side with the smaller frontier expands one full level at a time and the search
+    stops at the first level where the two sides meet
     :param graph: a directed graph
     :param starting_vertex: the starting vertex
     :param ending_vertex: the ending vertex
     :return: The path or None if it does not exist
     """
-    # Store the next vertex of each parsed vertex so that the path can be reconstructed
+    if not graph.is_vertex(starting_vertex) or not graph.is_vertex(ending_vertex):
+        raise VertexError("ERROR: Invalid vertex.")
+
+    if starting_vertex == ending_vertex:
+        return [starting_vertex]
+
+    # previous vertex and distance from the start, next vertex and distance to the end
+    forward = {starting_vertex: (None, 0)}
+    backward = {ending_vertex: (None, 0)}
+    forward_frontier = [starting_vertex]
+    backward_frontier = [ending_vertex]
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            visited, other, frontier, expand = forward, backward, forward_frontier, graph.neighbours_iterator
+        else:
+            visited, other, frontier, expand = backward, forward, backward_frontier, graph.transpose_iterator
+
+        next_frontier = []
+        meeting, best = None, None
+        for vertex in frontier:
+            depth = visited[vertex][1] + 1
+            for neighbour in expand(vertex):
+                if neighbour in visited:
+                    continue
+
+                visited[neighbour] = (vertex, depth)
+                next_frontier.append(neighbour)
+                if neighbour in other and (best is None or depth + other[neighbour][1] < best):
+                    meeting, best = neighbour, depth + other[neighbour][1]
+
+        if meeting is not None:
+            path = [meeting]
+            while forward[path[-1]][0] is not None:
+                path.append(forward[path[-1]][0])
+            path.reverse()
+
+            while backward[path[-1]][0] is not None:
+                path.append(backward[path[-1]][0])
+            return path
+
+        if visited is forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def backwards_breadth_first_search_frozen(graph: FrozenGraph, starting_vertex: int, ending_vertex: int) -> list:
+    """
+    Breadth first search algorithm done backwards (from the ending vertex)
+    over the inbound CSR arrays of a frozen graph
+    :param graph: a frozen directed graph
+    :param starting_vertex: the starting vertex
+    :param ending_vertex: the ending vertex
+    :return: The path or None if it does not exist
+    """
+    source = graph.position(starting_vertex)
+    target = graph.position(ending_vertex)
+    ids, offsets, targets = graph.ids, graph.transpose_offsets, graph.transpose_targets
+
     path = [-1] * graph.vertex_count()
-    # Only visit each vertex once
-    visited = [False] * graph.vertex_count()
-    # List of vertices whose inbound neighbours we need to parse
-    queue = [ending_vertex]
+    visited = bytearray(graph.vertex_count())
+    visited[target] = 1
+    queue = deque([target])
 
-    while queue:
-        vertex = queue.pop(0)
-        visited[vertex] = True
+    while queue and not visited[source]:
+        vertex = queue.popleft()
 
-        for inbound in graph.transpose_iterator(vertex):
+        for index in range(offsets[vertex], offsets[vertex + 1]):
+            inbound = targets[index]
             if not visited[inbound]:
                 queue.append(inbound)
-                visited[inbound] = True
+                visited[inbound] = 1
                 path[inbound] = vertex
 
-    return reconstruct_path_bfs(path, starting_vertex, ending_vertex)
+    stats = Instrumentation.active_stats
+    if stats is not None:
+        # every visited vertex was pushed once
+        pushes = sum(visited)
+        record(stats, queue_pushes=pushes, queue_pops=pushes - len(queue))
+    path = reconstruct_path_bfs(path, source, target)
+    return None if path is None else [ids[vertex] for vertex in path]
 
 
 def reconstruct_path_bfs(old_path: list, starting_vertex: int, ending_vertex: int) -> Union[list, None]:
     """
     Reconstructs the shortest path between two vertices in a directed graph
-    :param old_path: the list containing the path that needs to be reconstructed
+    :param old_path: the dictionary containing the next vertex of each visited vertex (None for the ending vertex),
+                     or the list containing the next position of each position (-1 if it was not visited)
     :param starting_vertex: the starting vertex
     :param ending_vertex: the ending vertex
     :return: The reconstructed path or None if it does not exist
     """
+    # the vertex ids may be negative, the positions may not
+    root = None if isinstance(old_path, dict) else -1
     path = [starting_vertex]
     destination = starting_vertex
     
     while destination != ending_vertex:
-        if destination == -1:
+        if destination == root:
             return None
 
         starting_vertex = destination
         destination = old_path[starting_vertex]
         path.append(destination)
 
+    record(Instrumentation.active_stats, reconstruction_steps=len(path))
     return path
@@ -0,0 +1,112 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from domain import Graph, FrozenGraph
+from exceptions import VertexError
+from utils.BFS import backwards_breadth_first_tree, reconstruct_path_bfs
+from utils.Ford import ford_single_source, reconstruct_path_ford
+from utils.Dijkstra import dijkstra_single_source
+# Many path queries answered at once: the pairs that share a root are answered by a single search.
+
+# the single source searches and whether their tree is rooted at the starting vertex
+SEARCHES = {
+    "bfs": (backwards_breadth_first_tree, False),
+    "ford": (ford_single_source, True),
+    "dijkstra": (dijkstra_single_source, True)
+}
+
+# the graph snapshot of a worker process, set once by initialize_worker
+worker_graph = None
+
+
+def initialize_worker(graph: FrozenGraph) -> None:
+    """
+    Stores the graph snapshot in a worker process of the pool
+    :param graph: the snapshot
+    """
+    global worker_graph
+    worker_graph = graph
+
+
+def answer_group(graph: Graph, algorithm: str, root: int, others: list) -> list:
+    """
+    Answers the queries that share a root with one single source search
+    :param graph: a directed graph, compact graph or frozen graph (the snapshot of the worker if None)
+    :param algorithm: "bfs", "ford" or "dijkstra"
+    :param root: the ending vertex for "bfs", the starting vertex otherwise
+    :param others: the other vertex of every query
+    :return: the (starting vertex, ending vertex, result) triples, in the order of others
+    """
+    if graph is None:
+        graph = worker_graph
+
+    search, from_start = SEARCHES[algorithm]
+    result = search(graph, root)
+
+    answers = []
+    if not from_start:
+        for vertex in others:
+            answers.append((vertex, root, reconstruct_path_bfs(result, vertex, root) if vertex in result else None))
+        return answers
+
+    dist, path = result
+    for vertex in others:
+        if dist is None:
+            answer = (None, None)
+        elif vertex not in dist:
+            answer = (float("Inf"), [vertex])
+        else:
+            answer = (dist[vertex], reconstruct_path_ford(path, vertex))
+        answers.append((root, vertex, answer))
+
+    return answers
+
+
+def batch_shortest_paths(graph: Graph, pairs, algorithm: str = "ford", processes: int = None) -> iter:
+    """
+    Answers many path queries, grouping them by starting vertex (by ending vertex for the backwards BFS)
+    so that every group needs a single search over the graph
+
+    The answers of a group are yielded as soon as its search is done. With processes, the groups are
+    spread over a process pool that shares a frozen snapshot of the graph, sent once to every worker.
+    :param graph: a directed graph
+    :param pairs: the (starting vertex, ending vertex) queries
+    :param algorithm: "bfs", "ford" or "dijkstra"
+    :param processes: the number of worker processes, or None to answer the queries in this process
+    :return: a generator of (starting vertex, ending vertex, result) triples, where the result is the
+             same as backwards_breadth_first_search for "bfs" and as ford_algorithm otherwise
+    """
+    if algorithm not in SEARCHES:
+        raise ValueError(f"ERROR: Unknown algorithm {algorithm}!")
+
+    from_start = SEARCHES[algorithm][1]
+    groups = dict()
+    for starting_vertex, ending_vertex in pairs:
+        if not graph.is_vertex(starting_vertex) or not graph.is_vertex(ending_vertex):
+            raise VertexError("ERROR: Invalid vertex.")
+
+        if from_start:
+            groups.setdefault(starting_vertex, []).append(ending_vertex)
+        else:
+            groups.setdefault(ending_vertex, []).append(starting_vertex)
+
+    return stream_groups(graph, algorithm, groups, processes)
+
+
+def stream_groups(graph: Graph, algorithm: str, groups: dict, processes: int) -> iter:
+    """
+    Yields the answers of the grouped queries (see batch_shortest_paths)
+    :param graph: a directed graph
+    :param algorithm: "bfs", "ford" or "dijkstra"
+    :param groups: the other vertices of the queries, by root
+    :param processes: the number of worker processes, or None
+    :return: a generator of (starting vertex, ending vertex, result) triples
+    """
+    if processes is None or len(groups) < 2:
+        for root, others in groups.items():
+            yield from answer_group(graph, algorithm, root, others)
+        return
+
+    snapshot = graph if isinstance(graph, FrozenGraph) else graph.freeze()
+    with ProcessPoolExecutor(processes, initializer=initialize_worker, initargs=(snapshot,)) as executor:
+        futures = [executor.submit(answer_group, None, algorithm, root, others) for root, others in groups.items()]
+        for future in as_completed(futures):
+            yield from future.result()
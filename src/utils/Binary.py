@@ -0,0 +1,149 @@
+import os
+import sys
+import mmap
+import struct
+import zlib
+from array import array
+from domain import FrozenGraph
+from utils.Utils import resource_path, read_file_bulk, write_file
+# Versioned binary graph format, loaded through mmap without copying the edge arrays.
+#
+# Layout (little-endian):
+# - header: magic, version, flags, vertex count, edge count
+# - section table: (offset, size, crc32) for every section, followed by the crc32 of the header and table
+# - sections, each 8-byte aligned: ids, offsets, targets, weights, transpose offsets,
+#   transpose targets, transpose weights and (optionally) the (activity, duration) pairs
+
+MAGIC = b"GRPH"
+VERSION = 1
+FLAG_DURATIONS = 1
+
+HEADER = struct.Struct("<4sHHqq")
+SECTION = struct.Struct("<qqI4x")
+TRAILER = struct.Struct("<I4x")
+SECTION_NAMES = ("ids", "offsets", "targets", "weights",
+                 "transpose_offsets", "transpose_targets", "transpose_weights", "durations")
+
+
+def write_binary_file(file_path: str, graph) -> None:
+    """
+    Writes a graph to a file in the binary format
+    :param file_path: the name of the file in the resources directory
+    :param graph: the graph or a frozen snapshot of it
+    """
+    if graph.vertex_count() == 0:
+        raise ValueError("ERROR: The graph is empty!")
+
+    frozen = graph if isinstance(graph, FrozenGraph) else graph.freeze()
+    durations = array("q")
+    for activity, duration in sorted(frozen.durations.items()):
+        durations.extend((activity, duration))
+
+    sections = [frozen.ids, frozen.offsets, frozen.targets, frozen.weights,
+                frozen.transpose_offsets, frozen.transpose_targets, frozen.transpose_weights, durations]
+    sections = [memoryview(section).cast("B") for section in sections]
+    if sys.byteorder != "little":
+        sections = [memoryview(swap_byte_order(section)).cast("B") for section in sections]
+
+    # compute where every section starts
+    position = HEADER.size + SECTION.size * len(sections) + TRAILER.size
+    table = []
+    for section in sections:
+        position += -position % 8
+        table.append((position, section.nbytes, zlib.crc32(section)))
+        position += section.nbytes
+
+    header = HEADER.pack(MAGIC, VERSION, FLAG_DURATIONS if len(durations) > 0 else 0,
+                         frozen.vertex_count(), frozen.edge_count())
+    header += b"".join(SECTION.pack(*entry) for entry in table)
+    header += TRAILER.pack(zlib.crc32(header))
+
+    with open(resource_path(file_path), "wb") as file:
+        file.write(header)
+        for (offset, _, _), section in zip(table, sections):
+            file.write(b"\0" * (offset - file.tell()))
+            file.write(section)
+
+
+def read_binary_file(file_path: str, verify: bool = True) -> FrozenGraph:
+    """
+    Maps a graph file in the binary format into memory. The edge arrays are views
+    of the mapped pages, so several processes loading the same file share the page cache
+    :param file_path: the name of the file in the resources directory
+    :param verify: check the section checksums (this reads the whole file)
+    :return: a frozen graph backed by the file
+    """
+    file_path = resource_path(file_path)
+    if os.stat(file_path).st_size < HEADER.size:
+        raise FileNotFoundError("ERROR: The file is empty or does not exist!")
+
+    with open(file_path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, flags, vertex_count, edge_count = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("ERROR: The file is not a binary graph file!")
+    if version != VERSION:
+        raise ValueError(f"ERROR: Unsupported binary graph version {version}!")
+
+    table_end = HEADER.size + SECTION.size * len(SECTION_NAMES)
+    if len(buffer) < table_end + TRAILER.size:
+        raise ValueError("ERROR: The file is truncated!")
+    if TRAILER.unpack_from(buffer, table_end)[0] != zlib.crc32(buffer[:table_end]):
+        raise ValueError("ERROR: The file header is corrupted!")
+
+    view = memoryview(buffer)
+    sections = []
+    for index in range(len(SECTION_NAMES)):
+        offset, size, checksum = SECTION.unpack_from(buffer, HEADER.size + SECTION.size * index)
+        if offset + size > len(buffer):
+            raise ValueError("ERROR: The file is truncated!")
+
+        section = view[offset:offset + size]
+        if verify and zlib.crc32(section) != checksum:
+            raise ValueError(f"ERROR: The {SECTION_NAMES[index]} section is corrupted!")
+
+        if sys.byteorder != "little":
+            section = memoryview(swap_byte_order(section))
+        sections.append(section.cast("q"))
+
+    ids, offsets, targets, weights, transpose_offsets, transpose_targets, transpose_weights, durations = sections
+    if len(ids) != vertex_count or len(targets) != edge_count or len(transpose_targets) != edge_count:
+        raise ValueError("ERROR: The section sizes do not match the header!")
+
+    if flags & FLAG_DURATIONS:
+        durations = {durations[index]: durations[index + 1] for index in range(0, len(durations), 2)}
+    else:
+        durations = None
+
+    return FrozenGraph(ids, offsets, targets, weights,
+                       transpose_offsets, transpose_targets, transpose_weights, durations)
+
+
+def swap_byte_order(section: memoryview) -> array:
+    """
+    Copies a section of 64-bit integers and swaps its byte order (only used on big-endian machines)
+    :param section: the raw bytes of the section
+    :return: the swapped copy
+    """
+    values = array("q", section.tobytes())
+    values.byteswap()
+    return values
+
+
+def convert_text_to_binary(text_path: str, binary_path: str) -> None:
+    """
+    Converts a graph file from the text format to the binary format
+    :param text_path: the name of the text file in the resources directory
+    :param binary_path: the name of the binary file in the resources directory
+    """
+    write_binary_file(binary_path, read_file_bulk(text_path))
+
+
+def convert_binary_to_text(binary_path: str, text_path: str) -> None:
+    """
+    Converts a graph file from the binary format to the text format
+    :param binary_path: the name of the binary file in the resources directory
+    :param text_path: the name of the text file in the resources directory
+    """
+    write_file(text_path, read_binary_file(binary_path))
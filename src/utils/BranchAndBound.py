@@ -0,0 +1,447 @@
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from domain import Graph
+from exceptions import VertexError
+from utils.TSP import cost_matrix
+from utils.LocalSearch import LocalSearch
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+# Exact TSP on directed graphs with branch and bound: the assignment problem relaxation gives the lower bounds,
+# the subtours of its solution are broken by branching, and the subtrees are searched in parallel.
+
+# the largest graph handed to branch and bound by the menu
+BRANCH_AND_BOUND_LIMIT = 80
+# seconds of local search spent on the starting tour
+SEED_TIME = 0.2
+# number of subtrees handed out to every worker process
+TASKS_PER_PROCESS = 8
+
+# the cost of the best tour known to every worker process, set once by initialize_worker
+worker_bound = None
+
+
+def initialize_worker(bound) -> None:
+    """
+    Stores the shared best tour cost in a worker process of the pool
+    :param bound: a multiprocessing Value holding the cost
+    """
+    global worker_bound
+    worker_bound = bound
+
+
+def augment(matrix, u, v, p, row: int) -> bool:
+    """
+    Assigns one more row with a shortest augmenting path of the Hungarian algorithm, keeping the duals feasible
+    :param matrix: the n x n costs (np.inf where an edge cannot be used)
+    :param u: the row duals, 1-indexed (n + 1 values)
+    :param v: the column duals, 1-indexed (n + 1 values)
+    :param p: the row assigned to every column, 1-indexed (0 if none)
+    :param row: the row to assign, 1-indexed
+    :return: False if the row cannot be assigned
+    """
+    size = len(matrix)
+    minimum = np.full(size + 1, np.inf)
+    way = np.zeros(size + 1, dtype=np.int64)
+    used = np.zeros(size + 1, dtype=bool)
+    p[0] = row
+    column = 0
+
+    while True:
+        used[column] = True
+        reduced = matrix[p[column] - 1] - u[p[column]] - v[1:]
+        better = ~used[1:] & (reduced < minimum[1:])
+        minimum[1:][better] = reduced[better]
+        way[1:][better] = column
+
+        free = np.flatnonzero(~used)
+        column = free[np.argmin(minimum[free])]
+        delta = minimum[column]
+        if delta == np.inf:
+            return False
+
+        u[p[used]] += delta
+        v[used] -= delta
+        minimum[~used] -= delta
+        if p[column] == 0:
+            break
+
+    while column:
+        previous = way[column]
+        p[column] = p[previous]
+        column = previous
+
+    return True
+
+
+def subtours(successors) -> list:
+    """
+    Splits an assignment into its cycles
+    :param successors: the column assigned to every row
+    :return: the cycles, as lists of rows
+    """
+    seen = np.zeros(len(successors), dtype=bool)
+    cycles = []
+    for first in range(len(successors)):
+        if seen[first]:
+            continue
+
+        cycle = []
+        row = first
+        while not seen[row]:
+            seen[row] = True
+            cycle.append(row)
+            row = successors[row]
+        cycles.append(cycle)
+
+    return cycles
+
+
+def expand(node: tuple, bound: float) -> tuple:
+    """
+    Branches on the shortest subtour of the assignment of a node (Carpaneto and Toth): with its free edges
+    e1, e2, .., ek, the child r excludes er and keeps e1, .., e(r-1). Every child is solved with a single
+    augmentation from the duals of the parent.
+
+    Before branching, the edges whose reduced cost alone would reach the bound are removed from the node.
+    :param node: the (lower bound, costs, row duals, column duals, assignment, fixed rows) of the node
+    :param bound: the cost of the best tour known
+    :return: the children with a lower bound under the bound, cheapest first, and the successor of every
+             vertex if the assignment of the node is a tour (None otherwise)
+    """
+    lower_bound, matrix, u, v, p, fixed = node
+    size = len(matrix)
+    successors = np.empty(size, dtype=np.int64)
+    successors[p[1:] - 1] = np.arange(size)
+
+    cycles = subtours(successors)
+    if len(cycles) == 1:
+        return [], successors
+
+    if bound != np.inf:
+        matrix = matrix.copy()
+        matrix[matrix - u[1:, None] - v[None, 1:] >= bound - lower_bound] = np.inf
+
+    cycle = min(cycles, key=lambda rows: np.count_nonzero(~fixed[rows]))
+    children = []
+    kept = []
+    for row in cycle:
+        column = successors[row]
+        if fixed[row]:
+            continue
+
+        child = matrix.copy()
+        child_fixed = fixed.copy()
+        for kept_row, kept_column in kept:
+            cost = child[kept_row, kept_column]
+            child[kept_row] = np.inf
+            child[:, kept_column] = np.inf
+            child[kept_row, kept_column] = cost
+            child_fixed[kept_row] = True
+        child[row, column] = np.inf
+
+        child_u, child_v, child_p = u.copy(), v.copy(), p.copy()
+        child_p[column + 1] = 0
+        if augment(child, child_u, child_v, child_p, row + 1):
+            child_bound = child[child_p[1:] - 1, np.arange(size)].sum()
+            if child_bound < bound:
+                children.append((child_bound, child, child_u, child_v, child_p, child_fixed))
+
+        kept.append((row, column))
+
+    children.sort(key=lambda child: child[0])
+    return children, None
+
+
+def search_subtree(node: tuple, deadline: float = None, bound=None) -> tuple:
+    """
+    Searches a subtree depth first, cheapest child first
+    :param node: the root of the subtree
+    :param deadline: the time.time() at which the search stops, or None
+    :param bound: the shared best tour cost (the one of the worker if None)
+    :return: the cost and the successors of the best tour found in the subtree (Inf and None if none is better
+             than the bound), the number of nodes expanded and the lower bound of the unexplored part of the
+             subtree (Inf if it was searched completely)
+    """
+    bound = worker_bound if bound is None else bound
+    best_cost, best = np.inf, None
+    nodes = 0
+    stack = [node]
+
+    while stack:
+        if deadline is not None and time.time() >= deadline:
+            return best_cost, best, nodes, min(node[0] for node in stack)
+
+        node = stack.pop()
+        if node[0] >= bound.value:
+            continue
+
+        nodes += 1
+        children, successors = expand(node, bound.value)
+        if successors is not None:
+            with bound.get_lock():
+                bound.value = min(bound.value, node[0])
+            if node[0] < best_cost:
+                best_cost, best = node[0], successors
+            continue
+
+        stack.extend(reversed(children))
+
+    return best_cost, best, nodes, np.inf
+
+
+class BranchAndBound:
+    """
+    The minimum cost Hamiltonian cycle of a directed graph, proved optimal by branch and bound.
+
+    The lower bound of a node is the cheapest assignment (every vertex gets one successor) among the edges it
+    allows, solved with the Hungarian algorithm. The starting tour comes from a short local search, the edges
+    whose reduced cost exceeds the gap to the best tour are removed, and the nodes that cannot beat the best
+    tour are pruned. The first levels are expanded breadth first, then the subtrees are searched depth first,
+    optionally in worker processes that share the cost of the best tour.
+    """
+
+    def __init__(self, graph: Graph, start: int = None) -> None:
+        """
+        Creates a BranchAndBound instance
+        :param graph: a weighted directed graph
+        :param start: the vertex the cycle starts and ends at (the smallest vertex by default)
+        """
+        ids, matrix = cost_matrix(graph)
+        if len(ids) == 0:
+            raise ValueError("ERROR: The graph is empty!")
+
+        start = ids[0] if start is None else start
+        if not graph.is_vertex(start):
+            raise VertexError("ERROR: Invalid vertex.")
+
+        if len(ids) > 1:
+            np.fill_diagonal(matrix, np.inf)
+
+        self.__graph = graph
+        self.__ids = ids
+        self.__start = start
+        self.__matrix = matrix
+        self.__cost = np.inf
+        self.__successors = None
+        self.__lower_bound = -float("Inf")
+        self.__optimal = False
+        self.__nodes = 0
+        self.__elapsed = 0.0
+        self.__progress = []
+
+    @property
+    def cost(self):
+        """
+        :return: the cost of the best tour found, or Inf if none was found
+        """
+        return float("Inf") if self.__cost == np.inf else int(self.__cost)
+
+    @property
+    def tour(self):
+        """
+        :return: the best tour found as a cycle starting and ending with the starting vertex, or None
+        """
+        if self.__successors is None:
+            return None
+
+        first = self.__ids.index(self.__start)
+        cycle = [self.__start]
+        position = self.__successors[first]
+        while position != first:
+            cycle.append(self.__ids[position])
+            position = self.__successors[position]
+        cycle.append(self.__start)
+
+        return cycle
+
+    @property
+    def lower_bound(self):
+        """
+        :return: the proved lower bound of the cost of every Hamiltonian cycle (Inf if there is none)
+        """
+        return self.__lower_bound if abs(self.__lower_bound) == np.inf else int(self.__lower_bound)
+
+    @property
+    def gap(self) -> float:
+        """
+        :return: the relative difference between the best tour and the lower bound (0 once proved optimal)
+        """
+        if self.__cost == np.inf or self.__lower_bound == -np.inf:
+            return float("Inf")
+
+        return float(self.__cost - self.__lower_bound) / max(1.0, abs(float(self.__cost)))
+
+    def is_optimal(self) -> bool:
+        """
+        :return: True if the best tour is proved optimal (or the graph proved to have no Hamiltonian cycle)
+        """
+        return self.__optimal
+
+    @property
+    def nodes(self) -> int:
+        """
+        :return: the number of nodes of the search tree expanded
+        """
+        return self.__nodes
+
+    @property
+    def nodes_per_second(self) -> float:
+        """
+        :return: the number of nodes expanded per second of solving
+        """
+        return self.__nodes / self.__elapsed if self.__elapsed else 0.0
+
+    @property
+    def progress(self) -> list:
+        """
+        :return: the (seconds, nodes expanded, best tour cost, lower bound) at the start of the search and
+                 every time a subtree is finished
+        """
+        return self.__progress
+
+    def solve(self, processes: int = None, time_limit: float = None, seed_time: float = SEED_TIME) -> bool:
+        """
+        Searches for the optimal tour
+        :param processes: the number of worker processes, or None to search in this process
+        :param time_limit: the wall-clock budget in seconds, or None for no limit
+        :param seed_time: the seconds of local search spent on the starting tour
+        :return: True if the best tour is proved optimal
+        """
+        started = time.time()
+        deadline = None if time_limit is None else started + time_limit
+        bound = multiprocessing.Value("d", self.__cost)
+
+        self.__seed(seed_time)
+        bound.value = self.__cost
+
+        size = len(self.__matrix)
+        u, v, p = np.zeros(size + 1), np.zeros(size + 1), np.zeros(size + 1, dtype=np.int64)
+        for row in range(1, size + 1):
+            if not augment(self.__matrix, u, v, p, row):
+                # not even every vertex can get a successor
+                self.__optimal = True
+                self.__finish(started)
+                return True
+
+        root = (self.__matrix[p[1:] - 1, np.arange(size)].sum(), self.__matrix, u, v, p, np.zeros(size, dtype=bool))
+        self.__lower_bound = float(root[0])
+
+        # breadth first until there are enough subtrees to share
+        frontier = [root]
+        target = TASKS_PER_PROCESS * (processes or 1)
+        while frontier and len(frontier) < target:
+            if deadline is not None and time.time() >= deadline:
+                break
+
+            node = min(frontier, key=lambda node: node[0])
+            frontier.remove(node)
+            if node[0] >= bound.value:
+                continue
+
+            self.__nodes += 1
+            children, successors = expand(node, bound.value)
+            if successors is not None:
+                self.__improve(node[0], successors, bound)
+            frontier.extend(children)
+
+        frontier = [node for node in frontier if node[0] < bound.value]
+        frontier.sort(key=lambda node: node[0])
+        self.__record(started, [node[0] for node in frontier])
+
+        pending = {index: node[0] for index, node in enumerate(frontier)}
+        remaining = []
+        if deadline is not None and time.time() >= deadline:
+            # the time ran out before the split, so every subtree is left unexplored
+            remaining = list(pending.values())
+        elif processes is None:
+            for index, node in enumerate(frontier):
+                self.__collect(search_subtree(node, deadline, bound), bound, remaining)
+                del pending[index]
+                self.__record(started, list(pending.values()) + remaining)
+        else:
+            with ProcessPoolExecutor(processes, initializer=initialize_worker, initargs=(bound,)) as executor:
+                futures = {executor.submit(search_subtree, node, deadline): index
+                           for index, node in enumerate(frontier)}
+                for future in as_completed(futures):
+                    self.__collect(future.result(), bound, remaining)
+                    del pending[futures[future]]
+                    self.__record(started, list(pending.values()) + remaining)
+
+        self.__optimal = not remaining
+        self.__finish(started)
+        return self.__optimal
+
+    def __seed(self, seed_time: float) -> None:
+        """
+        Takes the local search tour as the best tour, if it is better
+        """
+        if seed_time is None or len(self.__ids) < 2:
+            return
+
+        search = LocalSearch(self.__graph, self.__start)
+        search.improve(seed_time)
+        cycle = search.tour
+        if cycle is None or search.cost >= self.__cost:
+            return
+
+        position = {vertex: index for index, vertex in enumerate(self.__ids)}
+        successors = np.empty(len(self.__ids), dtype=np.int64)
+        for index in range(len(cycle) - 1):
+            successors[position[cycle[index]]] = position[cycle[index + 1]]
+        self.__cost, self.__successors = search.cost, successors
+
+    def __improve(self, cost, successors, bound) -> None:
+        """
+        Keeps a tour if it is the best one
+        """
+        if cost < self.__cost:
+            self.__cost, self.__successors = cost, successors
+        with bound.get_lock():
+            bound.value = min(bound.value, cost)
+
+    def __collect(self, result: tuple, bound, remaining: list) -> None:
+        """
+        Takes in the result of search_subtree
+        """
+        cost, successors, nodes, unexplored = result
+        self.__nodes += nodes
+        if successors is not None:
+            self.__improve(cost, successors, bound)
+        if unexplored != np.inf:
+            remaining.append(unexplored)
+
+    def __record(self, started: float, open_bounds: list) -> None:
+        """
+        Updates the lower bound from the bounds of the open subtrees and records the progress
+        """
+        open_bounds = [value for value in open_bounds if value < self.__cost]
+        self.__lower_bound = float(min(open_bounds, default=self.__cost))
+        self.__progress.append((time.time() - started, self.__nodes, self.cost, self.lower_bound))
+
+    def __finish(self, started: float) -> None:
+        """
+        Records the end of the search
+        """
+        if self.__optimal:
+            self.__lower_bound = float(self.__cost)
+        self.__elapsed += time.time() - started
+        self.__progress.append((time.time() - started, self.__nodes, self.cost, self.lower_bound))
+
+
+def branch_and_bound_tsp(graph: Graph, start: int = None, processes: int = None, time_limit: float = None) -> tuple:
+    """
+    Computes the minimum cost Hamiltonian cycle exactly with branch and bound (see BranchAndBound)
+    :param graph: a weighted directed graph
+    :param start: the vertex the cycle starts and ends at (the smallest vertex by default)
+    :param processes: the number of worker processes, or None to search in this process
+    :param time_limit: the wall-clock budget in seconds, or None for no limit
+    :return: the cost and the cycle (starting and ending with the starting vertex), or Inf and None if the graph
+             has no Hamiltonian cycle; with a time limit, the best cycle found
+    """
+    solver = BranchAndBound(graph, start)
+    solver.solve(processes, time_limit)
+    return solver.cost, solver.tour
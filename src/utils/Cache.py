@@ -0,0 +1,212 @@
+from collections import OrderedDict
+from sys import getsizeof
+from domain import Graph, Change
+from domain.ChangeLog import ADD_VERTEX, REMOVE_VERTEX, ADD_EDGE, REMOVE_EDGE, SET_EDGE_COST
+from exceptions import VertexError
+from utils.BFS import backwards_breadth_first_tree, reconstruct_path_bfs
+from utils.Ford import ford_single_source, reconstruct_path_ford
+from utils.Dijkstra import dijkstra_single_source
+from utils.Instrumentation import phase
+
+# the algorithms known by the cache and the vertex their results are rooted at
+ALGORITHMS = {"bfs": "ending", "ford": "starting", "dijkstra": "starting"}
+
+
+class ShortestPathCache:
+    """
+    A query layer that keeps complete shortest path trees of a graph.
+
+    One run of ford_single_source or dijkstra_single_source yields the distances from a vertex to every other
+    vertex, and one backwards breadth first search yields the shortest paths from every vertex to the ending
+    vertex, so repeated queries from the same source (or to the same target, for the BFS) only walk the path.
+    The trees are evicted in least recently used order once they exceed the memory budget. When the version of
+    the graph changes, the trees are all dropped, unless the graph has a change log: then only the trees that
+    one of the logged changes can affect are dropped (edge cost changes, for example, never affect a BFS tree).
+    """
+
+    def __init__(self, graph: Graph, memory_budget: int = 64 << 20) -> None:
+        """
+        Creates a ShortestPathCache instance
+        :param graph: the graph
+        :param memory_budget: the approximate number of bytes the cached trees may use
+        """
+        self.__graph = graph
+        self.__memory_budget = memory_budget
+        self.__entries = OrderedDict()
+        self.__memory = 0
+        self.__version = graph.version
+        self.__sequence = graph.change_log.sequence if graph.change_log is not None else None
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def graph(self) -> Graph:
+        """
+        :return: the graph whose paths are cached
+        """
+        return self.__graph
+
+    @property
+    def memory(self) -> int:
+        """
+        :return: the approximate number of bytes used by the cached trees
+        """
+        return self.__memory
+
+    @property
+    def hits(self) -> int:
+        """
+        :return: the number of queries answered from the cache
+        """
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        """
+        :return: the number of queries that computed a new tree
+        """
+        return self.__misses
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def clear(self) -> None:
+        """
+        Drops every cached tree.
+        """
+        self.__entries.clear()
+        self.__memory = 0
+
+    def synchronize(self) -> None:
+        """
+        Drops the trees made stale by the modifications of the graph since the last query.
+        """
+        change_log = self.__graph.change_log
+        try:
+            if change_log is None or self.__sequence is None:
+                raise LookupError("ERROR: No change log to replay.")
+            changes = change_log.changes_since(self.__sequence)
+        except LookupError:
+            self.clear()
+        else:
+            for key in [key for key, (result, _) in self.__entries.items()
+                        if any(ShortestPathCache.is_affected(key[0], result, change) for change in changes)]:
+                self.__memory -= self.__entries.pop(key)[1]
+
+        self.__version = self.__graph.version
+        self.__sequence = change_log.sequence if change_log is not None else None
+
+    @staticmethod
+    def is_affected(algorithm: str, result, change: Change) -> bool:
+        """
+        Checks if a modification of the graph can change a cached tree
+        :param algorithm: the algorithm that computed the tree
+        :param result: the cached tree
+        :param change: the modification
+        :return: True if the tree must be recomputed, False if it is still exact
+        """
+        if change.kind == ADD_VERTEX:
+            return False
+
+        if algorithm == "bfs":
+            path = result
+            if change.kind == SET_EDGE_COST:
+                return False
+            if change.kind == ADD_EDGE:
+                return change.vertex2 in path
+            if change.kind == REMOVE_EDGE:
+                return path.get(change.vertex1) == change.vertex2
+            return change.vertex1 in path
+
+        dist, path = result
+        if dist is None:
+            # the negative cost cycle may have been broken
+            return True
+
+        if change.kind == REMOVE_VERTEX:
+            return change.vertex1 in dist
+
+        on_tree = change.vertex1 in dist and path.get(change.vertex2) == change.vertex1
+        if change.kind == REMOVE_EDGE or (change.kind == SET_EDGE_COST and change.new_cost > change.old_cost):
+            return on_tree
+
+        # a new or cheaper edge matters if it improves the distance of its endpoint
+        return change.vertex1 in dist and \
+            (change.vertex2 not in dist or dist[change.vertex1] + change.new_cost < dist[change.vertex2])
+
+    def tree(self, algorithm: str, root: int):
+        """
+        Returns the complete result of an algorithm rooted at a vertex, computing it if it is not cached
+        :param algorithm: "bfs", "ford" or "dijkstra"
+        :param root: the ending vertex for "bfs", the starting vertex otherwise
+        :return: the next vertex dictionary for "bfs", the distance and parent dictionaries otherwise
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"ERROR: Unknown algorithm {algorithm}!")
+
+        if self.__graph.version != self.__version:
+            self.synchronize()
+
+        key = (algorithm, root)
+        if key in self.__entries:
+            self.__hits += 1
+            self.__entries.move_to_end(key)
+            return self.__entries[key][0]
+
+        self.__misses += 1
+        if algorithm == "bfs":
+            result = backwards_breadth_first_tree(self.__graph, root)
+            size = ShortestPathCache.estimate_size(result)
+        else:
+            compute = ford_single_source if algorithm == "ford" else dijkstra_single_source
+            result = compute(self.__graph, root)
+            size = sum(ShortestPathCache.estimate_size(part) for part in result if part is not None)
+
+        self.__entries[key] = (result, size)
+        self.__memory += size
+
+        # evict the least recently used trees, but always keep the one just computed
+        while self.__memory > self.__memory_budget and len(self.__entries) > 1:
+            _, (_, evicted_size) = self.__entries.popitem(last=False)
+            self.__memory -= evicted_size
+
+        return result
+
+    def query(self, algorithm: str, starting_vertex: int, ending_vertex: int):
+        """
+        Answers a path query from the cached trees
+        :param algorithm: "bfs", "ford" or "dijkstra"
+        :param starting_vertex: the starting vertex
+        :param ending_vertex: the ending vertex
+        :return: the same result as backwards_breadth_first_search for "bfs"
+                 and as ford_algorithm or dijkstra_algorithm otherwise
+        """
+        if not self.__graph.is_vertex(starting_vertex) or not self.__graph.is_vertex(ending_vertex):
+            raise VertexError("ERROR: Invalid vertex.")
+
+        if algorithm == "bfs":
+            path = self.tree(algorithm, ending_vertex)
+            if starting_vertex not in path:
+                return None
+            with phase("bfs.reconstruction"):
+                return reconstruct_path_bfs(path, starting_vertex, ending_vertex)
+
+        dist, path = self.tree(algorithm, starting_vertex)
+        if dist is None:
+            return None, None
+
+        if ending_vertex not in dist:
+            return float("Inf"), [ending_vertex]
+
+        with phase(f"{algorithm}.reconstruction"):
+            return dist[ending_vertex], reconstruct_path_ford(path, ending_vertex)
+
+    @staticmethod
+    def estimate_size(dictionary: dict) -> int:
+        """
+        Estimates the memory used by a dictionary of integers
+        :param dictionary: the dictionary
+        :return: the approximate number of bytes
+        """
+        # the hash table plus one integer object for every value
+        return getsizeof(dictionary) + 32 * len(dictionary)
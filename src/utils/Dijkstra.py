@@ -0,0 +1,202 @@
+from heapq import heappush, heappop
+from weakref import WeakKeyDictionary
+from domain import Graph, FrozenGraph
+from exceptions import VertexError
+from utils import Instrumentation
+from utils.Ford import ford_algorithm
+from utils.Instrumentation import CountingGraph, record, phase
+# Dijkstra's algorithm for graphs with non-negative costs, with a pluggable priority queue,
+# and a dispatcher that falls back to the Bellman-Ford algorithm when negative costs exist.
+
+# the largest edge cost for which shortest_path uses the radix heap
+RADIX_COST_LIMIT = 1 << 16
+
+# the result of cost_summary for the graphs still alive, with the version of the graph it was computed at
+cost_summary_memo = WeakKeyDictionary()
+
+
+class BinaryHeap:
+    """
+    A binary heap of (key, item) pairs. Decreasing a key is done by pushing the item again
+    (lazy deletion): the stale entries are skipped by the caller when they are popped.
+    """
+
+    def __init__(self) -> None:
+        self.__heap = []
+
+    def push(self, key: int, item: int) -> None:
+        heappush(self.__heap, (key, item))
+
+    def pop(self) -> tuple:
+        return heappop(self.__heap)
+
+    def __len__(self) -> int:
+        return len(self.__heap)
+
+
+class RadixHeap:
+    """
+    A monotone radix heap of (key, item) pairs with non-negative integer keys below 2 ** 64.
+
+    Keys are grouped into buckets by the highest bit in which they differ from the last popped key,
+    so every entry is moved at most once per bit. It requires that no key smaller than the last
+    popped one is pushed, which holds for Dijkstra's algorithm with non-negative integer costs,
+    and is fastest when the costs are small integers.
+    """
+
+    def __init__(self) -> None:
+        self.__buckets = [[] for _ in range(65)]
+        self.__last = 0
+        self.__size = 0
+
+    def push(self, key: int, item: int) -> None:
+        if key < self.__last:
+            raise ValueError("ERROR: The radix heap only accepts keys that are not smaller than the last popped key.")
+
+        self.__buckets[(key ^ self.__last).bit_length()].append((key, item))
+        self.__size += 1
+
+    def pop(self) -> tuple:
+        buckets = self.__buckets
+        if not buckets[0]:
+            # find the first non-empty bucket and redistribute it around its minimum
+            index = 1
+            while not buckets[index]:
+                index += 1
+
+            entries = buckets[index]
+            buckets[index] = []
+            last = min(entries)[0]
+            self.__last = last
+            for entry in entries:
+                buckets[(entry[0] ^ last).bit_length()].append(entry)
+
+        self.__size -= 1
+        return buckets[0].pop()
+
+    def __len__(self) -> int:
+        return self.__size
+
+
+def cost_summary(graph: Graph) -> tuple:
+    """
+    Scans the edge costs of a graph
+    The answer is kept until the version of the graph changes, so repeated queries do not scan every edge
+    :param graph: a directed graph, compact graph or frozen graph
+    :return: whether a cost is negative, and whether every cost is an integer from 0 to RADIX_COST_LIMIT
+    """
+    version, negative, small = cost_summary_memo.get(graph, (None, None, None))
+    if version == graph.version:
+        return negative, small
+
+    if isinstance(graph, FrozenGraph):
+        costs, integers = graph.weights, True
+    else:
+        costs = graph.costs.values()
+        integers = all(type(cost) is int for cost in costs)
+    negative = min(costs, default=0) < 0
+    small = integers and not negative and max(costs, default=0) <= RADIX_COST_LIMIT
+    cost_summary_memo[graph] = (graph.version, negative, small)
+    return negative, small
+
+
+def has_negative_costs(graph: Graph) -> bool:
+    """
+    Checks if any edge of the graph has a negative cost (see cost_summary)
+    :param graph: a directed graph, compact graph or frozen graph
+    :return: True if a negative cost exists, False otherwise
+    """
+    return cost_summary(graph)[0]
+
+
+def dijkstra_single_source(graph: Graph, starting_vertex: int, ending_vertex: int = None,
+                           queue: type = BinaryHeap) -> tuple:
+    """
+    Computes the cheapest distances from a vertex using Dijkstra's algorithm. The costs must not be negative
+
+    Complexity: O((V + E) log V) with the binary heap
+    Where V is the number of vertices and E is the number of edges
+    :param graph: a directed graph
+    :param starting_vertex: the starting vertex
+    :param ending_vertex: if given, the search stops as soon as this vertex is settled
+    :param queue: the priority queue class (BinaryHeap or RadixHeap)
+    :return: the distance and the parent of every reached vertex (the parent of the starting vertex is None)
+    """
+    if not graph.is_vertex(starting_vertex):
+        raise VertexError("ERROR: Invalid vertex.")
+
+    stats = Instrumentation.active_stats
+    if stats is not None:
+        graph = CountingGraph(graph, stats)
+
+    dist = {starting_vertex: 0}
+    path = {starting_vertex: None}
+    relaxations = 0
+
+    heap = queue()
+    heap.push(0, starting_vertex)
+    with phase("dijkstra.search"):
+        while heap:
+            distance, vertex = heap.pop()
+            # skip the stale entries left behind by the lazy deletion
+            if distance > dist[vertex]:
+                continue
+
+            if vertex == ending_vertex:
+                break
+
+            for neighbour, cost in graph.neighbour_costs_iterator(vertex):
+                new_distance = distance + cost
+                if neighbour not in dist or new_distance < dist[neighbour]:
+                    dist[neighbour] = new_distance
+                    path[neighbour] = vertex
+                    heap.push(new_distance, neighbour)
+                    relaxations += 1
+
+    # every relaxation pushes the vertex again
+    record(stats, relaxations=relaxations, queue_pushes=relaxations + 1, queue_pops=relaxations + 1 - len(heap))
+    return dist, path
+
+
+def dijkstra_algorithm(graph: Graph, starting_vertex: int, ending_vertex: int, queue: type = BinaryHeap) -> tuple:
+    """
+    Finds the cheapest path between two vertices using Dijkstra's algorithm, stopping
+    as soon as the ending vertex is settled. The costs must not be negative
+    :param graph: a directed graph
+    :param starting_vertex: the starting vertex
+    :param ending_vertex: the ending vertex
+    :param queue: the priority queue class (BinaryHeap or RadixHeap)
+    :return: The cost and the path, in the same form as ford_algorithm
+    """
+    if not graph.is_vertex(ending_vertex):
+        raise VertexError("ERROR: Invalid vertex.")
+
+    dist, path = dijkstra_single_source(graph, starting_vertex, ending_vertex, queue)
+    if ending_vertex not in dist:
+        return float("Inf"), [ending_vertex]
+
+    with phase("dijkstra.reconstruction"):
+        result = [ending_vertex]
+        while path[result[-1]] is not None:
+            result.append(path[result[-1]])
+        result.reverse()
+
+    record(Instrumentation.active_stats, reconstruction_steps=len(result))
+    return dist[ending_vertex], result
+
+
+def shortest_path(graph: Graph, starting_vertex: int, ending_vertex: int) -> tuple:
+    """
+    Finds the cheapest path between two vertices, using Dijkstra's algorithm when no edge has
+    a negative cost and the Bellman-Ford algorithm otherwise. Dijkstra's algorithm uses the radix heap
+    when every cost is a small integer, and the binary heap otherwise
+    :param graph: a directed graph
+    :param starting_vertex: the starting vertex
+    :param ending_vertex: the ending vertex
+    :return: The cost and the path or None if there are negative cost cycles
+    """
+    negative, small = cost_summary(graph)
+    if negative:
+        return ford_algorithm(graph, starting_vertex, ending_vertex)
+
+    return dijkstra_algorithm(graph, starting_vertex, ending_vertex, RadixHeap if small else BinaryHeap)
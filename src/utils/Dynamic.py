@@ -0,0 +1,234 @@
+from collections import deque
+from domain import Graph
+from domain.ChangeLog import REMOVE_VERTEX, ADD_EDGE, REMOVE_EDGE, SET_EDGE_COST
+from exceptions import VertexError
+from utils.Ford import ford_single_source, reconstruct_path_ford
+# Dynamic single source shortest paths: the shortest path tree from a fixed vertex
+# is repaired after the graph changes instead of being computed again.
+
+
+class DynamicShortestPaths:
+    """
+    The cheapest distances and the shortest path tree from a fixed starting vertex, kept up to date
+    with the modifications of the graph in the style of Ramalingam and Reps.
+
+    The modifications are read from the change log of the graph, which is enabled if needed. When an edge
+    of the tree gets more expensive or is removed, only the subtree below it is affected: its distances are
+    dropped and computed again from the vertices outside of it. When an edge gets cheaper or is added, the
+    improvement is propagated from its start point. The repair falls back to a full run of
+    ford_single_source when the affected region grows beyond a fraction of the vertices, when the change log
+    no longer holds the changes, or when the graph has a negative cost cycle reachable from the starting vertex.
+    """
+
+    def __init__(self, graph: Graph, starting_vertex: int, threshold: float = 0.1) -> None:
+        """
+        Creates a DynamicShortestPaths instance
+        :param graph: the graph
+        :param starting_vertex: the starting vertex
+        :param threshold: the fraction of the vertices the repair may touch before falling back to a full run
+        """
+        if not graph.is_vertex(starting_vertex):
+            raise VertexError("ERROR: Invalid vertex.")
+
+        self.__graph = graph
+        self.__source = starting_vertex
+        self.__threshold = threshold
+        self.__change_log = graph.change_log if graph.change_log is not None else graph.enable_change_log()
+        self.__repairs = 0
+        self.__recomputes = 0
+        self.recompute()
+
+    @property
+    def graph(self) -> Graph:
+        """
+        :return: the graph
+        """
+        return self.__graph
+
+    @property
+    def starting_vertex(self) -> int:
+        """
+        :return: the starting vertex
+        """
+        return self.__source
+
+    @property
+    def repairs(self) -> int:
+        """
+        :return: the number of updates done by repairing the tree
+        """
+        return self.__repairs
+
+    @property
+    def recomputes(self) -> int:
+        """
+        :return: the number of updates (and the initial run) done by computing the tree again
+        """
+        return self.__recomputes
+
+    def recompute(self) -> None:
+        """
+        Computes the whole tree again.
+        """
+        self.__sequence = self.__change_log.sequence
+        self.__recomputes += 1
+        self.__dist, self.__path = ford_single_source(self.__graph, self.__source)
+
+        self.__children = dict()
+        if self.__dist is not None:
+            for vertex, parent in self.__path.items():
+                if parent is not None:
+                    self.__children.setdefault(parent, set()).add(vertex)
+
+    def update(self) -> None:
+        """
+        Applies the modifications of the graph made since the last update.
+        """
+        if self.__change_log is not self.__graph.change_log:
+            raise ValueError("ERROR: The change log of the graph was disabled!")
+
+        if self.__change_log.sequence == self.__sequence:
+            return
+
+        if not self.__graph.is_vertex(self.__source):
+            raise VertexError("ERROR: The starting vertex was removed.")
+
+        try:
+            changes = self.__change_log.changes_since(self.__sequence)
+        except LookupError:
+            self.recompute()
+            return
+
+        if self.__dist is None or not self.__repair(changes):
+            self.recompute()
+            return
+
+        self.__sequence = self.__change_log.sequence
+        self.__repairs += 1
+
+    def tree(self) -> tuple:
+        """
+        Returns the up to date result, in the same form as ford_single_source
+        :return: the distance and the parent of every reached vertex
+                 or None, None if there are negative cost cycles reachable from the starting vertex
+        """
+        self.update()
+        return self.__dist, self.__path
+
+    def query(self, ending_vertex: int) -> tuple:
+        """
+        Finds the cheapest path from the starting vertex to a vertex
+        :param ending_vertex: the ending vertex
+        :return: the same result as ford_algorithm
+        """
+        if not self.__graph.is_vertex(ending_vertex):
+            raise VertexError("ERROR: Invalid vertex.")
+
+        dist, path = self.tree()
+        if dist is None:
+            return None, None
+
+        if ending_vertex not in dist:
+            return float("Inf"), [ending_vertex]
+
+        return dist[ending_vertex], reconstruct_path_ford(path, ending_vertex)
+
+    def __repair(self, changes: list) -> bool:
+        """
+        Repairs the tree after a list of changes
+        :param changes: the changes, oldest first
+        :return: True if the tree was repaired, False if the affected region is too large
+        """
+        graph, dist, path, children = self.__graph, self.__dist, self.__path, self.__children
+        limit = max(1, int(self.__threshold * graph.vertex_count()))
+
+        # the roots of the subtrees that lost their distances and the vertices whose edges got cheaper
+        roots = []
+        starts = []
+        for change in changes:
+            if change.kind == REMOVE_VERTEX:
+                roots.append(change.vertex1)
+            elif change.kind == REMOVE_EDGE or (change.kind == SET_EDGE_COST and change.new_cost > change.old_cost):
+                if path.get(change.vertex2) == change.vertex1:
+                    roots.append(change.vertex2)
+            elif change.kind == ADD_EDGE or change.kind == SET_EDGE_COST:
+                starts.append(change.vertex1)
+
+        affected = set()
+        for root in roots:
+            if root not in dist or root in affected:
+                continue
+
+            stack = [root]
+            affected.add(root)
+            while stack:
+                for child in children.get(stack.pop(), ()):
+                    if child not in affected:
+                        affected.add(child)
+                        stack.append(child)
+
+            if len(affected) > limit:
+                return False
+
+        for vertex in affected:
+            parent = path[vertex]
+            if parent not in affected and parent in children:
+                children[parent].discard(vertex)
+            del dist[vertex]
+            del path[vertex]
+            children.pop(vertex, None)
+
+        # every affected vertex first gets the cheapest edge coming from outside of the subtrees
+        queue = deque()
+        for vertex in affected:
+            if not graph.is_vertex(vertex):
+                continue
+
+            for parent in graph.transpose_iterator(vertex):
+                if parent in dist and parent not in affected:
+                    distance = dist[parent] + graph.get_edge_cost(parent, vertex)
+                    if vertex not in dist or distance < dist[vertex]:
+                        dist[vertex] = distance
+                        path[vertex] = parent
+
+            if vertex in dist:
+                children.setdefault(path[vertex], set()).add(vertex)
+                queue.append(vertex)
+
+        queued = set(queue)
+        for vertex in starts:
+            if vertex in dist and vertex not in queued:
+                queued.add(vertex)
+                queue.append(vertex)
+
+        # then the improvements are propagated as in ford_single_source; a negative
+        # cost cycle makes the propagation run past the limit
+        relaxations = 0
+        while queue:
+            vertex = queue.popleft()
+            queued.remove(vertex)
+            distance = dist[vertex]
+
+            for neighbour, cost in graph.neighbour_costs_iterator(vertex):
+                new_distance = distance + cost
+                if neighbour in dist and new_distance >= dist[neighbour]:
+                    continue
+
+                relaxations += 1
+                if relaxations > limit or neighbour == self.__source:
+                    return False
+
+                if neighbour in path:
+                    children[path[neighbour]].discard(neighbour)
+                dist[neighbour] = new_distance
+                path[neighbour] = vertex
+                children.setdefault(vertex, set()).add(neighbour)
+
+                if neighbour not in queued:
+                    queued.add(neighbour)
+                    if queue and new_distance < dist[queue[0]]:
+                        queue.appendleft(neighbour)
+                    else:
+                        queue.append(neighbour)
+
+        return True
@@ -1,10 +1,115 @@
-from domain import Graph
+from collections import deque
+from domain import Graph, FrozenGraph
+from exceptions import VertexError
+from utils import Instrumentation
+from utils.Instrumentation import CountingGraph, record, phase
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 # 3. Write a program that, given a graph with costs and two vertices,
 #    finds the lowest cost walk between the given vertices, or prints a message
 #    if there are negative cost cycles accessible from the starting vertex.
 # The program will use the Ford's algorithm.
 
 
+def ford_single_source(graph: Graph, starting_vertex: int) -> tuple:
+    """
+    Computes the cheapest distances from a vertex using the queue-based Bellman–Ford algorithm (SPFA)
+
+    Only the vertices whose distance changed are queued, so the search stops as soon as
+    the distances converge and never leaves the part of the graph reachable from the
+    starting vertex. A vertex whose distance drops below the one at the front of the queue
+    is put at the front (small label first).
+
+    Negative cost cycles are found by looking for a cycle in the parent pointers, which is
+    checked after every V relaxations; as a guarantee, a parent chain of V edges also means a cycle.
+
+    Complexity: O(V x E) in the worst case, usually close to O(E)
+    Where V is the number of vertices and E is the number of edges
+    :param graph: a directed graph
+    :param starting_vertex: the starting vertex
+    :return: the distance and the parent of every reached vertex (the parent of the starting vertex is None)
+             or None, None if there are negative cost cycles reachable from the starting vertex
+    """
+    if not graph.is_vertex(starting_vertex):
+        raise VertexError("ERROR: Invalid vertex.")
+
+    stats = Instrumentation.active_stats
+    if stats is not None:
+        graph = CountingGraph(graph, stats)
+
+    vertex_count = graph.vertex_count()
+    dist = {starting_vertex: 0}
+    path = {starting_vertex: None}
+    # number of edges on the current parent chain of every vertex
+    length = {starting_vertex: 0}
+
+    queue = deque([starting_vertex])
+    queued = {starting_vertex}
+    relaxations = 0
+    pushes = 1
+
+    with phase("ford.search"):
+        while queue:
+            vertex = queue.popleft()
+            queued.remove(vertex)
+            distance = dist[vertex]
+
+            for neighbour, cost in graph.neighbour_costs_iterator(vertex):
+                new_distance = distance + cost
+                if neighbour in dist and new_distance >= dist[neighbour]:
+                    continue
+
+                dist[neighbour] = new_distance
+                path[neighbour] = vertex
+                length[neighbour] = length[vertex] + 1
+                if length[neighbour] >= vertex_count:
+                    record(stats, relaxations=relaxations + 1, queue_pushes=pushes, queue_pops=pushes - len(queue))
+                    return None, None
+
+                relaxations += 1
+                if relaxations % vertex_count == 0 and has_parent_cycle(path):
+                    record(stats, relaxations=relaxations, queue_pushes=pushes, queue_pops=pushes - len(queue))
+                    return None, None
+
+                if neighbour not in queued:
+                    pushes += 1
+                    queued.add(neighbour)
+                    if queue and new_distance < dist[queue[0]]:
+                        queue.appendleft(neighbour)
+                    else:
+                        queue.append(neighbour)
+
+    record(stats, relaxations=relaxations, queue_pushes=pushes, queue_pops=pushes)
+    return dist, path
+
+
+def has_parent_cycle(path: dict) -> bool:
+    """
+    Checks if the parent pointers of a shortest path search contain a cycle
+    :param path: the parent of every reached vertex (None for the root)
+    :return: True if there is a cycle, False otherwise
+    """
+    # vertices finished by an earlier walk are marked with False, the ones on the current walk with True
+    on_walk = dict()
+    for vertex in path:
+        walk = []
+        while vertex is not None and vertex not in on_walk:
+            on_walk[vertex] = True
+            walk.append(vertex)
+            vertex = path[vertex]
+
+        if vertex is not None and on_walk[vertex]:
+            return True
+
+        for visited in walk:
+            on_walk[visited] = False
+
+    return False
+
+
 def ford_algorithm(graph: Graph, starting_vertex: int, ending_vertex: int) -> tuple:
     """
     Finds the cheapest path between two vertices using the Bellman–Ford algorithm
@@ -12,46 +117,204 @@ def ford_algorithm(graph: Graph, starting_vertex: int, ending_vertex: int) -> tu
     The Bellman-Ford algorithm is slower than Dijkstra's algorithm, but it is more
     versatile because it can detect and report negative cost cycles
 
-    Complexity: O(V x E)
+    Complexity: O(V x E) in the worst case (see ford_single_source)
     Where V is the number of vertices and E is the number of edges
     :param graph: a directed graph
     :param starting_vertex: the starting vertex
     :param ending_vertex: the ending vertex
     :return: The cost and the path or None if there are negative cost cycles
     """
-    # Step 1: Initialize distances from starting_vertex to all other vertices as INFINITE
-    path = [-1] * graph.vertex_count()
-    dist = [float("Inf")] * graph.vertex_count()
-    dist[starting_vertex] = 0
+    if not graph.is_vertex(ending_vertex):
+        raise VertexError("ERROR: Invalid vertex.")
+
+    dist, path = ford_single_source(graph, starting_vertex)
+    if dist is None:
+        return None, None
+
+    if ending_vertex not in dist:
+        return float("Inf"), [ending_vertex]
+
+    with phase("ford.reconstruction"):
+        return dist[ending_vertex], reconstruct_path_ford(path, ending_vertex)
+
+
+def ford_algorithm_frozen(graph: FrozenGraph, starting_vertex: int, ending_vertex: int) -> tuple:
+    """
+    Finds the cheapest path between two vertices using the Bellman–Ford algorithm
+    over the CSR arrays of a frozen graph
+
+    The relaxation passes stop early once a full pass changes no distance.
+
+    Complexity: O(V x E)
+    Where V is the number of vertices and E is the number of edges
+    :param graph: a frozen directed graph
+    :param starting_vertex: the starting vertex
+    :param ending_vertex: the ending vertex
+    :return: The cost and the path or None if there are negative cost cycles
+    """
+    source = graph.position(starting_vertex)
+    target = graph.position(ending_vertex)
+    ids, offsets, targets, weights = graph.ids, graph.offsets, graph.targets, graph.weights
+    vertex_count = graph.vertex_count()
+    infinity = float("Inf")
+
+    path = [-1] * vertex_count
+    dist = [infinity] * vertex_count
+    dist[source] = 0
+
+    # Relax the outbound rows of every reached vertex until nothing changes
+    passes = 0
+    for passes in range(1, vertex_count):
+        changed = False
+        for s in range(vertex_count):
+            distance = dist[s]
+            if distance == infinity:
+                continue
+
+            for index in range(offsets[s], offsets[s + 1]):
+                d = targets[index]
+                if distance + weights[index] < dist[d]:
+                    dist[d] = distance + weights[index]
+                    path[d] = s
+                    changed = True
+
+        if not changed:
+            break
+    else:
+        # one more pass: any improvement means a negative cost cycle
+        for s in range(vertex_count):
+            distance = dist[s]
+            if distance == infinity:
+                continue
+
+            for index in range(offsets[s], offsets[s + 1]):
+                if distance + weights[index] < dist[targets[index]]:
+                    record(Instrumentation.active_stats, passes=passes + 1)
+                    return None, None
+
+    record(Instrumentation.active_stats, passes=passes)
+    return dist[target], [ids[vertex] for vertex in reconstruct_path_ford(path, target)]
+
+
+def edge_arrays(graph: Graph) -> tuple:
+    """
+    Exports the edges of a graph once into NumPy arrays, with the vertices referred to by their position
+    :param graph: a directed graph, compact graph or frozen graph
+    :return: the vertex ids in ascending order and the source, target and cost arrays of the edges
+    """
+    if np is None:
+        raise ImportError("ERROR: NumPy is required for the vectorized algorithms!")
+
+    if isinstance(graph, FrozenGraph):
+        ids = np.frombuffer(graph.ids, dtype=np.int64)
+        offsets = np.frombuffer(graph.offsets, dtype=np.int64)
+        sources = np.repeat(np.arange(len(ids), dtype=np.int64), np.diff(offsets))
+        return ids, sources, np.frombuffer(graph.targets, dtype=np.int64), np.frombuffer(graph.weights, dtype=np.int64)
+
+    ids = np.array(sorted(graph.vertices_iterator()), dtype=np.int64)
+    edges = np.array(list(graph.edges_iterator()), dtype=np.int64).reshape(-1, 3)
+    return ids, np.searchsorted(ids, edges[:, 0]), np.searchsorted(ids, edges[:, 1]), edges[:, 2].copy()
+
+
+def ford_algorithm_vectorized(graph: Graph, starting_vertex: int, ending_vertex: int, arrays: tuple = None) -> tuple:
+    """
+    Finds the cheapest path between two vertices using the Bellman–Ford algorithm,
+    with every relaxation pass done by NumPy over the edge arrays
+
+    A pass gathers the distances of the sources of the edges whose source improved in the previous pass,
+    keeps the smallest candidate of every target with np.minimum.at and records the parents of the
+    improved targets. The passes stop as soon as nothing improves; after V - 1 passes, one more
+    vectorized check over all the edges finds the negative cost cycles.
+
+    Complexity: O(V x E) in the worst case, in vectorized operations
+    Where V is the number of vertices and E is the number of edges
+    :param graph: a directed graph, compact graph or frozen graph
+    :param starting_vertex: the starting vertex
+    :param ending_vertex: the ending vertex
+    :param arrays: the result of edge_arrays, to reuse it for many queries on an unchanged graph
+    :return: The same result as ford_algorithm (the path may differ when several paths have the same cost)
+    """
+    if not graph.is_vertex(starting_vertex) or not graph.is_vertex(ending_vertex):
+        raise VertexError("ERROR: Invalid vertex.")
+
+    ids, sources, targets, costs = edge_arrays(graph) if arrays is None else arrays
+    vertex_count = len(ids)
+    source = int(np.searchsorted(ids, starting_vertex))
+    target = int(np.searchsorted(ids, ending_vertex))
 
-    # Step 2: Relax all edges V-1 times. A simple shortest path
-    # from src to any other vertex can have at-most V-1 edges
-    for _ in range(graph.vertex_count() - 1):
-        # Update dist value and parent index of the adjacent vertices of the
-        # picked vertex. Consider only those vertices which are still in queue
-        for s, d, c in graph.edges_iterator():
-            if dist[s] != float("Inf") and dist[s] + c < dist[d]:
-                dist[d] = dist[s] + c
-                path[d] = s
+    # the costs are integers, so the distances are exact in floating point up to 2 ** 53
+    dist = np.full(vertex_count, np.inf)
+    dist[source] = 0
+    path = np.full(vertex_count, -1, dtype=np.int64)
+    if not relax_edge_arrays(sources, targets, costs, dist, path):
+        return None, None
 
-    # Step 3: check for negative-weight cycles. The above step guarantees
-    # the shortest distances if graph doesn't contain negative weight
-    # cycle. If we get a shorter path, then there is a cycle.
-    for s, d, c in graph.edges_iterator():
-        if dist[s] != float("Inf") and dist[s] + c < dist[d]:
-            return None, None
+    if dist[target] == np.inf:
+        return float("Inf"), [ending_vertex]
 
-    return dist[ending_vertex], reconstruct_path_ford(path, ending_vertex)
+    return int(dist[target]), ids[reconstruct_path_ford(path, target)].tolist()
+
+
+def relax_edge_arrays(sources, targets, costs, dist, path=None, passes: int = None) -> bool:
+    """
+    Runs the vectorized relaxation passes of the Bellman–Ford algorithm in place (see ford_algorithm_vectorized)
+    :param sources: the positions of the sources of the edges
+    :param targets: the positions of the targets of the edges
+    :param costs: the costs of the edges
+    :param dist: the initial distances (np.inf where unknown), updated in place
+    :param path: the parent of every vertex (-1 for none), updated in place, or None to skip the parents
+    :param passes: the number of passes after which an improvement means a negative cost cycle (V - 1 by default)
+    :return: True, or False if there are negative cost cycles reachable from the vertices with a known distance
+    """
+    passes = len(dist) - 1 if passes is None else passes
+    weights = costs.astype(np.float64)
+    active = dist < np.inf
+    stats = Instrumentation.active_stats
+
+    for _ in range(passes):
+        edges = np.flatnonzero(active[sources])
+        if edges.size == 0:
+            return True
+
+        if stats is not None:
+            stats.count(passes=1, edges_scanned=int(edges.size))
+
+        edge_targets = targets[edges]
+        candidates = dist[sources[edges]] + weights[edges]
+        new_dist = dist.copy()
+        np.minimum.at(new_dist, edge_targets, candidates)
+
+        active = new_dist < dist
+        if path is not None:
+            improved = active[edge_targets] & (candidates == new_dist[edge_targets])
+            path[edge_targets[improved]] = sources[edges][improved]
+        dist[:] = new_dist
+
+    # the check can only fail if the last pass still improved a distance
+    if not np.any(active):
+        return True
+
+    record(stats, passes=1, edges_scanned=len(sources))
+    return not np.any(dist[sources] + weights < dist[targets])
 
 
 def reconstruct_path_ford(old_path: list, current_vertex: int) -> list:
     """
     Reconstructs the cheapest path between two vertices in a directed graph
-    :param old_path: the list containing the path that needs to be reconstructed
+
+    The parent pointers are followed in a loop, so paths longer than the recursion limit are supported
+    :param old_path: the dictionary containing the parent of each visited vertex (None for the root),
+                     or the list or array containing the parent of each visited position (-1 for the root)
     :param current_vertex: the current vertex
     :return: The reconstructed path or None if it does not exist
     """
-    if current_vertex < 0:
-        return []
+    # the vertex ids may be negative, the positions may not
+    root = None if isinstance(old_path, dict) else -1
+    path = []
+    while current_vertex != root:
+        path.append(current_vertex)
+        current_vertex = old_path[current_vertex]
 
-    return reconstruct_path_ford(old_path, old_path[current_vertex]) + [current_vertex]
+    path.reverse()
+    record(Instrumentation.active_stats, reconstruction_steps=len(path))
+    return path
@@ -0,0 +1,253 @@
+from math import log, floor
+from random import Random
+from typing import Callable
+from domain import Graph
+# Seeded random graph generators. Edges are sampled without replacement and inserted
+# in bulk, so generation time only depends on the number of edges that are produced.
+#
+# Edge costs come from a cost distribution: a function that receives the random number
+# generator and a count and returns that many costs.
+
+
+def uniform_costs(low: int = 0, high: int = 1000) -> Callable:
+    """
+    Returns a cost distribution drawing integers uniformly from [low, high)
+    :param low: the lowest cost (may be negative)
+    :param high: the upper bound, excluded
+    :return: the cost distribution
+    """
+    if low >= high:
+        raise ValueError("ERROR: The cost range is empty!")
+
+    def distribution(rng: Random, count: int) -> list:
+        randrange = rng.randrange
+        return [randrange(low, high) for _ in range(count)]
+
+    return distribution
+
+
+def normal_costs(mean: float, deviation: float, low: int = None, high: int = None) -> Callable:
+    """
+    Returns a cost distribution drawing rounded normally distributed integers, optionally clamped
+    :param mean: the mean of the distribution
+    :param deviation: the standard deviation of the distribution
+    :param low: the lowest allowed cost
+    :param high: the highest allowed cost
+    :return: the cost distribution
+    """
+    def distribution(rng: Random, count: int) -> list:
+        costs = [round(rng.gauss(mean, deviation)) for _ in range(count)]
+        if low is not None:
+            costs = [max(cost, low) for cost in costs]
+        if high is not None:
+            costs = [min(cost, high) for cost in costs]
+        return costs
+
+    return distribution
+
+
+def constant_costs(value: int = 1) -> Callable:
+    """
+    Returns a cost distribution where every edge has the same cost
+    :param value: the cost
+    :return: the cost distribution
+    """
+    return lambda rng, count: [value] * count
+
+
+def build_graph(vertex_count: int, vertices1: list, vertices2: list, rng: Random, costs: Callable) -> Graph:
+    """
+    Creates a graph with vertices 0..vertex_count-1 from lists of distinct edges
+    :param vertex_count: the number of vertices
+    :param vertices1: the start points of the edges
+    :param vertices2: the endpoints of the edges
+    :param rng: the random number generator
+    :param costs: the cost distribution
+    :return: the graph
+    """
+    graph = Graph(vertex_count)
+    graph.add_edges_unchecked(vertices1, vertices2, costs(rng, len(vertices1)))
+    return graph
+
+
+def decode_edges(indices: list, vertex_count: int, self_loops: bool) -> tuple:
+    """
+    Maps edge indices from [0, vertex_count * (vertex_count - 1)) (or vertex_count ** 2 with self-loops)
+    to the start points and endpoints of the edges
+    :param indices: the edge indices
+    :param vertex_count: the number of vertices
+    :param self_loops: whether self-loops are part of the index space
+    :return: the start points and the endpoints
+    """
+    if self_loops:
+        return [index // vertex_count for index in indices], [index % vertex_count for index in indices]
+
+    vertices1 = [index // (vertex_count - 1) for index in indices]
+    vertices2 = [index % (vertex_count - 1) for index in indices]
+    # skip the diagonal: targets at or after the source are shifted by one
+    vertices2 = [target + (target >= source) for source, target in zip(vertices1, vertices2)]
+    return vertices1, vertices2
+
+
+def gnm_random_graph(vertex_count: int, edge_count: int, seed: int = None,
+                     costs: Callable = None, self_loops: bool = False) -> Graph:
+    """
+    Creates a graph with exactly edge_count edges chosen uniformly among all possible edges (the G(n, m) model).
+    Works at any density, including the complete graph
+    :param vertex_count: the number of vertices
+    :param edge_count: the number of edges
+    :param seed: the seed of the random number generator
+    :param costs: the cost distribution, uniform over [0, 1000) by default
+    :param self_loops: allow edges from a vertex to itself
+    :return: the graph
+    """
+    rng = Random(seed)
+    costs = costs or uniform_costs()
+    possible_edges = vertex_count * vertex_count if self_loops else vertex_count * (vertex_count - 1)
+    if edge_count < 0 or edge_count > possible_edges:
+        raise ValueError(f"ERROR: The maximum edge count is {possible_edges}.")
+
+    # random.sample over a range picks distinct indices without building the range
+    vertices1, vertices2 = decode_edges(rng.sample(range(possible_edges), edge_count), vertex_count, self_loops)
+    return build_graph(vertex_count, vertices1, vertices2, rng, costs)
+
+
+def gnp_random_graph(vertex_count: int, probability: float, seed: int = None,
+                     costs: Callable = None, self_loops: bool = False) -> Graph:
+    """
+    Creates a graph where every possible edge exists independently with the given probability (the G(n, p) model).
+    The gaps between chosen edges are drawn from a geometric distribution, so the running time is
+    proportional to the number of edges rather than to vertex_count ** 2
+    :param vertex_count: the number of vertices
+    :param probability: the probability of each edge
+    :param seed: the seed of the random number generator
+    :param costs: the cost distribution, uniform over [0, 1000) by default
+    :param self_loops: allow edges from a vertex to itself
+    :return: the graph
+    """
+    if not 0 <= probability <= 1:
+        raise ValueError("ERROR: The probability must be between 0 and 1.")
+
+    rng = Random(seed)
+    costs = costs or uniform_costs()
+    possible_edges = vertex_count * vertex_count if self_loops else vertex_count * (vertex_count - 1)
+
+    if probability == 1:
+        indices = range(possible_edges)
+    elif probability == 0:
+        indices = []
+    else:
+        indices = []
+        log_q = log(1.0 - probability)
+        random = rng.random
+        index = -1
+        while True:
+            index += 1 + floor(log(1.0 - random()) / log_q)
+            if index >= possible_edges:
+                break
+            indices.append(index)
+
+    vertices1, vertices2 = decode_edges(indices, vertex_count, self_loops)
+    return build_graph(vertex_count, vertices1, vertices2, rng, costs)
+
+
+def power_law_graph(vertex_count: int, edges_per_vertex: int, seed: int = None, costs: Callable = None) -> Graph:
+    """
+    Creates a graph with a power-law in-degree distribution by preferential attachment:
+    every new vertex links to edges_per_vertex distinct older vertices, chosen with
+    probability proportional to their in-degree plus one
+    :param vertex_count: the number of vertices
+    :param edges_per_vertex: the out-degree of every vertex after the first edges_per_vertex ones
+    :param seed: the seed of the random number generator
+    :param costs: the cost distribution, uniform over [0, 1000) by default
+    :return: the graph
+    """
+    if edges_per_vertex < 1 or edges_per_vertex >= vertex_count:
+        raise ValueError("ERROR: The edges per vertex must be between 1 and the vertex count - 1.")
+
+    rng = Random(seed)
+    costs = costs or uniform_costs()
+    randrange = rng.randrange
+
+    # every vertex appears once, plus once more for every inbound edge
+    repeated = list(range(edges_per_vertex))
+    vertices1 = []
+    vertices2 = []
+    for vertex in range(edges_per_vertex, vertex_count):
+        targets = set()
+        while len(targets) < edges_per_vertex:
+            targets.add(repeated[randrange(len(repeated))])
+
+        for target in targets:
+            vertices1.append(vertex)
+            vertices2.append(target)
+        repeated.extend(targets)
+        repeated.append(vertex)
+
+    return build_graph(vertex_count, vertices1, vertices2, rng, costs)
+
+
+def grid_graph(rows: int, columns: int, seed: int = None, costs: Callable = None, bidirectional: bool = True) -> Graph:
+    """
+    Creates a rows x columns grid where vertex r * columns + c is linked to its right and lower neighbours
+    :param rows: the number of rows
+    :param columns: the number of columns
+    :param seed: the seed of the random number generator
+    :param costs: the cost distribution, uniform over [0, 1000) by default
+    :param bidirectional: also add the left and upper edges
+    :return: the graph
+    """
+    rng = Random(seed)
+    costs = costs or uniform_costs()
+
+    vertices1 = []
+    vertices2 = []
+    for row in range(rows):
+        for column in range(columns):
+            vertex = row * columns + column
+            if column + 1 < columns:
+                vertices1.append(vertex)
+                vertices2.append(vertex + 1)
+            if row + 1 < rows:
+                vertices1.append(vertex)
+                vertices2.append(vertex + columns)
+
+    if bidirectional:
+        vertices1, vertices2 = vertices1 + vertices2, vertices2 + vertices1
+
+    return build_graph(rows * columns, vertices1, vertices2, rng, costs)
+
+
+def layered_dag(layers: int, width: int, edges_per_vertex: int, seed: int = None,
+                costs: Callable = None, durations: Callable = None) -> Graph:
+    """
+    Creates a layered DAG: every vertex in a layer links to edges_per_vertex distinct vertices of the next layer.
+    With a duration distribution the result is an activity graph usable by dag and compute_times
+    :param layers: the number of layers
+    :param width: the number of vertices in each layer
+    :param edges_per_vertex: the out-degree of every vertex outside the last layer
+    :param seed: the seed of the random number generator
+    :param costs: the cost distribution, uniform over [0, 1000) by default
+    :param durations: the distribution of the activity durations, none by default
+    :return: the graph
+    """
+    if edges_per_vertex < 0 or edges_per_vertex > width:
+        raise ValueError("ERROR: The edges per vertex must be between 0 and the layer width.")
+
+    rng = Random(seed)
+    costs = costs or uniform_costs()
+
+    vertices1 = []
+    vertices2 = []
+    for layer in range(layers - 1):
+        next_layer = (layer + 1) * width
+        for vertex in range(layer * width, next_layer):
+            for target in rng.sample(range(width), edges_per_vertex):
+                vertices1.append(vertex)
+                vertices2.append(next_layer + target)
+
+    graph = build_graph(layers * width, vertices1, vertices2, rng, costs)
+    if durations is not None:
+        graph.durations.update(zip(range(layers * width), durations(rng, layers * width)))
+
+    return graph
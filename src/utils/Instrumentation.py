@@ -0,0 +1,215 @@
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from domain import Graph
+# Counters and phase timings of the search algorithms, to tell where the time of a slow query goes.
+#
+# The algorithms read active_stats once per call. When it is None (the default) they run exactly their usual
+# loops: the graph is not wrapped, and the counts that are kept are either already needed by the algorithm or
+# derived from its data structures when it returns, so there is no extra branch per edge or per vertex.
+# When it is set, the graph is wrapped in a CountingGraph that counts the edges scanned.
+
+# set to 1 to collect the statistics of the whole run in active_stats
+ENVIRONMENT_VARIABLE = "GRAPH_ALGORITHMS_STATS"
+# the counters of AlgorithmStats
+COUNTERS = ("edges_scanned", "relaxations", "queue_pushes", "queue_pops", "passes", "reconstruction_steps")
+
+
+class AlgorithmStats:
+    """
+    The counters of the algorithm hot loops and the seconds spent in every phase.
+    """
+
+    def __init__(self) -> None:
+        """
+        Creates an AlgorithmStats instance with every counter at zero
+        """
+        self.__counters = dict.fromkeys(COUNTERS, 0)
+        self.__timings = dict()
+        self.__calls = dict()
+
+    @property
+    def counters(self) -> dict:
+        """
+        :return: the value of every counter
+        """
+        return self.__counters
+
+    @property
+    def timings(self) -> dict:
+        """
+        :return: the total seconds of every phase
+        """
+        return self.__timings
+
+    @property
+    def calls(self) -> dict:
+        """
+        :return: the number of times every phase ran
+        """
+        return self.__calls
+
+    def count(self, **counts) -> None:
+        """
+        Adds to the counters
+        :param counts: the amount to add to every counter
+        """
+        for name, value in counts.items():
+            self.__counters[name] += value
+
+    def add_time(self, phase_name: str, seconds: float) -> None:
+        """
+        Adds the duration of a run of a phase
+        :param phase_name: the phase
+        :param seconds: the duration
+        """
+        self.__timings[phase_name] = self.__timings.get(phase_name, 0.0) + seconds
+        self.__calls[phase_name] = self.__calls.get(phase_name, 0) + 1
+
+    def reset(self) -> None:
+        """
+        Sets every counter back to zero and forgets the timings
+        """
+        self.__counters = dict.fromkeys(COUNTERS, 0)
+        self.__timings.clear()
+        self.__calls.clear()
+
+    def to_dict(self) -> dict:
+        """
+        :return: the counters and the phases as plain dictionaries, ready to be dumped as JSON
+        """
+        phases = {name: {"seconds": seconds, "calls": self.__calls[name]} for name, seconds in self.__timings.items()}
+        return {"counters": dict(self.__counters), "phases": phases}
+
+    def __str__(self) -> str:
+        lines = [f"{name}: {value}" for name, value in self.__counters.items()]
+        for name, seconds in self.__timings.items():
+            lines.append(f"{name}: {seconds * 1e3:.3f} ms in {self.__calls[name]} calls")
+        return "\n".join(lines)
+
+
+class CountingGraph:
+    """
+    A view of a graph that counts the edges scanned through its iterators; everything else is forwarded.
+    The count of an iterator is added when it is exhausted or closed (also when a loop over it breaks).
+    """
+
+    def __init__(self, graph: Graph, stats: AlgorithmStats) -> None:
+        """
+        Creates a CountingGraph instance
+        :param graph: the graph
+        :param stats: the statistics that receive the counts
+        """
+        self.__graph = graph
+        self.__stats = stats
+
+    def __getattr__(self, name: str):
+        return getattr(self.__graph, name)
+
+    def neighbours_iterator(self, vertex: int) -> iter:
+        """
+        Returns an iterator to the outbound neighbours of a vertex.
+        """
+        scanned = 0
+        try:
+            for neighbour in self.__graph.neighbours_iterator(vertex):
+                scanned += 1
+                yield neighbour
+        finally:
+            self.__stats.count(edges_scanned=scanned)
+
+    def neighbour_costs_iterator(self, vertex: int) -> iter:
+        """
+        Returns an iterator to the (outbound neighbour, edge cost) pairs of a vertex.
+        """
+        scanned = 0
+        try:
+            for pair in self.__graph.neighbour_costs_iterator(vertex):
+                scanned += 1
+                yield pair
+        finally:
+            self.__stats.count(edges_scanned=scanned)
+
+    def transpose_iterator(self, vertex: int) -> iter:
+        """
+        Returns an iterator to the inbound neighbours of a vertex.
+        """
+        scanned = 0
+        try:
+            for inbound in self.__graph.transpose_iterator(vertex):
+                scanned += 1
+                yield inbound
+        finally:
+            self.__stats.count(edges_scanned=scanned)
+
+
+# the statistics being collected, or None when the instrumentation is off
+active_stats = AlgorithmStats() if os.environ.get(ENVIRONMENT_VARIABLE, "0") not in ("", "0") else None
+
+
+def enable_stats(stats: AlgorithmStats = None) -> AlgorithmStats:
+    """
+    Turns the instrumentation on until disable_stats is called
+    :param stats: the statistics that receive the counts, a new instance by default
+    :return: the statistics
+    """
+    global active_stats
+    active_stats = AlgorithmStats() if stats is None else stats
+    return active_stats
+
+
+def disable_stats() -> None:
+    """
+    Turns the instrumentation off
+    """
+    global active_stats
+    active_stats = None
+
+
+@contextmanager
+def instrument(stats: AlgorithmStats = None):
+    """
+    Collects the statistics of the algorithms run inside the with block
+    :param stats: the statistics that receive the counts, a new instance by default
+    :return: a context manager giving the statistics
+    """
+    global active_stats
+    stats = AlgorithmStats() if stats is None else stats
+    previous, active_stats = active_stats, stats
+    try:
+        yield stats
+    finally:
+        active_stats = previous
+
+
+@contextmanager
+def timed_phase(stats: AlgorithmStats, phase_name: str):
+    """
+    Adds the duration of the with block to a phase
+    :param stats: the statistics
+    :param phase_name: the phase
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_time(phase_name, time.perf_counter() - start)
+
+
+def record(stats: AlgorithmStats, **counts) -> None:
+    """
+    Adds to the counters of the statistics taken by an algorithm, if any
+    :param stats: the active_stats read at the start of the algorithm, or None
+    :param counts: the amount to add to every counter
+    """
+    if stats is not None:
+        stats.count(**counts)
+
+
+def phase(phase_name: str):
+    """
+    Times a phase of an algorithm when the instrumentation is on
+    :param phase_name: the phase
+    :return: a context manager (that does nothing when the instrumentation is off)
+    """
+    return nullcontext() if active_stats is None else timed_phase(active_stats, phase_name)
@@ -0,0 +1,339 @@
+import heapq
+import random
+import time
+from collections import deque
+from domain import Graph
+from exceptions import VertexError
+from utils.TSP import get_minimum_cost_hamiltonian
+# Anytime local search for the TSP on directed graphs: the nearest neighbour tour is improved with
+# Or-opt and 3-opt segment exchanges until it is locally optimal or the time budget runs out.
+
+# number of cheapest outbound edges of every vertex tried by the moves
+CANDIDATES = 8
+# longest segment moved by Or-opt
+OR_OPT_LENGTH = 3
+# longest segment swapped by the random kicks
+KICK_LENGTH = 50
+
+
+class LocalSearch:
+    """
+    A tour of every vertex that is improved by local search.
+
+    Only moves that keep the direction of every tour edge are used, so the search is valid for asymmetric
+    costs: Or-opt moves a segment of at most three vertices elsewhere, and the 3-opt segment exchange swaps
+    two consecutive segments (a1 > a2..b1 > b2..c1 > c2 becomes a1 > b2..c1 > a2..b1 > c2). Both only try new
+    edges from the candidate lists of the cheapest outbound (and, for Or-opt, inbound) edges of every vertex,
+    and the vertices that gave no improving move are skipped (don't-look bits) until a move changes one of
+    their tour edges.
+
+    Missing edges are allowed in the tour with a penalty larger than the cost of any Hamiltonian cycle, so the
+    search also repairs a nearest neighbour walk that got stuck.
+
+    With a time budget, every local optimum is perturbed by a random exchange of two short segments (next to a
+    missing edge if the tour still has one) and improved again, starting from the best tour found so far
+    (iterated local search). The improvement can be stopped and resumed at any time.
+    """
+
+    def __init__(self, graph: Graph, start: int = None, candidates: int = CANDIDATES, seed: int = None) -> None:
+        """
+        Creates a LocalSearch instance, starting from the nearest neighbour tour
+        :param graph: a weighted directed graph
+        :param start: the vertex the tour starts at (the smallest vertex by default)
+        :param candidates: the number of cheapest outbound edges of every vertex tried by the moves
+        :param seed: the seed of the random kicks
+        """
+        if graph.vertex_count() == 0:
+            raise ValueError("ERROR: The graph is empty!")
+
+        start = min(graph.vertices_iterator()) if start is None else start
+        if not graph.is_vertex(start):
+            raise VertexError("ERROR: Invalid vertex.")
+
+        self.__start = start
+        self.__costs = {(vertex1, vertex2): cost for vertex1, vertex2, cost in graph.edges_iterator()}
+        # every Hamiltonian cycle costs at most the limit, every tour with a missing edge more
+        self.__limit = sum(abs(cost) for cost in self.__costs.values())
+        self.__penalty = 2 * self.__limit + 1
+        self.__candidates = {
+            vertex: [neighbour for neighbour, _ in heapq.nsmallest(
+                candidates, graph.neighbour_costs_iterator(vertex), key=lambda pair: pair[1])]
+            for vertex in graph.vertices_iterator()
+        }
+        self.__inbound = {
+            vertex: heapq.nsmallest(candidates, graph.transpose_iterator(vertex),
+                                    key=lambda parent, vertex=vertex: self.__costs[parent, vertex])
+            for vertex in graph.vertices_iterator()
+        }
+
+        # the nearest neighbour walk; when it gets stuck, another walk continues from the first unvisited vertex
+        walk = list()
+        get_minimum_cost_hamiltonian(graph, start, walk)
+        if len(walk) > 1 and walk[-1] == start:
+            walk.pop()
+        reached = set(walk)
+        for vertex in sorted(graph.vertices_iterator()):
+            while vertex is not None and vertex not in reached:
+                walk.append(vertex)
+                reached.add(vertex)
+                vertex = min(((neighbour, cost) for neighbour, cost in graph.neighbour_costs_iterator(vertex)
+                              if neighbour not in reached), key=lambda pair: pair[1], default=(None, None))[0]
+
+        self.__tour = walk
+        self.__position = {vertex: index for index, vertex in enumerate(walk)}
+        self.__length = sum(self.__cost(walk[index - 1], walk[index]) for index in range(len(walk)))
+        self.__active = deque(walk)
+        self.__inactive = set()
+        self.__best_tour = list(walk)
+        self.__best_length = self.__length
+        self.__random = random.Random(seed)
+        self.__moves = 0
+        self.__kicks = 0
+        self.__elapsed = 0.0
+        self.__progress = [(0.0, self.cost)]
+
+    @property
+    def cost(self):
+        """
+        :return: the cost of the best tour found, or Inf if it still uses a missing edge
+        """
+        return self.__best_length if self.__best_length <= self.__limit else float("Inf")
+
+    @property
+    def tour(self):
+        """
+        :return: the best tour found as a cycle starting and ending with the starting vertex,
+                 or None if it still uses a missing edge
+        """
+        if self.__best_length > self.__limit:
+            return None
+
+        self.__save()
+        index = self.__best_tour.index(self.__start)
+        return self.__best_tour[index:] + self.__best_tour[:index + 1]
+
+    @property
+    def moves(self) -> int:
+        """
+        :return: the number of improving moves applied
+        """
+        return self.__moves
+
+    @property
+    def kicks(self) -> int:
+        """
+        :return: the number of random kicks applied
+        """
+        return self.__kicks
+
+    @property
+    def progress(self) -> list:
+        """
+        :return: the (seconds spent improving, cost) pairs of the initial tour and of every improvement
+        """
+        return self.__progress
+
+    def is_local_optimum(self) -> bool:
+        """
+        :return: True if no move of the neighbourhood improves the current tour
+        """
+        return not self.__active
+
+    def improve(self, time_limit: float = None):
+        """
+        Improves the tour until the time runs out, or until it is locally optimal without a time limit
+        :param time_limit: the wall-clock budget in seconds, or None to stop at the first local optimum
+        :return: the cost of the best tour found, or Inf if it still uses a missing edge
+        """
+        started = time.perf_counter()
+        deadline = None if time_limit is None else started + time_limit
+        active = self.__active
+
+        while deadline is None or time.perf_counter() < deadline:
+            if not active:
+                if deadline is None or len(self.__tour) < 3:
+                    break
+                self.__kick()
+                continue
+
+            vertex = active.popleft()
+            touched = self.__or_opt(vertex) or self.__three_opt(vertex)
+            if not touched:
+                self.__inactive.add(vertex)
+                continue
+
+            self.__moves += 1
+            active.append(vertex)
+            self.__activate(touched)
+            if self.__length < self.__best_length:
+                self.__best_length = self.__length
+                self.__best_tour = None
+                self.__progress.append((self.__elapsed + time.perf_counter() - started, self.cost))
+
+        self.__elapsed += time.perf_counter() - started
+        return self.cost
+
+    def __activate(self, vertices) -> None:
+        """
+        Clears the don't-look bits of vertices
+        """
+        for vertex in vertices:
+            if vertex in self.__inactive:
+                self.__inactive.remove(vertex)
+                self.__active.append(vertex)
+
+    def __save(self) -> None:
+        """
+        Copies the current tour if it is the best one and was not copied yet
+        """
+        if self.__best_tour is None:
+            self.__best_tour = list(self.__tour)
+
+    def __kick(self) -> None:
+        """
+        Goes back to the best tour and exchanges two random consecutive segments of it
+        """
+        self.__save()
+        if self.__length > self.__best_length:
+            self.__tour = list(self.__best_tour)
+            self.__position = {vertex: index for index, vertex in enumerate(self.__tour)}
+            self.__length = self.__best_length
+
+        tour, cost = self.__tour, self.__cost
+        size = len(tour)
+        missing = [index for index in range(size) if (tour[index], tour[(index + 1) % size]) not in self.__costs]
+        a1 = tour[self.__random.choice(missing)] if missing else self.__random.choice(tour)
+
+        middle = self.__random.randint(1, min(KICK_LENGTH, size - 2))
+        end = middle + self.__random.randint(1, min(KICK_LENGTH, size - 1 - middle))
+        index = self.__position[a1]
+        a2, b1, b2 = tour[(index + 1) % size], tour[(index + middle) % size], tour[(index + middle + 1) % size]
+        c1, c2 = tour[(index + end) % size], tour[(index + end + 1) % size]
+        gain = cost(a1, a2) + cost(b1, b2) + cost(c1, c2) - cost(a1, b2) - cost(b1, c2) - cost(c1, a2)
+
+        self.__kicks += 1
+        self.__activate(self.__exchange(a1, b1, c1, gain))
+
+    def __cost(self, vertex1: int, vertex2: int):
+        """
+        :return: the cost of an edge, or the penalty if it is missing
+        """
+        return self.__costs.get((vertex1, vertex2), self.__penalty)
+
+    def __offset(self, origin: int, vertex: int) -> int:
+        """
+        :return: the number of tour edges from origin to vertex
+        """
+        return (self.__position[vertex] - self.__position[origin]) % len(self.__tour)
+
+    def __exchange(self, a1: int, b1: int, c1: int, gain) -> tuple:
+        """
+        Swaps the segments a2..b1 and b2..c1 that follow a1 in the tour
+        :param gain: the decrease of the cost
+        :return: the vertices whose tour edges changed
+        """
+        tour, position = self.__tour, self.__position
+        size = len(tour)
+        first = position[a1] + 1
+        middle = self.__offset(a1, b1)
+        end = self.__offset(a1, c1)
+
+        segment = [tour[(first + index) % size] for index in range(end)]
+        a2, b2, c2 = segment[0], segment[middle], tour[(first + end) % size]
+        for index, vertex in enumerate(segment[middle:] + segment[:middle]):
+            index = (first + index) % size
+            tour[index] = vertex
+            position[vertex] = index
+
+        self.__length -= gain
+        return a1, a2, b1, b2, c1, c2
+
+    def __or_opt(self, vertex: int):
+        """
+        Tries to move the segments of at most OR_OPT_LENGTH vertices starting at a vertex
+        :return: the vertices whose tour edges changed, or None if no move improves the tour
+        """
+        tour, position, candidates, cost = self.__tour, self.__position, self.__candidates, self.__cost
+        inbound = self.__inbound
+        size = len(tour)
+        index = position[vertex]
+        previous = tour[index - 1]
+
+        for length in range(1, min(OR_OPT_LENGTH, size - 3) + 1):
+            last = tour[(index + length - 1) % size]
+            following = tour[(index + length) % size]
+            removed = cost(previous, vertex) + cost(last, following) - cost(previous, following)
+            if removed <= 0:
+                continue
+
+            # the segment goes between before and after, with a candidate edge leaving it or entering it
+            pairs = [(tour[position[after] - 1], after) for after in candidates[last]]
+            pairs.extend((before, tour[(position[before] + 1) % size]) for before in inbound[vertex])
+            for before, after in pairs:
+                offset = self.__offset(vertex, before)
+                if offset < length or before == previous:
+                    continue
+
+                gain = removed + cost(before, after) - cost(before, vertex) - cost(last, after)
+                if gain > 0:
+                    # on the cycle, moving the segment is swapping it with following..before
+                    return self.__exchange(previous, last, before, gain)
+
+        return None
+
+    def __three_opt(self, a1: int):
+        """
+        Tries the segment exchanges whose first removed edge starts at a vertex
+        :return: the vertices whose tour edges changed, or None if no move improves the tour
+        """
+        tour, position, candidates, cost = self.__tour, self.__position, self.__candidates, self.__cost
+        size = len(tour)
+        a2 = tour[(position[a1] + 1) % size]
+        removed = cost(a1, a2)
+
+        for b2 in candidates[a1]:
+            gain1 = removed - cost(a1, b2)
+            if gain1 <= 0:
+                break
+
+            offset_b2 = self.__offset(a1, b2)
+            if offset_b2 < 2:
+                continue
+
+            b1 = tour[position[b2] - 1]
+            gain1 += cost(b1, b2)
+            for c2 in candidates[b1]:
+                gain2 = gain1 - cost(b1, c2)
+                if gain2 <= 0:
+                    break
+
+                offset_c2 = self.__offset(a1, c2) or size
+                if offset_c2 <= offset_b2:
+                    continue
+
+                c1 = tour[position[c2] - 1]
+                gain = gain2 + cost(c1, c2) - cost(c1, a2)
+                if gain > 0:
+                    return self.__exchange(a1, b1, c1, gain)
+
+        return None
+
+
+def local_search_tsp(graph: Graph, time_limit: float = 1.0, start: int = None, candidates: int = CANDIDATES,
+                     seed: int = None) -> tuple:
+    """
+    Finds a low cost Hamiltonian cycle by improving the nearest neighbour tour with local search
+    :param graph: a weighted directed graph
+    :param time_limit: the wall-clock budget in seconds, or None to stop at the first local optimum; it includes
+                       building the candidate lists and the first tour, which always run to their end
+    :param start: the vertex the cycle starts and ends at (the smallest vertex by default)
+    :param candidates: the number of cheapest outbound edges of every vertex tried by the moves
+    :param seed: the seed of the random kicks
+    :return: the cost and the best cycle found, or Inf and None if no Hamiltonian cycle was found
+    """
+    started = time.perf_counter()
+    search = LocalSearch(graph, start, candidates, seed)
+    if time_limit is not None:
+        time_limit = max(0.0, time_limit - (time.perf_counter() - started))
+    search.improve(time_limit)
+    return search.cost, search.tour
@@ -1,58 +1,154 @@
 from domain import Graph
+from exceptions import VertexError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 # 6. Given a digraph with costs, find a minimum cost Hamiltonian cycle (i.e., solve the TSP)
 
+# the largest graph solved exactly by held_karp: its tables take 2^(V - 1) x (V - 1) entries
+HELD_KARP_LIMIT = 24
+# the largest graph the menu and the command line solve with held_karp without being asked to (under a second
+# and 70 MB at 20 vertices, while 24 vertices take about 1 GB and 40 seconds)
+HELD_KARP_AUTO_LIMIT = 20
+
 
 def get_minimum_cost_hamiltonian(graph: Graph, start: int, visited: list) -> int:
     """
-    Computes the minimum cost Hamiltonian cycle (Travelling Salesman Problem)
+    Computes a low cost Hamiltonian cycle (Travelling Salesman Problem) with the greedy nearest neighbour walk.
+    The walk is not always optimal, see held_karp for the exact solution.
 
     :param graph: a weighted directed graph
     :param start: the starting vertex
     :param visited: a list that will keep track of the already visited vertices and the final cycle
-    :return: the cost of the minimum cost Hamiltonian cycle
+    :return: the cost of the cycle, or Inf if the walk gets stuck (visited then holds the walk up to that point)
     """
     visited.append(start)
+    seen = {start}
     current_vertex = start
     minimum_cost = 0
 
     # loop through every unvisited vertex
     while len(visited) != graph.vertex_count():
         current_minimum = float("Inf")
-        other_vertex = -1
+        other_vertex = None
 
         # we go through the neighbours of the current vertex
-        for outbound in graph.neighbours_iterator(current_vertex):
-            current_cost = graph.get_edge_cost(current_vertex, outbound)
-
-            if outbound not in visited and current_cost < current_minimum:
+        for outbound, current_cost in graph.neighbour_costs_iterator(current_vertex):
+            if outbound not in seen and current_cost < current_minimum:
                 current_minimum = current_cost
                 other_vertex = outbound
 
-        # check the last edge
-        if len(visited) == graph.vertex_count() - 1 and graph.is_edge(current_vertex, start):
-            current_cost = graph.get_edge_cost(current_vertex, start)
-
-            if current_cost < current_minimum:
-                current_minimum = current_cost
-                other_vertex = start
-
-        # check if there is another vertex
-        if other_vertex != -1:
-            minimum_cost += current_minimum
-            visited.append(other_vertex)
-            current_vertex = other_vertex
-        else: # if there is no other vertex, we start from the first unvisited vertex
-            for vertex in graph.vertices_iterator():
-                if vertex not in visited:
-                    current_vertex = vertex
-                    break
+        # every neighbour was already visited, the walk cannot be completed
+        if other_vertex is None:
+            return float("Inf")
 
-        # while loop end for visibility
+        minimum_cost += current_minimum
+        visited.append(other_vertex)
+        seen.add(other_vertex)
+        current_vertex = other_vertex
 
     # check the last edge
-    if current_vertex != start:
-        visited.append(start)
-        minimum_cost += graph.get_edge_cost(current_vertex, start)
+    if not graph.is_edge(current_vertex, start):
+        return float("Inf")
+
+    visited.append(start)
+    minimum_cost += graph.get_edge_cost(current_vertex, start)
 
     # return the minimum cost
     return minimum_cost
+
+
+def cost_matrix(graph: Graph) -> tuple:
+    """
+    Builds the dense cost matrix of a graph
+    :param graph: a directed graph, compact graph or frozen graph
+    :return: the vertex ids in ascending order and the V x V matrix of the edge costs (np.inf where there is no edge)
+    """
+    if np is None:
+        raise ImportError("ERROR: NumPy is required for the exact TSP solvers!")
+
+    ids = sorted(graph.vertices_iterator())
+    position = {vertex: index for index, vertex in enumerate(ids)}
+    matrix = np.full((len(ids), len(ids)), np.inf)
+    for vertex1, vertex2, cost in graph.edges_iterator():
+        matrix[position[vertex1], position[vertex2]] = cost
+
+    return ids, matrix
+
+
+def held_karp(graph: Graph, start: int = None) -> tuple:
+    """
+    Computes the minimum cost Hamiltonian cycle exactly with the Held–Karp dynamic programming algorithm
+
+    best[S, j] is the cheapest path that starts at the starting vertex, visits exactly the set S of the other
+    vertices (a bitmask) and ends at j. The sets are handled in layers of equal size, and every layer is computed
+    with one vectorized minimum per ending vertex, so Python only loops over V^2 (layer, vertex) pairs.
+    The costs are stored as float32 when the integers stay exact and the choices as int8,
+    so 24 vertices need about 1 GB.
+
+    Complexity: O(2^V x V^2)
+    Where V is the number of vertices
+    :param graph: a weighted directed graph
+    :param start: the vertex the cycle starts and ends at (the smallest vertex by default)
+    :return: the cost and the cycle (starting and ending with the starting vertex),
+             or Inf and None if the graph has no Hamiltonian cycle
+    """
+    ids, matrix = cost_matrix(graph)
+    vertex_count = len(ids)
+    if vertex_count == 0:
+        raise ValueError("ERROR: The graph is empty!")
+    if vertex_count > HELD_KARP_LIMIT:
+        raise ValueError(f"ERROR: Held-Karp is limited to {HELD_KARP_LIMIT} vertices!")
+
+    start = ids[0] if start is None else start
+    if start not in ids:
+        raise VertexError("ERROR: Invalid vertex.")
+
+    # put the starting vertex first, the others are the bits of the sets
+    order = [ids.index(start)] + [index for index in range(vertex_count) if ids[index] != start]
+    matrix = matrix[np.ix_(order, order)]
+    if vertex_count == 1:
+        return (float("Inf"), None) if matrix[0, 0] == np.inf else (int(matrix[0, 0]), [start, start])
+
+    others = vertex_count - 1
+    finite = np.abs(matrix[np.isfinite(matrix)])
+    exact = finite.size == 0 or finite.max() * vertex_count < 1 << 24
+    inner = matrix[1:, 1:].astype(np.float32 if exact else np.float64)
+
+    best = np.full((1 << others, others), np.inf, dtype=inner.dtype)
+    choice = np.zeros((1 << others, others), dtype=np.int8)
+    singles = 1 << np.arange(others)
+    best[singles, np.arange(others)] = matrix[0, 1:]
+
+    # group the sets by their size
+    sets = np.arange(1 << others, dtype=np.int32)
+    sizes = np.zeros(1 << others, dtype=np.int8)
+    for bit in range(others):
+        sizes += (sets >> bit) & 1
+    layers = np.split(np.argsort(sizes, kind="stable").astype(np.int32), np.cumsum(np.bincount(sizes))[:-1])
+
+    for layer in layers[2:]:
+        for last in range(others):
+            subsets = layer[(layer >> last) & 1 == 1]
+            previous = best[subsets ^ (1 << last)] + inner[:, last]
+            choice[subsets, last] = np.argmin(previous, axis=1)
+            best[subsets, last] = previous[np.arange(len(subsets)), choice[subsets, last]]
+
+    full = (1 << others) - 1
+    totals = best[full].astype(np.float64) + matrix[1:, 0]
+    last = int(np.argmin(totals))
+    if totals[last] == np.inf:
+        return float("Inf"), None
+
+    # walk the choices back from the full set
+    cycle = [start]
+    subset = full
+    while subset:
+        cycle.append(ids[order[last + 1]])
+        subset, last = subset ^ (1 << last), int(choice[subset, last])
+    cycle.append(start)
+    cycle[1:-1] = reversed(cycle[1:-1])
+
+    return int(totals.min()), cycle
@@ -1,44 +1,240 @@
 import os
-from domain import Graph
+import gzip
+import warnings
+from itertools import islice
+from time import perf_counter
+from domain import Graph, CompactGraph
+from exceptions import EdgeError
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-def read_file(file_path: str) -> Graph:
-    file_path = os.path.join(os.path.realpath(__file__), "..", "..", "resources", file_path)
+# size of the blocks read by the bulk loader
+CHUNK_SIZE = 1 << 24
+# number of edges formatted at once by the writer
+WRITE_BATCH_SIZE = 1 << 16
+# size of the buffer used when writing files
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def resource_path(file_path: str) -> str:
+    """
+    Returns the path of a file in the resources directory
+    :param file_path: the name of the file
+    :return: the full path
+    """
+    return os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "resources", file_path)
+
+
+def open_resource(file_path: str, mode: str):
+    """
+    Opens a file for reading, transparently decompressing it if its name ends with .gz
+    :param file_path: the full path of the file
+    :param mode: the mode in which the file is opened
+    :return: the file object
+    """
+    if file_path.endswith(".gz"):
+        return gzip.open(file_path, mode)
+
+    return open(file_path, mode)
+
+
+def read_file(file_path: str, compact: bool = False, sparse: bool = False) -> Graph:
+    """
+    Reads a graph in the text format
+    :param file_path: the name of the file in the resources directory
+    :param compact: build a CompactGraph instead of a Graph
+    :param sparse: take the vertices from the edges instead of 0..n-1, for files whose vertex ids are not
+                   consecutive (the vertex count of the header is then ignored, and so are isolated vertices)
+    :return: the graph
+    """
+    file_path = resource_path(file_path)
     if os.stat(file_path).st_size == 0:
         raise FileNotFoundError("ERROR: The file is empty or does not exist!")
 
-    with open(file_path, "r") as file:
+    with open_resource(file_path, "rt") as file:
         vertex_count, edge_count = map(int, file.readline().split())
-        graph = Graph(vertex_count)
+        vertex_count = 0 if sparse else vertex_count
+        graph = CompactGraph(vertex_count) if compact else Graph(vertex_count)
 
         for _ in range(edge_count):
             vertex1, vertex2, cost = map(int, file.readline().split())
+            if sparse:
+                for vertex in (vertex1, vertex2):
+                    if not graph.is_vertex(vertex):
+                        graph.add_vertex(vertex)
             graph.add_edge(vertex1, vertex2, cost)
 
     return graph
 
 
-def write_file(file_path: str, graph: Graph) -> None:
+def parse_integers(data: bytes):
+    """
+    Parses the whitespace separated integers of a chunk of a text file
+    :param data: the chunk, which must not end in the middle of an integer
+    :return: a NumPy array of the integers when NumPy is available, a list otherwise
+    """
+    if np is None:
+        return list(map(int, data.split()))
+
+    # NumPy reads a single 0 from a chunk made of whitespace only
+    if not data or data.isspace():
+        return np.empty(0, dtype=np.int64)
+
+    try:
+        # parsed straight from the buffer, without a bytes object per integer; older NumPy versions only warn
+        # when the data is not made of integers
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            return np.fromstring(data, dtype=np.int64, sep=" ")
+    except (ValueError, DeprecationWarning):
+        raise ValueError("ERROR: The file contains a value that is not an integer!") from None
+
+
+def read_file_bulk(file_path: str, timings: dict = None, compact: bool = False) -> Graph:
+    """
+    Reads a graph in the text format in bulk: the file is read in large chunks and
+    the integers of every chunk are parsed in one go (with NumPy when it is available),
+    the edges are validated in a single vectorized pass and then inserted
+    without the per-edge checks of Graph.add_edge
+    :param file_path: the name of the file in the resources directory
+    :param timings: an optional dictionary that receives the duration of each phase, in seconds
+    :param compact: build a CompactGraph instead of a Graph
+    :return: the graph
+    """
+    timings = dict() if timings is None else timings
+    file_path = resource_path(file_path)
+    if os.stat(file_path).st_size == 0:
+        raise FileNotFoundError("ERROR: The file is empty or does not exist!")
+
+    timings["read"], timings["parse"] = 0.0, 0.0
+    parts = []
+    with open_resource(file_path, "rb") as file:
+        # the integer cut at the end of a chunk is carried over to the next one
+        carry = b""
+        while True:
+            start = perf_counter()
+            chunk = file.read(CHUNK_SIZE)
+            timings["read"] += perf_counter() - start
+
+            start = perf_counter()
+            data = carry + chunk
+            if chunk:
+                cut = max(data.rfind(separator) for separator in (b" ", b"\t", b"\r", b"\n"))
+                data, carry = data[:cut + 1], data[cut + 1:]
+            parts.append(parse_integers(data))
+            timings["parse"] += perf_counter() - start
+            if not chunk:
+                break
+
+    start = perf_counter()
+    if np is not None:
+        values = np.concatenate(parts)
+    else:
+        values = [value for part in parts for value in part]
+    del parts
+    timings["parse"] += perf_counter() - start
+
+    start = perf_counter()
+    if len(values) < 2:
+        raise ValueError("ERROR: The file does not start with the vertex and edge counts!")
+
+    vertex_count, edge_count = int(values[0]), int(values[1])
+    if len(values) < 2 + 3 * edge_count:
+        raise ValueError(f"ERROR: The file describes fewer than {edge_count} edges!")
+
+    vertices1 = values[2:2 + 3 * edge_count:3]
+    vertices2 = values[3:3 + 3 * edge_count:3]
+    edge_costs = values[4:4 + 3 * edge_count:3]
+
+    if np is not None:
+        lowest = int(min(vertices1.min(), vertices2.min())) if edge_count > 0 else 0
+        highest = int(max(vertices1.max(), vertices2.max())) if edge_count > 0 else 0
+        unique_edges = np.unique(vertices1 * vertex_count + vertices2).size
+        vertices1, vertices2, edge_costs = vertices1.tolist(), vertices2.tolist(), edge_costs.tolist()
+    else:
+        lowest = min(min(vertices1), min(vertices2)) if edge_count > 0 else 0
+        highest = max(max(vertices1), max(vertices2)) if edge_count > 0 else 0
+        unique_edges = len(set(zip(vertices1, vertices2)))
+
+    if edge_count > 0 and (lowest < 0 or highest >= vertex_count):
+        raise EdgeError("ERROR: Vertices on edge do not exist.")
+    if unique_edges != edge_count:
+        raise EdgeError("ERROR: Edge already exists")
+    timings["validate"] = perf_counter() - start
+
+    start = perf_counter()
+    graph = CompactGraph(vertex_count) if compact else Graph(vertex_count)
+    graph.add_edges_unchecked(vertices1, vertices2, edge_costs)
+    timings["build"] = perf_counter() - start
+
+    return graph
+
+
+def write_file(file_path: str, graph: Graph, atomic: bool = True, compress: bool = None) -> None:
+    """
+    Writes a graph in the text format. The edges are taken straight from the edge store
+    and formatted in large batches
+    :param file_path: the name of the file in the resources directory
+    :param graph: the graph
+    :param atomic: write to a temporary file first and rename it over the destination,
+                   so a crash never leaves a partially written file behind
+    :param compress: gzip the output (by default only when the file name ends with .gz)
+    """
     if graph.vertex_count() == 0:
         raise ValueError("ERROR: The graph is empty!")
 
-    file_path = os.path.join(os.path.realpath(__file__), "..", "..", "resources", file_path)
+    file_path = resource_path(file_path)
+    if compress is None:
+        compress = file_path.endswith(".gz")
+
+    if atomic:
+        # created with the default permissions, like open() creates a file, so the kernel applies the umask
+        output_path = f"{file_path}.{os.urandom(6).hex()}.tmp"
+        os.close(os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+    else:
+        output_path = file_path
+
+    try:
+        if compress:
+            file = gzip.open(output_path, "wt", compresslevel=6)
+        else:
+            file = open(output_path, "w", buffering=WRITE_BUFFER_SIZE)
+
+        with file:
+            file.write(f"{graph.vertex_count()} {graph.edge_count()}\n")
+
+            edges = graph.edges_iterator()
+            while True:
+                batch = "".join([f"{vertex1} {vertex2} {cost}\n"
+                                 for vertex1, vertex2, cost in islice(edges, WRITE_BATCH_SIZE)])
+                if not batch:
+                    break
+                file.write(batch)
 
-    with open(file_path, "w") as file:
-        file.truncate(0)
-        file.write(f"{graph.vertex_count()} {graph.edge_count()}\n")
+        if atomic:
+            # make sure the data reached the disk before the rename makes it visible
+            with open(output_path, "rb") as written:
+                os.fsync(written.fileno())
 
-        for vertex in graph.vertices_iterator():
-            for neighbour in graph.neighbours_iterator(vertex):
-                file.write(f"{vertex} {neighbour} {graph.get_edge_cost(vertex, neighbour)}\n")
+            # keep the permissions of the file being replaced
+            if os.path.exists(file_path):
+                os.chmod(output_path, os.stat(file_path).st_mode & 0o777)
+            os.replace(output_path, file_path)
+    except BaseException:
+        if atomic and os.path.exists(output_path):
+            os.remove(output_path)
+        raise
 
 
 def read_from_activities_file(file_path: str) -> Graph:
-    file_path = os.path.join(os.path.realpath(__file__), "..", "..", "resources", file_path)
+    file_path = resource_path(file_path)
     if os.stat(file_path).st_size == 0:
         raise FileNotFoundError("ERROR: The file is empty or does not exist!")
 
-    with open(file_path, "r") as file:
+    with open_resource(file_path, "rt") as file:
         lines = file.readlines()
         graph = Graph(0, 0)
 
@@ -1,9 +1,48 @@
-from .Utils import read_file, write_file, read_from_activities_file
-from .BFS import backwards_breadth_first_search, reconstruct_path_bfs
-from .Ford import ford_algorithm, reconstruct_path_ford
-from .Activities import topological_sort_dfs, dag, compute_times
-from .TSP import get_minimum_cost_hamiltonian
+from .Instrumentation import AlgorithmStats, CountingGraph, enable_stats, disable_stats, instrument
+from .Utils import read_file, read_file_bulk, write_file, read_from_activities_file
+from .Binary import write_binary_file, read_binary_file, convert_text_to_binary, convert_binary_to_text
+from .Generators import (
+    uniform_costs, normal_costs, constant_costs,
+    gnm_random_graph, gnp_random_graph, power_law_graph, grid_graph, layered_dag
+)
+from .BFS import (
+    backwards_breadth_first_search, backwards_breadth_first_tree, bidirectional_breadth_first_search,
+    backwards_breadth_first_search_frozen,
+    reconstruct_path_bfs
+)
+from .Ford import (
+    ford_single_source, has_parent_cycle, ford_algorithm, ford_algorithm_frozen,
+    edge_arrays, ford_algorithm_vectorized, reconstruct_path_ford
+)
+from .Dijkstra import (
+    BinaryHeap, RadixHeap, cost_summary, has_negative_costs, dijkstra_single_source, dijkstra_algorithm, shortest_path
+)
+from .Cache import ShortestPathCache
+from .Dynamic import DynamicShortestPaths
+from .Batch import batch_shortest_paths
+from .AllPairs import DistanceMatrix, johnson, floyd_warshall, all_pairs_shortest_paths
+from .Activities import (
+    topological_sort_dfs, topological_sort_iterative, topological_sort_kahn, dag,
+    CriticalPathSchedule, compute_times, compute_times_frozen
+)
+from .TSP import get_minimum_cost_hamiltonian, cost_matrix, held_karp, HELD_KARP_LIMIT, HELD_KARP_AUTO_LIMIT
+from .LocalSearch import LocalSearch, local_search_tsp
+from .BranchAndBound import BranchAndBound, branch_and_bound_tsp, BRANCH_AND_BOUND_LIMIT
 
-__all__ = ["read_file", "write_file", "read_from_activities_file",
-           "backwards_breadth_first_search", "reconstruct_path_bfs", "ford_algorithm", "reconstruct_path_ford",
-           "topological_sort_dfs", "dag", "compute_times", "get_minimum_cost_hamiltonian"]
+__all__ = ["AlgorithmStats", "CountingGraph", "enable_stats", "disable_stats", "instrument",
+           "read_file", "read_file_bulk", "write_file", "read_from_activities_file",
+           "write_binary_file", "read_binary_file", "convert_text_to_binary", "convert_binary_to_text",
+           "uniform_costs", "normal_costs", "constant_costs",
+           "gnm_random_graph", "gnp_random_graph", "power_law_graph", "grid_graph", "layered_dag",
+           "backwards_breadth_first_search", "backwards_breadth_first_tree", "bidirectional_breadth_first_search",
+           "backwards_breadth_first_search_frozen", "reconstruct_path_bfs",
+           "ford_single_source", "has_parent_cycle", "ford_algorithm", "ford_algorithm_frozen",
+           "edge_arrays", "ford_algorithm_vectorized", "reconstruct_path_ford",
+           "BinaryHeap", "RadixHeap", "cost_summary", "has_negative_costs", "dijkstra_single_source",
+           "dijkstra_algorithm", "shortest_path",
+           "ShortestPathCache", "DynamicShortestPaths", "batch_shortest_paths",
+           "DistanceMatrix", "johnson", "floyd_warshall", "all_pairs_shortest_paths",
+           "topological_sort_dfs", "topological_sort_iterative", "topological_sort_kahn", "dag",
+           "CriticalPathSchedule", "compute_times", "compute_times_frozen",
+           "get_minimum_cost_hamiltonian", "cost_matrix", "held_karp", "HELD_KARP_LIMIT", "HELD_KARP_AUTO_LIMIT",
+           "LocalSearch", "local_search_tsp", "BranchAndBound", "branch_and_bound_tsp", "BRANCH_AND_BOUND_LIMIT"]